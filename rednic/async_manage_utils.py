@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# asyncio interface for manage cinder volumes
+from concurrent import futures
+from rednic.manage_utils import ManageUtils
+import asyncio
+import functools
+import threading
+
+
+class AsyncManageUtils(object):
+    """ Collection of coroutines for manage cinder volumes
+
+    All blocking calls to cinder, nova and ssh are done in own bounded
+    pool of threads, so default executor of event loop is never used.
+    Calls that are waiting for free thread can be cancelled or timed
+    out without any request to openstack. Call that is already running
+    can't be interrupted: after timeout the coroutine raises error, but
+    the thread stays busy until the blocking call is finished.
+    """
+
+    # synchronous object that do real work
+    _manage = None
+
+    # pool for blocking calls
+    _executor = None
+
+    # default timeout for each call in seconds
+    _timeout = None
+
+    # logging object
+    _log = None
+
+    def __init__(
+        self, user, password, tenant, auth_url, log=None,
+        max_workers=32, timeout=None, **kwargs
+    ):
+        """ Prepare connection to cinder and nova:
+
+        Args:
+            user: user name in opensack
+            password: password for this user
+            tenant: project name
+            auth_url: authentication url
+            log: logging object that can be used for logging,
+                can be None
+            max_workers: maximum count of parallel blocking calls
+            timeout: default timeout for each call in seconds,
+                None for wait forever
+            kwargs: other arguments for ManageUtils
+        """
+        self._manage = ManageUtils(
+            user, password, tenant, auth_url, log, **kwargs
+        )
+        self._log = self._manage._log
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="rednic"
+        )
+        self._timeout = timeout
+
+    @property
+    def manage(self):
+        """ synchronous ManageUtils used inside """
+        return self._manage
+
+    async def __run__(self, func, *args, timeout=None, **kwargs):
+        """ Run blocking function in own pool of threads
+
+        Args:
+            func: function for call
+            timeout: timeout for call in seconds,
+                None for use default timeout
+
+        Returns:
+            result of function
+
+        Raises:
+            asyncio.TimeoutError: in case when call is not finished
+                in time, started call is still running in its thread
+        """
+        if timeout is None:
+            timeout = self._timeout
+        job = asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+        try:
+            return await asyncio.wait_for(job, timeout)
+        except asyncio.TimeoutError:
+            self._log.error("%s timed out" % func.__name__)
+            raise
+
+    async def close(self):
+        """ stop pool of threads, calls in progress are finished,
+        and close ssh connections
+
+        Wait for pool and close of synchronous object (with save of
+        inventory) are done in own thread, so neither event loop nor
+        its default executor are blocked.
+        """
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+
+        def finish(result, error):
+            if done.done():
+                # close was cancelled
+                return
+            if error is not None:
+                done.set_exception(error)
+            else:
+                done.set_result(result)
+
+        def shutdown():
+            try:
+                self._executor.shutdown()
+                self._manage.close()
+            except Exception as e:
+                loop.call_soon_threadsafe(finish, None, e)
+            else:
+                loop.call_soon_threadsafe(finish, None, None)
+
+        threading.Thread(
+            target=shutdown, name="rednic-close", daemon=True
+        ).start()
+        await done
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def warmup(self, services=("cinder", "nova"), timeout=None):
+        """create and authenticate clients before first real call,
+        see ManageUtils.warmup
+        """
+        await self.__run__(
+            self._manage.warmup, services, True, timeout=timeout
+        )
+
+    def cache_clear(self):
+        """ drop everything from volume index and instance cache """
+        self._manage.cache_clear()
+
+    async def volume_list(self, timeout=None):
+        """get list of existed volumes, see ManageUtils.volume_list"""
+        return await self.__run__(self._manage.volume_list, timeout=timeout)
+
+    async def volume_create(
+        self, size, name=None, description=None, timeout=None
+    ):
+        """create volume, see ManageUtils.volume_create"""
+        return await self.__run__(
+            self._manage.volume_create, size, name, description,
+            timeout=timeout
+        )
+
+    async def volume_create_many(self, specs, timeout=None):
+        """create several volumes in parallel,
+        see ManageUtils.volume_create_many
+
+        Creates are shared with other calls in the same pool of
+        threads, so parallelism is limited by max_workers.
+        """
+        self._log.debug("create %d volumes" % len(specs))
+        results = await asyncio.gather(*[
+            self.volume_create(*spec, timeout=timeout) for spec in specs
+        ], return_exceptions=True)
+        return [
+            (None, result) if isinstance(result, BaseException)
+            else (result, None)
+            for result in results
+        ]
+
+    async def wait_for_volumes(
+        self, vol_ids, target="available", wait_timeout=300,
+        interval=1, max_interval=10, timeout=None
+    ):
+        """wait while all volumes are in terminal status,
+        see ManageUtils.wait_for_volumes
+
+        Args:
+            wait_timeout: maximum seconds for wait, timeout argument
+                of synchronous call
+        """
+        return await self.__run__(
+            self._manage.wait_for_volumes, vol_ids, target, wait_timeout,
+            interval, max_interval, timeout=timeout
+        )
+
+    async def volume_find(self, timeout=None, **filters):
+        """get list of volumes filtered by cinder,
+        see ManageUtils.volume_find
+        """
+        return await self.__run__(
+            self._manage.volume_find, timeout=timeout, **filters
+        )
+
+    async def instance_find(self, timeout=None, **filters):
+        """get list of instances filtered by nova,
+        see ManageUtils.instance_find
+        """
+        return await self.__run__(
+            self._manage.instance_find, timeout=timeout, **filters
+        )
+
+    async def volume_get(self, vol_id=None, name=None, timeout=None):
+        """get volume by vol_id or name, see ManageUtils.volume_get"""
+        return await self.__run__(
+            self._manage.volume_get, vol_id, name, timeout=timeout
+        )
+
+    async def instance_get(self, ins_id=None, name=None, timeout=None):
+        """get instance by ins_id or name, see ManageUtils.instance_get"""
+        return await self.__run__(
+            self._manage.instance_get, ins_id, name, timeout=timeout
+        )
+
+    async def instance_attach_ip(
+        self, ip, ins_id=None, name=None, timeout=None
+    ):
+        """attach some ip to instance,
+        see ManageUtils.instance_attach_ip
+        """
+        return await self.__run__(
+            self._manage.instance_attach_ip, ip, ins_id, name,
+            timeout=timeout
+        )
+
+    async def instance_detach_ip(
+        self, ip, ins_id=None, name=None, timeout=None
+    ):
+        """detach some ip from instance,
+        see ManageUtils.instance_detach_ip
+        """
+        return await self.__run__(
+            self._manage.instance_detach_ip, ip, ins_id, name,
+            timeout=timeout
+        )
+
+    async def volume_detach(self, vol_id=None, name=None, timeout=None):
+        """detach volume by vol_id or name,
+        see ManageUtils.volume_detach
+        """
+        return await self.__run__(
+            self._manage.volume_detach, vol_id, name, timeout=timeout
+        )
+
+    async def volume_delete(self, vol_id=None, name=None, timeout=None):
+        """drop volume by vol_id or name, see ManageUtils.volume_delete"""
+        return await self.__run__(
+            self._manage.volume_delete, vol_id, name, timeout=timeout
+        )
+
+    async def volume_detach_many(
+        self, vol_ids=None, names=None, max_workers=8, timeout=None
+    ):
+        """detach several volumes in parallel,
+        see ManageUtils.volume_detach_many
+        """
+        return await self.__run__(
+            self._manage.volume_detach_many, vol_ids, names, max_workers,
+            timeout=timeout
+        )
+
+    async def volume_delete_many(
+        self, vol_ids=None, names=None, detach=False, max_workers=8,
+        detach_timeout=300, interval=2, timeout=None
+    ):
+        """drop several volumes in parallel,
+        see ManageUtils.volume_delete_many
+
+        Args:
+            detach_timeout: maximum seconds for wait detach of each
+                volume, timeout argument of synchronous call
+        """
+        return await self.__run__(
+            self._manage.volume_delete_many, vol_ids, names, detach,
+            max_workers, detach_timeout, interval, timeout=timeout
+        )
+
+    async def instance_list(self, timeout=None):
+        """get full list of avaible instnaces,
+        see ManageUtils.instance_list
+        """
+        return await self.__run__(
+            self._manage.instance_list, timeout=timeout
+        )
+
+    async def volume_attach(
+        self, mount_point, vol_id=None, vol_name=None,
+        ins_id=None, ins_name=None, refresh=True, timeout=None
+    ):
+        """attach volume to instance, see ManageUtils.volume_attach"""
+        return await self.__run__(
+            self._manage.volume_attach, mount_point,
+            vol_id=vol_id, vol_name=vol_name,
+            ins_id=ins_id, ins_name=ins_name, refresh=refresh,
+            timeout=timeout
+        )
+
+    async def volume_format(
+        self, mount_point, key_file, username, ins_ip, timeout=None
+    ):
+        """connect by ssh to instance and format volume,
+        see ManageUtils.volume_format
+
+        Timeout is used for ssh operations too, so thread is not
+        busy after timeout of call.
+        """
+        if timeout is None:
+            timeout = self._timeout
+        return await self.__run__(
+            self._manage.volume_format, mount_point, key_file, username,
+            ins_ip, timeout, timeout=timeout
+        )
+
+    async def volume_format_many(
+        self, targets, key_file, username, max_parallel=8,
+        format_timeout=600, timeout=None
+    ):
+        """connect by ssh to several instances and format volumes
+        in parallel, see ManageUtils.volume_format_many
+
+        Args:
+            format_timeout: maximum seconds for connect and format
+                of each volume, timeout argument of synchronous call
+        """
+        return await self.__run__(
+            self._manage.volume_format_many, targets, key_file, username,
+            max_parallel, format_timeout, timeout=timeout
+        )
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# small in-memory caches used by manage utils
+import collections
+import threading
+import time
+
+
+class TTLCache(object):
+    """ Thread safe mapping with time to live and LRU eviction """
+
+    # seconds before entry will be expired
+    _ttl = None
+
+    # maximum count of entries
+    _max_size = None
+
+    # function that return current time
+    _clock = None
+
+    # key -> (expire time, value) in LRU order
+    _data = None
+
+    # lock for all operations with data
+    _lock = None
+
+    def __init__(self, ttl, max_size=1024, clock=time.monotonic):
+        """ Create empty cache
+
+        Args:
+            ttl: seconds before entry will be expired
+            max_size: maximum count of entries, least recently
+                used entry will be dropped on overflow
+            clock: function that return current time in seconds
+        """
+        self._ttl = ttl
+        self._max_size = max_size
+        self._clock = clock
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """ get fresh value by key
+
+        Args:
+            key: key for search
+            default: value returned for missed or expired key
+
+        Returns:
+            cached value or default
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= self._clock():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        """ store value by key and restart time to live
+
+        Args:
+            key: key for store
+            value: value for store
+        """
+        with self._lock:
+            self._data[key] = (self._clock() + self._ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """ drop key from cache
+
+        Args:
+            key: key for drop
+            default: value returned for missed key
+
+        Returns:
+            dropped value or default
+        """
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None:
+                return default
+            return entry[1]
+
+    def clear(self):
+        """ drop everything """
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key, self) is not self
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
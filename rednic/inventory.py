@@ -0,0 +1,426 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# known volumes and instances stored in local sqlite file between runs
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from rednic.private_file import is_private, replace_private
+from rednic.records import VolumeRecord, InstanceRecord
+
+# version of snapshot format, snapshots of other versions are ignored
+SNAPSHOT_VERSION = 1
+
+# tables of snapshot: table -> record class
+TABLES = (
+    ("volumes", VolumeRecord),
+    ("instances", InstanceRecord),
+)
+
+
+def parse_timestamp(value):
+    """ parse iso 8601 time from cinder or nova
+
+    Returns:
+        naive datetime in UTC or None for empty or unknown value
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def format_timestamp(value):
+    """ iso 8601 time in UTC for search options of cinder and nova """
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class _Items(object):
+    """ Records by id with index by name, names are not unique,
+    first stored record is returned for name
+    """
+
+    __slots__ = ("by_id", "by_name")
+
+    def __init__(self):
+        self.by_id = {}
+        self.by_name = {}
+
+    def put(self, record):
+        self.drop(record.id)
+        self.by_id[record.id] = record
+        self.by_name.setdefault(record.name, []).append(record.id)
+
+    def drop(self, item_id):
+        record = self.by_id.pop(item_id, None)
+        if record is None:
+            return None
+        ids = self.by_name[record.name]
+        ids.remove(item_id)
+        if not ids:
+            del self.by_name[record.name]
+        return record
+
+    def named(self, name):
+        ids = self.by_name.get(name)
+        if not ids:
+            return None
+        return self.by_id[ids[0]]
+
+
+class Inventory(object):
+    """ Thread safe collection of volume and instance records with
+    index by name, can be saved to sqlite snapshot and loaded
+    in next run.
+
+    Inventory is stale after load from snapshot or mark_stale call,
+    and is fresh after replace by full list from openstack.
+    """
+
+    # path to snapshot file, None if inventory is not stored
+    _path = None
+
+    # function that return current unix time
+    _clock = None
+
+    # logging object
+    _log = None
+
+    # lock for all records
+    _lock = None
+
+    # volume records
+    _volumes = None
+
+    # instance records
+    _instances = None
+
+    # set while inventory is fresh
+    _fresh = None
+
+    # unix time when records were received from openstack,
+    # None if records were never received
+    _refreshed_at = None
+
+    # kind of records ("volumes" or "instances") -> newest updated_at
+    # of received records, naive datetime in UTC
+    _watermarks = None
+
+    def __init__(self, path=None, clock=time.time, log=None):
+        """ Create empty stale inventory
+
+        Args:
+            path: path to snapshot file, created on first save,
+                None for inventory only in memory
+            clock: function that return current unix time
+            log: logging object, can be None
+        """
+        if path is not None:
+            self._path = os.path.abspath(os.path.expanduser(path))
+        self._clock = clock
+        if log:
+            self._log = log
+        else:
+            self._log = logging.getLogger('rednic.inventory')
+        self._lock = threading.Lock()
+        self._volumes = _Items()
+        self._instances = _Items()
+        self._fresh = threading.Event()
+        self._watermarks = {}
+
+    @property
+    def path(self):
+        """ path to snapshot file or None """
+        return self._path
+
+    @property
+    def stale(self):
+        """ True if records are not revalidated after load """
+        return not self._fresh.is_set()
+
+    @property
+    def refreshed_at(self):
+        """ unix time when records were received from openstack,
+        None if records were never received
+        """
+        return self._refreshed_at
+
+    def watermark(self, kind):
+        """ newest updated_at of received records
+
+        Args:
+            kind: "volumes" or "instances"
+
+        Returns:
+            naive datetime in UTC or None if unknown
+        """
+        with self._lock:
+            return self._watermarks.get(kind)
+
+    def count(self, kind):
+        """ count of records
+
+        Args:
+            kind: "volumes" or "instances"
+        """
+        with self._lock:
+            if kind == "volumes":
+                return len(self._volumes.by_id)
+            return len(self._instances.by_id)
+
+    def mark_stale(self):
+        """ records must be revalidated """
+        self._fresh.clear()
+
+    def wait_fresh(self, timeout=None):
+        """ wait while records are revalidated
+
+        Returns:
+            True if inventory is fresh, False after timeout
+        """
+        return self._fresh.wait(timeout)
+
+    def replace(self, volumes, instances, refreshed_at=None,
+                watermarks=None):
+        """ replace all records by full lists and mark inventory fresh
+
+        Args:
+            volumes: list of VolumeRecord
+            instances: list of InstanceRecord
+            refreshed_at: unix time when list request was started,
+                current time by default
+            watermarks: dictionary kind -> newest updated_at
+                of records, see watermark
+        """
+        self.__replace__(volumes, instances, refreshed_at, watermarks)
+        self._fresh.set()
+
+    def __replace__(self, volumes, instances, refreshed_at, watermarks):
+        """ replace all records without change of freshness """
+        new_volumes = _Items()
+        for record in volumes:
+            new_volumes.put(record)
+        new_instances = _Items()
+        for record in instances:
+            new_instances.put(record)
+        with self._lock:
+            self._volumes = new_volumes
+            self._instances = new_instances
+            if refreshed_at is None:
+                refreshed_at = self._clock()
+            self._refreshed_at = refreshed_at
+            self._watermarks = {}
+            self.__watermarks__(watermarks)
+
+    def __watermarks__(self, watermarks):
+        """ update known watermarks, must be called with lock """
+        for kind, value in (watermarks or {}).items():
+            if value is not None:
+                self._watermarks[kind] = value
+
+    def apply(self, volumes=(), instances=(), dropped_volumes=(),
+              dropped_instances=(), watermarks=None, refreshed_at=None):
+        """ apply changed and deleted records at once
+
+        Args:
+            volumes: list of changed VolumeRecord
+            instances: list of changed InstanceRecord
+            dropped_volumes: ids of deleted volumes
+            dropped_instances: ids of deleted instances
+            watermarks: dictionary kind -> new newest updated_at
+            refreshed_at: unix time when changes request was started,
+                current time by default
+        """
+        with self._lock:
+            for record in volumes:
+                self._volumes.put(record)
+            for record in instances:
+                self._instances.put(record)
+            for vol_id in dropped_volumes:
+                self._volumes.drop(vol_id)
+            for ins_id in dropped_instances:
+                self._instances.drop(ins_id)
+            self.__watermarks__(watermarks)
+            if refreshed_at is None:
+                refreshed_at = self._clock()
+            self._refreshed_at = refreshed_at
+
+    def volume(self, vol_id):
+        """ volume record by id or None """
+        with self._lock:
+            return self._volumes.by_id.get(vol_id)
+
+    def instance(self, ins_id):
+        """ instance record by id or None """
+        with self._lock:
+            return self._instances.by_id.get(ins_id)
+
+    def volume_by_name(self, name):
+        """ volume record by name or None """
+        with self._lock:
+            return self._volumes.named(name)
+
+    def instance_by_name(self, name):
+        """ instance record by name or None """
+        with self._lock:
+            return self._instances.named(name)
+
+    def volumes(self):
+        """ list of all volume records """
+        with self._lock:
+            return list(self._volumes.by_id.values())
+
+    def instances(self):
+        """ list of all instance records """
+        with self._lock:
+            return list(self._instances.by_id.values())
+
+    def put_volume(self, record):
+        """ add or update volume record """
+        with self._lock:
+            self._volumes.put(record)
+
+    def put_instance(self, record):
+        """ add or update instance record """
+        with self._lock:
+            self._instances.put(record)
+
+    def drop_volume(self, vol_id):
+        """ forget volume, returns dropped record or None """
+        with self._lock:
+            return self._volumes.drop(vol_id)
+
+    def drop_instance(self, ins_id):
+        """ forget instance, returns dropped record or None """
+        with self._lock:
+            return self._instances.drop(ins_id)
+
+    def load(self):
+        """ load records from snapshot, inventory is stale after load,
+        missed, broken or unsafe snapshot is ignored
+
+        Returns:
+            True if snapshot is loaded
+        """
+        if self._path is None or not os.path.exists(self._path):
+            return False
+        try:
+            if not is_private(os.stat(self._path)):
+                self._log.warning(
+                    "inventory snapshot %s is accessible by other users, "
+                    "ignored" % self._path
+                )
+                return False
+            refreshed_at, watermarks, records = self.__read__()
+        except (OSError, ValueError, TypeError, sqlite3.Error) as e:
+            self._log.warning(
+                "inventory snapshot %s is not readable: %s" % (self._path, e)
+            )
+            return False
+        if records is None:
+            return False
+        volumes, instances = records
+        self.mark_stale()
+        self.__replace__(volumes, instances, refreshed_at, watermarks)
+        self._log.debug(
+            "loaded %d volumes and %d instances from snapshot" % (
+                len(volumes), len(instances)
+            )
+        )
+        return True
+
+    def __read__(self):
+        """ read records from snapshot
+
+        Returns:
+            (refreshed_at, watermarks, (volumes, instances)) or
+            (None, None, None) for snapshot of other version
+        """
+        conn = sqlite3.connect(self._path)
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            if meta.get("version") != str(SNAPSHOT_VERSION):
+                return None, None, None
+            records = tuple(
+                [
+                    record(*json.loads(data)) for (data, ) in conn.execute(
+                        "SELECT data FROM %s ORDER BY pos" % table
+                    )
+                ] for table, record in TABLES
+            )
+            watermarks = {}
+            for table, _ in TABLES:
+                watermark = parse_timestamp(meta.get("watermark:" + table))
+                if watermark is not None:
+                    watermarks[table] = watermark
+            return float(meta["refreshed_at"]), watermarks, records
+        finally:
+            conn.close()
+
+    def save(self):
+        """ store records to snapshot, errors of write are only logged
+
+        Returns:
+            True if snapshot is stored
+        """
+        if self._path is None:
+            return False
+        with self._lock:
+            refreshed_at = self._refreshed_at
+            watermarks = dict(self._watermarks)
+            records = (
+                list(self._volumes.by_id.values()),
+                list(self._instances.by_id.values()),
+            )
+        if refreshed_at is None:
+            # nothing was received from openstack
+            return False
+        try:
+            self.__write__(refreshed_at, watermarks, records)
+        except (OSError, TypeError, ValueError, sqlite3.Error) as e:
+            self._log.warning(
+                "inventory snapshot %s is not writable: %s" % (self._path, e)
+            )
+            return False
+        return True
+
+    def __write__(self, refreshed_at, watermarks, records):
+        """ replace snapshot by new one """
+        def write(temp_path):
+            conn = sqlite3.connect(temp_path)
+            try:
+                with conn:
+                    conn.execute(
+                        "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)"
+                    )
+                    conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                        ("version", str(SNAPSHOT_VERSION)),
+                        ("refreshed_at", repr(refreshed_at)),
+                    ] + [
+                        ("watermark:" + table, value.isoformat())
+                        for table, value in watermarks.items()
+                    ])
+                    for (table, _), items in zip(TABLES, records):
+                        conn.execute(
+                            "CREATE TABLE %s (pos INTEGER PRIMARY KEY, "
+                            "id TEXT, data TEXT)" % table
+                        )
+                        conn.executemany(
+                            "INSERT INTO %s VALUES (?, ?, ?)" % table, (
+                                (pos, str(item.id), json.dumps(
+                                    item.values(), default=str
+                                )) for pos, item in enumerate(items)
+                            )
+                        )
+            finally:
+                conn.close()
+
+        replace_private(self._path, write)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# load heavy modules on first use
+import importlib
+
+
+class LazyModule(object):
+    """ Proxy for module, real module is imported on first access
+    to any attribute
+    """
+
+    def __init__(self, name):
+        """ Args:
+            name: full name of module for import
+        """
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def __load__(self):
+        """ import real module if not imported yet
+
+        Returns:
+            real module
+        """
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self.__load__(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self.__load__(), attr, value)
+
+    def __repr__(self):
+        return "<lazy module '%s'>" % self.__dict__["_name"]
@@ -1,11 +1,83 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 # code for manage cinder volumes
-from cinderclient import client as cinder_client
-from cinderclient import exceptions as cinder_exceptions
-from novaclient import client as nova_client
-import paramiko
+from concurrent import futures
 import logging
+import re
+import threading
+import time
+from rednic import cache
+from rednic import inventory as inventories
+from rednic import lazy
+from rednic import metrics
+from rednic import notifications as events
+from rednic import remote_exec
+from rednic import session as keystone
+from rednic import ssh_keys
+from rednic import ssh_pool
+from rednic import token_cache as tokens
+from rednic.records import VolumeRecord, InstanceRecord
+
+# clients are imported on first use of service
+cinder_client = lazy.LazyModule("cinderclient.client")
+cinder_exceptions = lazy.LazyModule("cinderclient.exceptions")
+nova_client = lazy.LazyModule("novaclient.client")
+nova_exceptions = lazy.LazyModule("novaclient.exceptions")
+
+# volume statuses that will be changed by cinder without any request
+VOLUME_TRANSITIONAL_STATUSES = frozenset([
+    "creating", "attaching", "detaching", "deleting", "extending",
+    "downloading", "uploading", "reserved", "backing-up",
+    "restoring-backup", "retyping", "maintenance"
+])
+
+# status for volumes that are not in list anymore
+VOLUME_DELETED = "deleted"
+
+# statuses of deleted volumes in list of changes
+VOLUME_DELETED_STATUSES = frozenset([VOLUME_DELETED])
+
+# statuses of deleted instances in list of changes
+INSTANCE_DELETED_STATUSES = frozenset(["DELETED", "SOFT_DELETED"])
+
+# service -> (search option for items changed since time, format of
+# value), nova returns deleted instances in list of changes too
+CHANGES_FILTERS = {
+    "cinder": ("updated_at", "gte:%s"),
+    "nova": ("changes-since", "%s"),
+}
+
+# count of volumes or instances requested at once
+PAGE_SIZE = 1000
+
+
+def exact_regex(value):
+    """ regular expression that matches only whole value """
+    return "^%s$" % re.escape(value)
+
+
+# volume filter -> (cinder search option, attribute for exact match,
+# function for value of search option or None)
+VOLUME_FILTERS = {
+    "name": ("display_name", "display_name", None),
+    "status": ("status", "status", None),
+    "all_tenants": ("all_tenants", None, None),
+}
+
+# instance filter -> (nova search option, attribute for exact match,
+# function for value of search option or None), nova search by name
+# is regular expression
+INSTANCE_FILTERS = {
+    "name": ("name", "name", exact_regex),
+    "status": ("status", "status", None),
+    "all_tenants": ("all_tenants", None, None),
+}
+
+# service -> (client module, api version)
+SERVICE_CLIENTS = {
+    "cinder": (cinder_client, '1'),
+    "nova": (nova_client, '2'),
+}
 
 
 class ManageExeption(BaseException):
@@ -18,17 +90,72 @@ class ManageExeption(BaseException):
 class ManageUtils(object):
     """ Collection of tools for manage cinder volumes """
 
-    # connection to cinder
-    _cinder = None
+    # (user, password, tenant, auth_url) for create clients
+    _credentials = None
+
+    # service name -> created client
+    _clients = None
+
+    # lock for create clients
+    _clients_lock = None
+
+    # keystone session shared by clients, True if session must be
+    # created on first use, None for separate authentication
+    _session = None
+
+    # count of kept alive connections in shared session
+    _pool_size = None
+
+    # tokens stored between runs for created shared session or None
+    _token_cache = None
+
+    # sink for latency and remote call metrics, None if disabled
+    _metrics = None
+
+    # collector of span trees for operations, None if disabled
+    _tracer = None
+
+    # service name -> ready client used instead of created client
+    _ready_clients = None
+
+    # known volumes and instances stored between runs, None if disabled
+    _inventory = None
 
-    # connection to nova
-    _nova = None
+    # future of running background refresh of inventory
+    _inventory_job = None
+
+    # lock for start background refresh of inventory
+    _inventory_lock = None
+
+    # listener of cinder and nova notifications, None if disabled
+    _listener = None
 
     # logging object
     _log = None
 
-    def __init__(self, user, password, tenant, auth_url, log=None):
-        """ Connect to cinder and nova:
+    # volume name -> volume id index, None if cache disabled
+    _volume_index = None
+
+    # instance name -> (internal instance description, True if
+    # networks of description are actual), None if cache disabled
+    _instance_cache = None
+
+    # pool of ssh connections to instances
+    _ssh_pool = None
+
+    # default private key for ssh: path, parsed key or None
+    _ssh_key = None
+
+    def __init__(
+        self, user, password, tenant, auth_url, log=None,
+        cache_ttl=None, cache_size=1024,
+        ssh_pool_size=8, ssh_idle_timeout=60, ssh_key=None,
+        session=None, pool_size=keystone.POOL_SIZE, token_cache=None,
+        metrics=None, tracer=None, clients=None, inventory=None,
+        notifications=None
+    ):
+        """ Prepare connection to cinder and nova, clients are created
+        and authenticated on first use of each service, see warmup:
 
         Args:
             user: user name in opensack
@@ -37,20 +164,396 @@ class ManageUtils(object):
             auth_url: authentication url
             log: logging object that can be used for logging,
                 can be None
+            cache_ttl: seconds for keep volume name -> id index
+                and instances by name, None disable caches
+            cache_size: maximum count of names in each cache
+            ssh_pool_size: maximum count of live ssh connections
+                to instances, format waits while all of them are busy
+            ssh_idle_timeout: seconds before idle ssh connection
+                will be closed
+            ssh_key: default private key for ssh, path to key file
+                (parsed once while file is not changed) or parsed
+                paramiko key of any type
+            session: keystoneauth1 session shared by cinder and nova,
+                True for create shared session from credentials,
+                None for separate authentication of each client
+            pool_size: count of kept alive connections to each host
+                in created shared session
+            token_cache: path to file or TokenCache for reuse tokens
+                between runs, enables shared session, None for
+                authenticate in each run
+            metrics: sink for latency of methods and count of cinder,
+                nova and ssh calls inside of them, for example
+                rednic.metrics.PrometheusSink, None disable metrics
+            tracer: rednic.tracing.Tracer for record span tree with
+                remote round-trips of each call, None disable tracing
+            clients: dictionary service name -> ready client used
+                instead of created one, for example clients of
+                rednic.simulator.SimulatedCloud for load tests
+            inventory: path to sqlite snapshot or
+                rednic.inventory.Inventory with known volumes and
+                instances, snapshot is loaded at once and revalidated
+                in background, see volume_lookup and instance_lookup,
+                None disable inventory
+            notifications: consumer of cinder and nova notifications,
+                for example rednic.notifications.AMQPConsumer for
+                rabbitmq of devstack, notifications update inventory
+                (in memory if inventory is disabled), drop outdated
+                names from caches and wake wait_for_volumes,
+                None disable notifications
         """
-        self._cinder = cinder_client.Client(
-            '1', user, password, tenant, auth_url
-        )
-
-        self._nova = nova_client.Client(
-            '2', user, password, tenant, auth_url
-        )
+        self._credentials = (user, password, tenant, auth_url)
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+        self._session = session
+        self._pool_size = pool_size
+        self._metrics = metrics
+        self._tracer = tracer
+        self._ready_clients = dict(clients or {})
+        if token_cache is not None:
+            if not isinstance(token_cache, tokens.TokenCache):
+                token_cache = tokens.TokenCache(token_cache, log=log)
+            self._token_cache = token_cache
+            if session is None:
+                self._session = True
 
         if log:
             self._log = log
         else:
             self._log = logging.getLogger('rednic.manage_utils')
 
+        if cache_ttl:
+            self._volume_index = cache.TTLCache(cache_ttl, cache_size)
+            self._instance_cache = cache.TTLCache(cache_ttl, cache_size)
+
+        self._ssh_pool = ssh_pool.SSHPool(ssh_pool_size, ssh_idle_timeout)
+        self._ssh_key = ssh_key
+
+        if notifications is not None and inventory is None:
+            inventory = inventories.Inventory(log=log)
+        if inventory is not None:
+            if not isinstance(inventory, inventories.Inventory):
+                inventory = inventories.Inventory(inventory, log=log)
+            self._inventory = inventory
+            self._inventory_lock = threading.Lock()
+            inventory.load()
+            if notifications is not None:
+                self._listener = events.NotificationListener(
+                    inventory, notifications, self.__notified__, self._log
+                )
+                self._listener.start()
+            self.inventory_revalidate()
+
+    def __client__(self, service):
+        """ get client for service, client is created on first call """
+        client = self._clients.get(service)
+        if client is None:
+            with self._clients_lock:
+                client = self._clients.get(service)
+                if client is None:
+                    module, version = SERVICE_CLIENTS[service]
+                    self._log.debug("create %s client" % service)
+                    if service in self._ready_clients:
+                        client = self._ready_clients[service]
+                    elif self._session is None:
+                        client = module.Client(version, *self._credentials)
+                    else:
+                        client = module.Client(
+                            version, session=self.__session__()
+                        )
+                    if self._metrics is not None or self._tracer is not None:
+                        client = metrics.InstrumentedClient(
+                            client, service, self._metrics, self._tracer
+                        )
+                    self._clients[service] = client
+        return client
+
+    def __session__(self):
+        """ get shared session, session is created on first call,
+        must be called with lock of clients
+        """
+        if self._session is True:
+            self._log.debug("create shared session")
+            self._session = keystone.create_session(
+                *self._credentials, pool_size=self._pool_size,
+                token_cache=self._token_cache
+            )
+        return self._session
+
+    @property
+    def _cinder(self):
+        """ connection to cinder """
+        return self.__client__("cinder")
+
+    @property
+    def _nova(self):
+        """ connection to nova """
+        return self.__client__("nova")
+
+    def __warmup__(self, service):
+        """ create client and authenticate it if client supports it,
+        token of shared session is fetched only once for all clients
+        """
+        client = self.__client__(service)
+        if self._session is not None:
+            self._session.get_token()
+        elif hasattr(client, "authenticate"):
+            client.authenticate()
+        self._log.debug("%s client is ready" % service)
+
+    def warmup(self, services=("cinder", "nova"), wait=False):
+        """ Create and authenticate clients in background, so first
+        real call will not wait for them
+
+        Args:
+            services: names of services for prepare
+            wait: wait for end of warmup and raise first error
+
+        Returns:
+            list of futures in order of services, failed
+            authentication is raised from result of future
+        """
+        executor = futures.ThreadPoolExecutor(
+            max_workers=max(1, len(services)),
+            thread_name_prefix="rednic-warmup"
+        )
+        jobs = [
+            executor.submit(self.__warmup__, service) for service in services
+        ]
+        executor.shutdown(wait=False)
+        if wait:
+            for job in jobs:
+                job.result()
+        return jobs
+
+    def __remote__(self, service, call, func, /, *args, **kwargs):
+        """ call remote function that is not method of client managers,
+        call is recorded to metrics and tracer if enabled
+        """
+        if self._metrics is None and self._tracer is None:
+            return func(*args, **kwargs)
+        return metrics.remote(
+            self._metrics, self._tracer, service, call, func, *args, **kwargs
+        )
+
+    def close(self):
+        """ close all ssh connections to instances, stop listener
+        of notifications and store inventory to snapshot
+        """
+        self._ssh_pool.close()
+        if self._listener is not None:
+            self._listener.stop()
+        if self._inventory is not None:
+            self._inventory.save()
+
+    def cache_clear(self):
+        """ drop everything from volume index and instance cache,
+        next search by name will use full list
+        """
+        if self._volume_index is not None:
+            self._volume_index.clear()
+        if self._instance_cache is not None:
+            self._instance_cache.clear()
+
+    def __notified__(self, kind, old, new):
+        """ drop names of changed item from caches, called by
+        listener of notifications
+        """
+        if kind == "volumes":
+            cached = self._volume_index
+        else:
+            cached = self._instance_cache
+        if cached is None:
+            return
+        for record in (old, new):
+            if record is not None and record.name is not None:
+                cached.pop(record.name)
+
+    @property
+    def listener(self):
+        """ rednic.notifications.NotificationListener, None if
+        notifications are disabled
+        """
+        return self._listener
+
+    @property
+    def inventory(self):
+        """ rednic.inventory.Inventory with known volumes and
+        instances, None if inventory is disabled
+        """
+        return self._inventory
+
+    @metrics.instrumented
+    def inventory_refresh(self):
+        """ replace inventory by full lists of volumes and instances
+        and store it to snapshot, inventory is fresh after refresh
+
+        Returns:
+            count of volumes and instances
+
+        Raises:
+            ManageExeption: in case when inventory is disabled
+        """
+        if self._inventory is None:
+            raise ManageExeption()
+        self._log.debug("refresh inventory")
+        started = time.time()
+        volumes, _, vol_mark = self.__changes__(
+            self._cinder.volumes, self.__volume_convert__,
+            VOLUME_DELETED_STATUSES
+        )
+        instances, _, ins_mark = self.__changes__(
+            self._nova.servers, self.__instance_convert__,
+            INSTANCE_DELETED_STATUSES
+        )
+        self._inventory.replace(volumes, instances, started, {
+            "volumes": vol_mark, "instances": ins_mark
+        })
+        self._inventory.save()
+        return len(volumes) + len(instances)
+
+    @metrics.instrumented
+    def inventory_sync(self, full=False):
+        """ update inventory by volumes and instances changed since
+        newest updated_at of previous sync, so cost of sync depends
+        on count of changes instead of count of all items
+
+        Nova returns deleted instances in list of changes. Cinder does
+        not list deleted volumes, so known volumes in deleting status
+        (own deletes and deletes seen in list of changes) are checked
+        one by one and dropped when not found. Volumes deleted without
+        seen deleting status are dropped only by full refresh, call
+        sync with full periodically to drop them. Changes are not
+        stored to snapshot until full refresh or close.
+
+        Args:
+            full: replace inventory by full lists, full refresh is
+                also used before first refresh and for items without
+                updated_at
+
+        Returns:
+            count of changed and deleted volumes and instances
+
+        Raises:
+            ManageExeption: in case when inventory is disabled
+        """
+        if self._inventory is None:
+            raise ManageExeption()
+        vol_since = self._inventory.watermark("volumes")
+        ins_since = self._inventory.watermark("instances")
+        if full or self._inventory.refreshed_at is None or (
+            vol_since is None and self._inventory.count("volumes")
+        ) or (
+            ins_since is None and self._inventory.count("instances")
+        ):
+            return self.inventory_refresh()
+        self._log.debug("sync inventory")
+        started = time.time()
+        volumes, dropped_volumes, vol_mark = self.__changes__(
+            self._cinder.volumes, self.__volume_convert__,
+            VOLUME_DELETED_STATUSES, "cinder", vol_since
+        )
+        changed = set(record.id for record in volumes)
+        for record in self._inventory.volumes():
+            if record.status != "deleting" or record.id in changed:
+                continue
+            try:
+                volumes.append(self.__volume_convert__(
+                    self._cinder.volumes.get(record.id)
+                ))
+            except cinder_exceptions.NotFound:
+                dropped_volumes.append(record.id)
+        instances, dropped_instances, ins_mark = self.__changes__(
+            self._nova.servers, self.__instance_convert__,
+            INSTANCE_DELETED_STATUSES, "nova", ins_since
+        )
+        self._inventory.apply(
+            volumes, instances, dropped_volumes, dropped_instances,
+            {"volumes": vol_mark, "instances": ins_mark}, started
+        )
+        return len(volumes) + len(instances) + \
+            len(dropped_volumes) + len(dropped_instances)
+
+    def __changes__(self, manager, convert, deleted, service=None,
+                    since=None):
+        """ Receive items changed since time from manager list
+
+        Args:
+            manager: cinder volumes or nova servers manager
+            convert: function for convert internal description
+                to record
+            deleted: statuses of deleted items
+            service: "cinder" or "nova" for filter by CHANGES_FILTERS
+            since: naive datetime in UTC, items updated before are
+                skipped even if server ignores filter, None for all
+                items
+
+        Returns:
+            (list of records, list of deleted item ids, newest
+            updated_at of items or since if nothing is newer)
+        """
+        search_opts = None
+        if since is not None:
+            option, value = CHANGES_FILTERS[service]
+            search_opts = {
+                option: value % inventories.format_timestamp(since)
+            }
+        records = []
+        dropped = []
+        newest = since
+        for item in self.__pages__(manager, PAGE_SIZE, search_opts):
+            updated = inventories.parse_timestamp(
+                getattr(item, "updated_at", None)
+            )
+            if updated is not None:
+                if since is not None and updated < since:
+                    continue
+                if newest is None or updated > newest:
+                    newest = updated
+            if item.status in deleted:
+                dropped.append(item.id)
+            else:
+                records.append(convert(item))
+        return records, dropped, newest
+
+    def inventory_revalidate(self, wait=False):
+        """ Refresh inventory in background, lookups are served from
+        stale inventory until end of refresh, running refresh is
+        reused instead of start new one
+
+        Args:
+            wait: wait for end of refresh and raise error
+
+        Returns:
+            future of refresh, failed refresh is raised from result
+            of future
+
+        Raises:
+            ManageExeption: in case when inventory is disabled
+        """
+        if self._inventory is None:
+            raise ManageExeption()
+        with self._inventory_lock:
+            job = self._inventory_job
+            if job is None or job.done():
+                executor = futures.ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="rednic-inventory"
+                )
+                job = executor.submit(self.inventory_refresh)
+                executor.shutdown(wait=False)
+                job.add_done_callback(self.__revalidated__)
+                self._inventory_job = job
+        if wait:
+            job.result()
+        return job
+
+    def __revalidated__(self, job):
+        """ log failed background refresh of inventory """
+        if not job.cancelled() and job.exception() is not None:
+            self._log.error(
+                "inventory is not refreshed: %r" % job.exception()
+            )
+
     def __instance_convert__(self, instance):
         """ Convert internal instance description to dict format.
 
@@ -58,20 +561,21 @@ class ManageUtils(object):
             instance - object to convert
 
         Returns:
-            dictionary with all meaningful information
+            InstanceRecord with all meaningful information, dictionary
+            like but not dict, see rednic.records.Record
         """
 
         if not instance:
             self._log.error("empty instance")
             return None
-        return {
-            "id": instance.id,
-            "name": instance.name,
-            "status": instance.status,
-            "key_name": instance.key_name,
-            "human_id": instance.human_id,
-            "networks": instance.networks
-        }
+        return InstanceRecord(
+            instance.id,
+            instance.name,
+            instance.status,
+            instance.key_name,
+            instance.human_id,
+            instance.networks
+        )
 
     def __volume_convert__(self, volume):
         """ Convert internal volume description to dict format.
@@ -80,28 +584,275 @@ class ManageUtils(object):
             volume - object to convert
 
         Returns:
-            dictionary with all meaningful information
+            VolumeRecord with all meaningful information, dictionary
+            like but not dict, see rednic.records.Record
         """
         if not volume:
             self._log.error("empty volume")
             return volume
-        return {
-            "id": volume.id,
-            "size": volume.size,
-            "status": volume.status,
-            "name": volume.display_name,
-            "description": volume.display_description,
-            "loaded": volume.is_loaded(),
-            "type": volume.volume_type,
-            "boot": volume.bootable,
-            "attach": volume.attachments
-        }
+        return VolumeRecord(
+            volume.id,
+            volume.size,
+            volume.status,
+            volume.display_name,
+            volume.display_description,
+            volume.is_loaded(),
+            volume.volume_type,
+            volume.bootable,
+            volume.attachments
+        )
+
+    def __volume_by_name__(self, name):
+        """ Search internal volume description by name.
+
+        Use name index if enabled, in case of miss or outdated
+        index fall back to list of volumes filtered by cinder.
+
+        Args:
+            name: volume name for search
+
+        Returns:
+            internal volume description or None
+        """
+        if self._volume_index is not None:
+            vol_id = self._volume_index.get(name)
+            if vol_id:
+                self._log.debug("volume name index hit")
+                try:
+                    volume = self._cinder.volumes.get(vol_id)
+                except cinder_exceptions.NotFound:
+                    volume = None
+                if volume and volume.display_name == name:
+                    return volume
+                # renamed or dropped by somebody else
+                self._volume_index.pop(name)
+
+        if self._inventory is not None:
+            record = self._inventory.volume_by_name(name)
+            if record is not None:
+                self._log.debug("volume inventory hit")
+                try:
+                    volume = self._cinder.volumes.get(record.id)
+                except cinder_exceptions.NotFound:
+                    volume = None
+                if volume and volume.display_name == name:
+                    self._inventory.put_volume(self.__volume_convert__(volume))
+                    return volume
+                self._inventory.drop_volume(record.id)
+
+        for volume in self.__find__(
+            self._cinder.volumes, VOLUME_FILTERS, {"name": name}, PAGE_SIZE
+        ):
+            if self._volume_index is not None:
+                self._volume_index.set(name, volume.id)
+            if self._inventory is not None:
+                self._inventory.put_volume(self.__volume_convert__(volume))
+            return volume
+        return None
+
+    def __instance_by_name__(self, name, networks=False):
+        """ Search internal instance description by name.
+
+        Use fresh instance from cache if enabled, in case of miss
+        fall back to list of instances filtered by nova.
+
+        Args:
+            name: instance name for search
+            networks: networks of instance must be actual, cached
+                instance with outdated networks is requested again
+
+        Returns:
+            internal instance description or None
+        """
+        if self._instance_cache is not None:
+            cached = self._instance_cache.get(name)
+            if cached is not None:
+                self._log.debug("instance cache hit")
+                instance, actual = cached
+                if actual or not networks:
+                    return instance
+                try:
+                    instance = self._nova.servers.get(instance.id)
+                except (cinder_exceptions.NotFound, nova_exceptions.NotFound):
+                    instance = None
+                if instance and instance.name == name:
+                    self._instance_cache.set(name, (instance, True))
+                    return instance
+                self._instance_cache.pop(name)
+
+        if self._inventory is not None:
+            record = self._inventory.instance_by_name(name)
+            if record is not None:
+                self._log.debug("instance inventory hit")
+                try:
+                    instance = self._nova.servers.get(record.id)
+                except (cinder_exceptions.NotFound, nova_exceptions.NotFound):
+                    instance = None
+                if instance and instance.name == name:
+                    self._inventory.put_instance(
+                        self.__instance_convert__(instance)
+                    )
+                    if self._instance_cache is not None:
+                        self._instance_cache.set(name, (instance, True))
+                    return instance
+                self._inventory.drop_instance(record.id)
+
+        for instance in self.__find__(
+            self._nova.servers, INSTANCE_FILTERS, {"name": name}, PAGE_SIZE
+        ):
+            if self._instance_cache is not None:
+                self._instance_cache.set(name, (instance, True))
+            if self._inventory is not None:
+                self._inventory.put_instance(
+                    self.__instance_convert__(instance)
+                )
+            return instance
+        return None
+
+    def __networks_changed__(self, name):
+        """ keep cached instance, but mark its networks as outdated """
+        if self._instance_cache is None:
+            return
+        cached = self._instance_cache.get(name)
+        if cached is not None:
+            self._instance_cache.set(name, (cached[0], False))
+
+    def __pages__(self, manager, page_size, search_opts=None):
+        """ Iterate over internal descriptions from manager list,
+        request them by pages with marker and limit until empty page
+
+        Args:
+            manager: cinder volumes or nova servers manager
+            page_size: count of items in one request
+            search_opts: filters for server side search
+
+        Returns:
+            generator of internal descriptions
+        """
+        marker = None
+        while True:
+            page = manager.list(
+                search_opts=search_opts, marker=marker, limit=page_size
+            )
+            if not page or page[-1].id == marker:
+                # end of list or server ignores marker
+                return
+            for item in page:
+                yield item
+            if len(page) > page_size:
+                # server ignores limit and returns all
+                return
+            # short page is not end of list, server can cap page size
+            marker = page[-1].id
+
+    def __find__(self, manager, known_filters, filters, page_size):
+        """ Iterate over internal descriptions filtered by server,
+        and check result again for exact match of known filters
+
+        Args:
+            manager: cinder volumes or nova servers manager
+            known_filters: dictionary filter -> (search option,
+                attribute for exact match, function for value
+                of search option or None)
+            filters: dictionary filter -> value, unknown filters
+                are sent to server as is
+            page_size: count of items in one request
+
+        Returns:
+            generator of internal descriptions
+        """
+        search_opts = {}
+        checks = []
+        for key, value in filters.items():
+            option, attr, convert = known_filters.get(
+                key, (key, None, None)
+            )
+            if convert is not None:
+                search_opts[option] = convert(value)
+            else:
+                search_opts[option] = value
+            if attr:
+                checks.append((attr, value))
+        for item in self.__pages__(manager, page_size, search_opts):
+            for attr, value in checks:
+                if getattr(item, attr, None) != value:
+                    break
+            else:
+                yield item
+
+    @metrics.instrumented
+    def volume_find(self, page_size=PAGE_SIZE, **filters):
+        """get list of volumes filtered by cinder
+
+        Args:
+            page_size: count of volumes in one request
+            filters: name, status, all_tenants or any other cinder
+                search option, name and status are exact matches
+
+        Returns:
+            list of VolumeRecord with volumes description
+        """
+        self._log.debug("find volumes")
+        return [
+            self.__volume_convert__(volume) for volume in self.__find__(
+                self._cinder.volumes, VOLUME_FILTERS, filters, page_size
+            )
+        ]
+
+    @metrics.instrumented
+    def instance_find(self, page_size=PAGE_SIZE, **filters):
+        """get list of instances filtered by nova
+
+        Args:
+            page_size: count of instances in one request
+            filters: name, status, all_tenants or any other nova
+                search option, name and status are exact matches
+
+        Returns:
+            list of InstanceRecord with instances description
+        """
+        self._log.debug("find instances")
+        return [
+            self.__instance_convert__(instance)
+            for instance in self.__find__(
+                self._nova.servers, INSTANCE_FILTERS, filters, page_size
+            )
+        ]
 
+    def iter_volumes(self, page_size=PAGE_SIZE):
+        """iterate over existed volumes, volumes are requested
+        by pages on demand
+
+        Args:
+            page_size: count of volumes in one request
+
+        Returns:
+            generator of VolumeRecord with volumes description
+        """
+        self._log.debug("iterate volumes")
+        for volume in self.__pages__(self._cinder.volumes, page_size):
+            yield self.__volume_convert__(volume)
+
+    def iter_instances(self, page_size=PAGE_SIZE):
+        """iterate over avaible instances, instances are requested
+        by pages on demand
+
+        Args:
+            page_size: count of instances in one request
+
+        Returns:
+            generator of InstanceRecord with instances description
+        """
+        self._log.debug("iterate instances")
+        for instance in self.__pages__(self._nova.servers, page_size):
+            yield self.__instance_convert__(instance)
+
+    @metrics.instrumented
     def volume_list(self):
         """get list of existed volumes
 
         Returns:
-            list of dictionaries with volumes description
+            list of VolumeRecord with volumes description
         """
         self._log.debug("get list volumes")
 
@@ -109,6 +860,7 @@ class ManageUtils(object):
 
         return [self.__volume_convert__(v) for v in volumes]
 
+    @metrics.instrumented
     def volume_create(self, size, name=None, description=None):
         """create volume
 
@@ -117,18 +869,137 @@ class ManageUtils(object):
             description: description for new volume
 
         Returns:
-            dictionary with description of new volume
+            VolumeRecord with description of new volume
         """
         self._log.debug("create volume")
 
-        return self.__volume_convert__(
-            self._cinder.volumes.create(
-                size=size,
-                display_name=name,
-                display_description=description
-            )
+        volume = self._cinder.volumes.create(
+            size=size,
+            display_name=name,
+            display_description=description
+        )
+        if self._volume_index is not None and name and volume:
+            self._volume_index.set(name, volume.id)
+        if self._inventory is not None and volume:
+            self._inventory.put_volume(self.__volume_convert__(volume))
+        return self.__volume_convert__(volume)
+
+    def __run_many__(self, func, args_list, max_workers):
+        """ Call func for each set of arguments over bounded pool
+
+        Args:
+            func: function for call
+            args_list: list of tuples with arguments
+            max_workers: maximum count of parallel calls
+
+        Returns:
+            list of (result, error) tuples in order of args_list,
+            error is None for success calls
+        """
+        results = []
+        with futures.ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(args_list)))
+        ) as pool:
+            jobs = [
+                pool.submit(metrics.in_context(func), *args)
+                for args in args_list
+            ]
+            for job in jobs:
+                try:
+                    results.append((job.result(), None))
+                except (Exception, ManageExeption) as e:
+                    self._log.error("parallel call failed: %s" % repr(e))
+                    results.append((None, e))
+        return results
+
+    @metrics.instrumented
+    def volume_create_many(self, specs, max_workers=8):
+        """create several volumes in parallel
+
+        Args:
+            specs: list of (size, name, description) tuples,
+                name and description can be skipped
+            max_workers: maximum count of parallel requests to cinder
+
+        Returns:
+            list of (volume, error) tuples in order of specs,
+            volume is VolumeRecord with description of new volume
+            or None if create failed with error
+        """
+        self._log.debug("create %d volumes" % len(specs))
+        if not specs:
+            return []
+        return self.__run_many__(
+            self.volume_create, [tuple(spec) for spec in specs],
+            max_workers
         )
 
+    @metrics.instrumented
+    def wait_for_volumes(
+        self, vol_ids, target="available", timeout=300,
+        interval=1, max_interval=10
+    ):
+        """wait while all volumes are in terminal status
+
+        Status is terminal if it is target status, or any status that
+        will not be changed by cinder itself (like error or in-use),
+        or volume is deleted. All volumes are checked with one list
+        of volumes on each step, time between steps is growing while
+        nothing is changed. With notifications next step is started
+        at once after notification about any waited volume.
+
+        Args:
+            vol_ids: list of volume ids
+            target: expected status, "deleted" for wait drop
+            timeout: maximum seconds for wait
+            interval: minimal seconds between checks
+            max_interval: maximal seconds between checks
+
+        Returns:
+            dictionary volume id -> last known status, "deleted" for
+            volumes that are not in list, volumes with not terminal
+            status are possible only after timeout
+        """
+        self._log.debug("wait %d volumes for %s" % (len(vol_ids), target))
+        statuses = dict((vol_id, None) for vol_id in vol_ids)
+        pending = set(vol_ids)
+        deadline = time.time() + timeout
+        delay = interval
+        while pending:
+            if self._listener is not None:
+                sequence = self._listener.sequence()
+            current = dict(
+                (volume.id, volume.status)
+                for volume in self._cinder.volumes.list()
+            )
+            changed = False
+            for vol_id in list(pending):
+                status = current.get(vol_id, VOLUME_DELETED)
+                if status != statuses[vol_id]:
+                    changed = True
+                    statuses[vol_id] = status
+                if status == target or \
+                        status not in VOLUME_TRANSITIONAL_STATUSES:
+                    pending.discard(vol_id)
+            now = time.time()
+            if not pending or now >= deadline:
+                break
+            if changed:
+                delay = interval
+            else:
+                delay = min(delay * 2, max_interval)
+            pause = max(0, min(delay, deadline - now))
+            if self._listener is not None and self._listener.running:
+                self._listener.wait(pending, sequence, pause)
+            else:
+                time.sleep(pause)
+        if pending:
+            self._log.error(
+                "volumes %s are not ready in time" % ", ".join(pending)
+            )
+        return statuses
+
+    @metrics.instrumented
     def volume_get(self, vol_id=None, name=None):
         """get volume by vol_id or name
 
@@ -138,7 +1009,7 @@ class ManageUtils(object):
             name:
                 volume name for search
         Returns:
-            volume as dictionary
+            volume as VolumeRecord
 
         Raises:
             ManageExeption: in case when can't get volume
@@ -153,11 +1024,12 @@ class ManageUtils(object):
                 raise ManageExeption()
         else:
             self._log.debug("get volume by name")
-            for volume in self.volume_list():
-                if volume['name'] == name:
-                    return volume
+            volume = self.__volume_by_name__(name)
+            if volume:
+                return self.__volume_convert__(volume)
         raise ManageExeption()
 
+    @metrics.instrumented
     def instance_get(self, ins_id=None, name=None):
         """ get instance by ins_id or name,
 
@@ -165,7 +1037,7 @@ class ManageUtils(object):
             ins_id - mush faster and have priority
 
         Returns:
-            instance description in dictionary format
+            instance description as InstanceRecord
 
         Raises:
             ManageExeption: in case when can't get instance
@@ -180,11 +1052,60 @@ class ManageUtils(object):
                 raise ManageExeption()
         else:
             self._log.debug("get instance by name")
-            for instance in self.instance_list():
-                if instance['name'] == name:
-                    return instance
+            instance = self.__instance_by_name__(name, networks=True)
+            if instance:
+                return self.__instance_convert__(instance)
         raise ManageExeption()
 
+    @metrics.instrumented
+    def volume_lookup(self, name):
+        """ get volume by name from inventory without remote calls,
+        volume is requested from cinder only if it is not in inventory
+        or inventory is disabled
+
+        Args:
+            name: volume name for search
+
+        Returns:
+            (copy of VolumeRecord, True if description is from stale
+            inventory and can be outdated)
+
+        Raises:
+            ManageExeption: in case when can't get volume
+        """
+        if self._inventory is not None:
+            stale = self._inventory.stale
+            record = self._inventory.volume_by_name(name)
+            if record is not None:
+                # copy, result can be changed by caller
+                return record.copy(), stale
+        return self.volume_get(name=name), False
+
+    @metrics.instrumented
+    def instance_lookup(self, name):
+        """ get instance by name from inventory without remote calls,
+        instance is requested from nova only if it is not in inventory
+        or inventory is disabled
+
+        Args:
+            name: instance name for search
+
+        Returns:
+            (copy of InstanceRecord, True if description is from stale
+            inventory and can be outdated)
+
+        Raises:
+            ManageExeption: in case when can't get instance
+        """
+        if self._inventory is not None:
+            stale = self._inventory.stale
+            record = self._inventory.instance_by_name(name)
+            if record is not None:
+                # copy, result can be changed by caller
+                return record.copy(), stale
+        return self.instance_get(name=name), False
+
+    @metrics.instrumented
     def instance_attach_ip(self, ip, ins_id=None, name=None):
         """ attach some ip to instance
 
@@ -199,15 +1120,21 @@ class ManageUtils(object):
         self._log.debug("attach ip")
 
         if name:
-            internal_instance = self.instance_get(name=name)
-            ins_id = internal_instance['id']
-
-        instance = self._nova.servers.get(ins_id)
+            instance = self.__instance_by_name__(name)
+            if not instance:
+                raise ManageExeption()
+        else:
+            instance = self._nova.servers.get(ins_id)
         try:
-            instance.add_floating_ip(ip)
+            self.__remote__(
+                "nova", "servers.add_floating_ip", instance.add_floating_ip,
+                ip
+            )
         except cinder_exceptions.NotFound:
             raise ManageExeption()
+        self.__networks_changed__(instance.name)
 
+    @metrics.instrumented
     def instance_detach_ip(self, ip, ins_id=None, name=None):
         """ detach some ip from instance
 
@@ -222,15 +1149,21 @@ class ManageUtils(object):
         self._log.debug("attach ip")
 
         if name:
-            internal_instance = self.instance_get(name=name)
-            ins_id = internal_instance['id']
-
-        instance = self._nova.servers.get(ins_id)
+            instance = self.__instance_by_name__(name)
+            if not instance:
+                raise ManageExeption()
+        else:
+            instance = self._nova.servers.get(ins_id)
         try:
-            instance.remove_floating_ip(ip)
+            self.__remote__(
+                "nova", "servers.remove_floating_ip",
+                instance.remove_floating_ip, ip
+            )
         except cinder_exceptions.NotFound:
             raise ManageExeption()
+        self.__networks_changed__(instance.name)
 
+    @metrics.instrumented
     def volume_detach(self, vol_id=None, name=None):
         """detach volume by vol_id or name
 
@@ -248,14 +1181,25 @@ class ManageUtils(object):
             volume = self._cinder.volumes.get(vol_id)
         else:
             self._log.debug("delete volume by name")
-            # use our get for get volume by name
-            internal_volume = self.volume_get(name=name)
-            volume = self._cinder.volumes.get(internal_volume['id'])
+            volume = self.__volume_by_name__(name)
+            if not volume:
+                raise ManageExeption()
+        return self.__volume_detach__(volume)
+
+    def __volume_detach__(self, volume):
+        """ detach internal volume description or volume id
+
+        Raises:
+            ManageExeption: in case when can't detach volume
+        """
         try:
-            return self._cinder.volumes.detach(volume)
+            result = self._cinder.volumes.detach(volume)
         except cinder_exceptions.BadRequest:
                 raise ManageExeption()
+        self.__volume_status__(volume, "detaching")
+        return result
 
+    @metrics.instrumented
     def volume_delete(self, vol_id=None, name=None):
         """drop volume by vol_id or name
 
@@ -273,33 +1217,220 @@ class ManageUtils(object):
             volume = self._cinder.volumes.get(vol_id)
         else:
             self._log.debug("delete volume by name")
-            # use our get for get volume by name
-            internal_volume = self.volume_get(name=name)
-            volume = self._cinder.volumes.get(internal_volume['id'])
+            volume = self.__volume_by_name__(name)
+            if not volume:
+                raise ManageExeption()
+        return self.__volume_delete__(volume)
+
+    def __volume_delete__(self, volume):
+        """ drop internal volume description or volume id
+
+        Raises:
+            ManageExeption: in case when can't drop volume
+        """
         try:
-            return self._cinder.volumes.delete(volume)
+            result = self._cinder.volumes.delete(volume)
         except cinder_exceptions.BadRequest:
                 raise ManageExeption()
+        name = getattr(volume, 'display_name', None)
+        if self._volume_index is not None and name and \
+                self._volume_index.get(name) == volume.id:
+            self._volume_index.pop(name)
+        # deleting volume is checked by id on next sync
+        self.__volume_status__(volume, "deleting")
+        return result
+
+    def __volume_status__(self, volume, status):
+        """ store status of volume after own change to inventory
+
+        Args:
+            volume: internal volume description or volume id
+            status: new status of volume
+        """
+        if self._inventory is None:
+            return
+        vol_id = getattr(volume, "id", volume)
+        record = self._inventory.volume(vol_id)
+        if record is not None:
+            record = record.copy()
+        elif hasattr(volume, "id"):
+            record = self.__volume_convert__(volume)
+        else:
+            return
+        record.status = status
+        self._inventory.put_volume(record)
+
+    def __volumes_by_names__(self, names):
+        """ Search internal volume descriptions for several names
+        with one full list of volumes, reindex names if index enabled
+
+        Args:
+            names: list of volume names for search
+
+        Returns:
+            dictionary name -> internal volume description,
+            missed names are skipped
+        """
+        wanted = set(names)
+        found = {}
+        seen = set()
+        for volume in self.__pages__(self._cinder.volumes, PAGE_SIZE):
+            name = volume.display_name
+            if not name or name in seen:
+                # first volume with such name wins, same as for search
+                continue
+            seen.add(name)
+            if self._volume_index is not None:
+                self._volume_index.set(name, volume.id)
+            if name in wanted:
+                found[name] = volume
+                if len(found) == len(wanted):
+                    break
+        return found
+
+    def __run_volumes_many__(self, func, vol_ids, names, max_workers):
+        """ Call func for each volume over bounded pool,
+        all names are resolved before with one list of volumes
+
+        Args:
+            func: function with volume id or internal volume
+                description as argument
+            vol_ids: list of volume ids
+            names: list of volume names
+            max_workers: maximum count of parallel calls
+
+        Returns:
+            list of (result, error) tuples in order of vol_ids
+            and then names, ManageExeption is error for missed names
+        """
+        refs = [(vol_id, None) for vol_id in vol_ids or []]
+        if names:
+            found = self.__volumes_by_names__(names)
+            for name in names:
+                if name in found:
+                    refs.append((found[name], None))
+                else:
+                    refs.append((None, ManageExeption()))
+
+        todo = [(volume, ) for volume, error in refs if error is None]
+        done = iter(
+            self.__run_many__(func, todo, max_workers) if todo else []
+        )
+        return [
+            next(done) if error is None else (None, error)
+            for volume, error in refs
+        ]
+
+    def __volume_wait_detached__(self, volume, timeout, interval):
+        """ wait while volume become available after detach
+
+        Raises:
+            ManageExeption: in case of error status or timeout
+        """
+        vol_id = getattr(volume, 'id', volume)
+        deadline = time.time() + timeout
+        while True:
+            status = self._cinder.volumes.get(vol_id).status
+            if status == "available":
+                return
+            if status not in ("in-use", "detaching") or \
+                    time.time() >= deadline:
+                self._log.error(
+                    "volume %s is %s after detach" % (vol_id, status)
+                )
+                raise ManageExeption()
+            time.sleep(interval)
+
+    def __volume_teardown__(self, volume, timeout, interval):
+        """ detach volume if attached and drop it right after detach
+
+        Raises:
+            ManageExeption: in case when can't drop volume
+        """
+        try:
+            self.__volume_detach__(volume)
+        except ManageExeption:
+            # not attached, so can be dropped right now
+            pass
+        else:
+            self.__volume_wait_detached__(volume, timeout, interval)
+        return self.__volume_delete__(volume)
+
+    @metrics.instrumented
+    def volume_detach_many(self, vol_ids=None, names=None, max_workers=8):
+        """detach several volumes in parallel
 
+        Args:
+            vol_ids: list of volume ids
+            names: list of volume names, all names are searched
+                with one list of volumes
+            max_workers: maximum count of parallel requests to cinder
+
+        Returns:
+            list of (result, error) tuples in order of vol_ids
+            and then names, error is ManageExeption in case when
+            can't get or detach volume
+        """
+        self._log.debug("detach many volumes")
+        return self.__run_volumes_many__(
+            self.__volume_detach__, vol_ids, names, max_workers
+        )
+
+    @metrics.instrumented
+    def volume_delete_many(
+        self, vol_ids=None, names=None, detach=False, max_workers=8,
+        timeout=300, interval=2
+    ):
+        """drop several volumes in parallel
+
+        Args:
+            vol_ids: list of volume ids
+            names: list of volume names, all names are searched
+                with one list of volumes
+            detach: detach volumes before drop, each volume is
+                dropped as soon as own detach is finished
+            max_workers: maximum count of parallel requests to cinder
+            timeout: maximum seconds for wait detach of each volume
+            interval: seconds between checks of detach status
+
+        Returns:
+            list of (result, error) tuples in order of vol_ids
+            and then names, error is ManageExeption in case when
+            can't get, detach or drop volume
+        """
+        self._log.debug("delete many volumes")
+        if detach:
+            def func(volume):
+                return self.__volume_teardown__(volume, timeout, interval)
+        else:
+            func = self.__volume_delete__
+        return self.__run_volumes_many__(func, vol_ids, names, max_workers)
+
+    @metrics.instrumented
     def instance_list(self):
         """ get full list of avaible instnaces
 
         Returns:
-            list of dictionaries with instances description
+            list of InstanceRecord with instances description
         """
         instances = self._nova.servers.list()
         return [
             self.__instance_convert__(i) for i in instances
         ]
 
+    @metrics.instrumented
     def volume_attach(
         self,
         mount_point,
         vol_id=None, vol_name=None,
         ins_id=None, ins_name=None,
+        refresh=True
     ):
         """attach volume to instance
 
+        Volume and instance are searched in parallel if both
+        are required.
+
         Args:
             mount_point: dev name for new attachment
             vol_id: volume id,
@@ -310,58 +1441,180 @@ class ManageUtils(object):
                 much faster and have higher priority than ins_name
             ins_name:
                 instance name
+            refresh: get volume again after attach, otherwise
+                volume description from before attach is returned
         Returns:
-            volume as dictionary
+            volume as VolumeRecord
 
         Raises:
             ManageExeption: in case when can't get volume or instance
         """
-        if not vol_id:
-            internal_volume = self.volume_get(name=vol_name)
-            vol_id = internal_volume['id']
+        pool = None
+        instance_job = None
+        if not ins_id:
+            # search instance in parallel with search of volume
+            pool = futures.ThreadPoolExecutor(max_workers=1)
+            instance_job = pool.submit(
+                metrics.in_context(self.__instance_by_name__), ins_name
+            )
 
-        volume = self._cinder.volumes.get(vol_id)
+        try:
+            if vol_id:
+                volume = self._cinder.volumes.get(vol_id)
+            else:
+                volume = self.__volume_by_name__(vol_name)
+                if not volume:
+                    raise ManageExeption()
+                vol_id = volume.id
 
-        if not ins_id:
-            internal_instance = self.instance_get(name=ins_name)
-            ins_id = internal_instance['id']
+            if instance_job:
+                instance = instance_job.result()
+                if not instance:
+                    raise ManageExeption()
+                ins_id = instance.id
+        finally:
+            if pool:
+                pool.shutdown(wait=False)
 
-        volume.attach(ins_id, mount_point)
+        self.__remote__(
+            "cinder", "volumes.attach", volume.attach, ins_id, mount_point
+        )
+        self.__volume_status__(volume, "attaching")
 
-        return self.volume_get(vol_id=vol_id)
+        if refresh:
+            return self.volume_get(vol_id=vol_id)
+        return self.__volume_convert__(volume)
 
-    def volume_format(
-        self, mount_point, key_file, username, ins_ip
+    def __volume_format__(
+        self, mount_point, pkey, username, ins_ip, timeout=None
     ):
         """connect by ssh to instance and format volume
 
         Args:
             mount_point: dev name for format
-            key_file: file handler for private key,
+            pkey: private key
             username: user name on instance
             ins_ip: ip for connect
+            timeout: maximum seconds for connect and format,
+                None for wait forever
 
-        Raises:
-            ManageExeption: in case when can't get volume
+        Returns:
+            tuple (status, output), status is "OK", "FAIL" or
+            "timeout"
         """
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        buff = ""
-        with key_file:
-            ssh.connect(
-                ins_ip, username=username,
-                pkey=paramiko.RSAKey.from_private_key(key_file)
-            )
-            chan = ssh.get_transport().open_session()
-            chan.get_pty()
-            chan.exec_command(
+        deadline = None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+        # connection to the same instance is reused by next calls
+        with self._ssh_pool.connection(
+            ins_ip, username, pkey, timeout=timeout
+        ) as ssh:
+            if deadline is not None:
+                # format gets only time left after connect
+                timeout = max(0, deadline - time.monotonic())
+            result = self.__remote__(
+                "ssh", "exec", remote_exec.remote_exec, ssh,
                 'sudo /sbin/mkfs.ext4 %s && echo OK || echo FAIL' % (
                     mount_point
-                )
+                ),
+                markers=[b"\nOK", b"\nFAIL"], timeout=timeout
             )
-            buff += chan.recv(80)
-            while buff.find("\nOK") == -1 and buff.find("\nFAIL") == -1:
-                buff += chan.recv(80)
-            chan.close()
-        ssh.close()
+        if result.timed_out:
+            self._log.error("format on %s timed out" % ins_ip)
+            return "timeout", result.text
+        if result.marker == b"\nOK":
+            return "OK", result.text
+        return "FAIL", result.text
+
+    def __private_key__(self, key_file):
+        """ get parsed private key
+
+        Args:
+            key_file: path, file handler or parsed private key,
+                None for default key
+
+        Raises:
+            ManageExeption: in case when key is not set
+        """
+        if key_file is None:
+            key_file = self._ssh_key
+        if key_file is None:
+            self._log.error("private key is not set")
+            raise ManageExeption()
+        return ssh_keys.private_key(key_file)
+
+    @metrics.instrumented
+    def volume_format(
+        self, mount_point, key_file, username, ins_ip, timeout=None
+    ):
+        """connect by ssh to instance and format volume
+
+        Args:
+            mount_point: dev name for format
+            key_file: file handler for private key, path to private
+                key (parsed once while file is not changed), parsed
+                key or None for default key
+            username: user name on instance
+            ins_ip: ip for connect
+            timeout: maximum seconds for connect and format,
+                None for wait forever
+
+        Returns:
+            output of format command
+
+        Raises:
+            ManageExeption: in case when format is not finished in time
+        """
+        pkey = self.__private_key__(key_file)
+        status, buff = self.__volume_format__(
+            mount_point, pkey, username, ins_ip, timeout
+        )
+        if status == "timeout":
+            raise ManageExeption()
         return buff
+
+    @metrics.instrumented
+    def volume_format_many(
+        self, targets, key_file, username, max_parallel=8, timeout=600
+    ):
+        """connect by ssh to several instances and format volumes
+        in parallel, slow instance does not block others
+
+        Args:
+            targets: list of (ins_ip, mount_point) tuples
+            key_file: file handler for private key, path to private
+                key, parsed key or None for default key
+            username: user name on instances
+            max_parallel: maximum count of parallel formats
+            timeout: maximum seconds for connect and format
+                of each volume
+
+        Returns:
+            list of dictionaries in order of targets with keys:
+            ip, mount_point, status ("OK", "FAIL", "timeout" or
+            "error"), output and error (exception for status "error")
+        """
+        self._log.debug("format %d volumes" % len(targets))
+        if not targets:
+            return []
+        pkey = self.__private_key__(key_file)
+        done = self.__run_many__(
+            self.__volume_format__, [
+                (mount_point, pkey, username, ins_ip, timeout)
+                for ins_ip, mount_point in targets
+            ], max_parallel
+        )
+        results = []
+        for (ins_ip, mount_point), (result, error) in zip(targets, done):
+            if error is not None:
+                status, buff = "error", ""
+            else:
+                status, buff = result
+            results.append({
+                "ip": ins_ip,
+                "mount_point": mount_point,
+                "status": status,
+                "output": buff,
+                "error": error,
+            })
+        return results
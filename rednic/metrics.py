@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# latency and remote call metrics of operations
+import bisect
+import contextvars
+import functools
+import threading
+import time
+
+# upper bounds of latency buckets in seconds
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300
+)
+
+# name of operation in progress in current thread or task
+_operation = contextvars.ContextVar("rednic_operation", default=None)
+
+
+def current_operation():
+    """ name of operation in progress or None """
+    return _operation.get()
+
+
+def in_context(func):
+    """ bind function to copy of current context, so function called
+    in other thread is counted for current operation
+
+    Returns:
+        function with same arguments
+    """
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+def _observed(sink, name, func, /, *args, **kwargs):
+    """ call func as operation with name and record latency """
+    token = _operation.set(name)
+    failed = True
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+        failed = False
+        return result
+    finally:
+        sink.observe(name, time.perf_counter() - start, failed)
+        _operation.reset(token)
+
+
+def instrumented(func):
+    """ Decorator for methods of object with _metrics and _tracer
+    attributes, method is called directly if both are None.
+
+    Latency of method and remote calls inside are recorded to sink
+    in _metrics, methods called inside of other instrumented method
+    are recorded as part of outer method. Each method is recorded as
+    span in _tracer, methods called inside are child spans.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        sink = self._metrics
+        tracer = self._tracer
+        if sink is None and tracer is None:
+            return func(self, *args, **kwargs)
+        if sink is None or _operation.get() is not None:
+            call = func
+        else:
+            call = functools.partial(_observed, sink, name, func)
+        if tracer is None:
+            return call(self, *args, **kwargs)
+        with tracer.span(name):
+            return call(self, *args, **kwargs)
+
+    return wrapper
+
+
+def count(sink, service, call):
+    """ record remote call for current operation
+
+    Args:
+        sink: metrics sink
+        service: "cinder", "nova" or "ssh"
+        call: name of call like "volumes.get"
+    """
+    sink.count(_operation.get() or "", service, call)
+
+
+def remote(sink, tracer, service, call, func, /, *args, **kwargs):
+    """ call func as remote call of current operation
+
+    Args:
+        sink: metrics sink or None
+        tracer: rednic.tracing.Tracer or None
+        service: "cinder", "nova" or "ssh"
+        call: name of call like "volumes.get"
+        func: function for call
+
+    Returns:
+        result of func
+    """
+    if sink is not None:
+        count(sink, service, call)
+    if tracer is None:
+        return func(*args, **kwargs)
+    return tracer.call(service, call, func, *args, **kwargs)
+
+
+class Histogram(object):
+    """ Count of values in buckets with sum of all values """
+
+    __slots__ = ("bounds", "buckets", "count", "sum")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        # last bucket is for values over all bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """ add value to histogram """
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """ list of (upper bound, count of values <= bound),
+        last bound is float("inf")
+        """
+        result = []
+        total = 0
+        for bound, value in zip(
+            self.bounds + (float("inf"), ), self.buckets
+        ):
+            total += value
+            result.append((bound, total))
+        return result
+
+
+class MemorySink(object):
+    """ Sink that keep metrics in memory """
+
+    # operation -> Histogram
+    _latency = None
+
+    # operation -> count of failed calls
+    _errors = None
+
+    # (operation, service, call) -> count of calls
+    _calls = None
+
+    # bounds of latency buckets
+    _bounds = None
+
+    # lock for all changes
+    _lock = None
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        """ Args:
+            bounds: upper bounds of latency buckets in seconds
+        """
+        self._bounds = tuple(bounds)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """ drop all collected metrics """
+        with self._lock:
+            self._latency = {}
+            self._errors = {}
+            self._calls = {}
+
+    def observe(self, operation, seconds, failed):
+        """ record finished operation
+
+        Args:
+            operation: name of method
+            seconds: duration of call
+            failed: call raised exception
+        """
+        with self._lock:
+            histogram = self._latency.get(operation)
+            if histogram is None:
+                histogram = Histogram(self._bounds)
+                self._latency[operation] = histogram
+            histogram.observe(seconds)
+            if failed:
+                self._errors[operation] = self._errors.get(operation, 0) + 1
+
+    def count(self, operation, service, call):
+        """ record remote call
+
+        Args:
+            operation: name of method, "" for calls outside of methods
+            service: "cinder", "nova" or "ssh"
+            call: name of call like "volumes.get"
+        """
+        key = (operation, service, call)
+        with self._lock:
+            self._calls[key] = self._calls.get(key, 0) + 1
+
+    def snapshot(self):
+        """ copy of collected metrics
+
+        Returns:
+            dictionary with keys:
+            operations: operation -> dictionary with count, sum,
+                errors and buckets as list of (upper bound,
+                cumulative count)
+            calls: (operation, service, call) -> count of calls
+        """
+        with self._lock:
+            return {
+                "operations": dict(
+                    (operation, {
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "errors": self._errors.get(operation, 0),
+                        "buckets": histogram.cumulative(),
+                    }) for operation, histogram in self._latency.items()
+                ),
+                "calls": dict(self._calls),
+            }
+
+
+def _label(value):
+    """ escape value of label for prometheus """
+    return str(value).replace(
+        "\\", "\\\\"
+    ).replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    """ format number for prometheus """
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class PrometheusSink(MemorySink):
+    """ Sink that keep metrics in memory and render them in prometheus
+    text exposition format
+    """
+
+    # prefix for names of metrics
+    _prefix = None
+
+    def __init__(self, prefix="rednic", bounds=LATENCY_BUCKETS):
+        """ Args:
+            prefix: prefix for names of metrics
+            bounds: upper bounds of latency buckets in seconds
+        """
+        MemorySink.__init__(self, bounds)
+        self._prefix = prefix
+
+    def exposition(self):
+        """ metrics in prometheus text format version 0.0.4 """
+        data = self.snapshot()
+        seconds = self._prefix + "_operation_seconds"
+        errors = self._prefix + "_operation_errors_total"
+        calls = self._prefix + "_remote_calls_total"
+        lines = [
+            "# HELP %s Latency of operations." % seconds,
+            "# TYPE %s histogram" % seconds,
+        ]
+        for operation in sorted(data["operations"]):
+            values = data["operations"][operation]
+            label = 'operation="%s"' % _label(operation)
+            for bound, value in values["buckets"]:
+                lines.append('%s_bucket{%s,le="%s"} %d' % (
+                    seconds, label, _number(bound), value
+                ))
+            lines.append("%s_sum{%s} %s" % (
+                seconds, label, _number(values["sum"])
+            ))
+            lines.append("%s_count{%s} %d" % (
+                seconds, label, values["count"]
+            ))
+        lines.extend([
+            "# HELP %s Failed operations." % errors,
+            "# TYPE %s counter" % errors,
+        ])
+        for operation in sorted(data["operations"]):
+            lines.append('%s{operation="%s"} %d' % (
+                errors, _label(operation),
+                data["operations"][operation]["errors"]
+            ))
+        lines.extend([
+            "# HELP %s Calls to cinder, nova and ssh." % calls,
+            "# TYPE %s counter" % calls,
+        ])
+        for (operation, service, call), value in sorted(
+            data["calls"].items()
+        ):
+            lines.append(
+                '%s{operation="%s",service="%s",call="%s"} %d' % (
+                    calls, _label(operation), _label(service),
+                    _label(call), value
+                )
+            )
+        return "\n".join(lines) + "\n"
+
+
+class _InstrumentedManager(object):
+    """ Proxy for manager of client, each call of method is recorded """
+
+    def __init__(self, manager, service, name, sink, tracer):
+        self._manager = manager
+        self._service = service
+        self._name = name
+        self._sink = sink
+        self._tracer = tracer
+
+    def __getattr__(self, attr):
+        value = getattr(self._manager, attr)
+        if not callable(value):
+            return value
+        call = "%s.%s" % (self._name, attr)
+
+        @functools.wraps(value)
+        def recorded(*args, **kwargs):
+            return remote(
+                self._sink, self._tracer, self._service, call, value,
+                *args, **kwargs
+            )
+
+        return recorded
+
+    def __call__(self, *args, **kwargs):
+        # method of client itself like authenticate
+        return remote(
+            self._sink, self._tracer, self._service, self._name,
+            self._manager, *args, **kwargs
+        )
+
+
+class InstrumentedClient(object):
+    """ Proxy for cinder or nova client, calls of manager methods
+    like client.volumes.get are counted and traced for current
+    operation
+    """
+
+    def __init__(self, client, service, sink=None, tracer=None):
+        """ Args:
+            client: real client
+            service: name of service for metrics
+            sink: metrics sink or None
+            tracer: rednic.tracing.Tracer or None
+        """
+        self._client = client
+        self._service = service
+        self._sink = sink
+        self._tracer = tracer
+        self._managers = {}
+
+    def __getattr__(self, attr):
+        manager = self._managers.get(attr)
+        if manager is None:
+            manager = _InstrumentedManager(
+                getattr(self._client, attr), self._service, attr,
+                self._sink, self._tracer
+            )
+            self._managers[attr] = manager
+        return manager
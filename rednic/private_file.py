@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# local files readable only by owner, shared by token cache and inventory
+import os
+import threading
+
+# access rights for file and its directory
+FILE_MODE = 0o600
+DIR_MODE = 0o700
+
+
+def is_private(stat):
+    """ check that file is owned and accessible only by current user
+
+    Args:
+        stat: result of os.stat or os.fstat of file
+
+    Returns:
+        True if nobody else can read or change file
+    """
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o077
+
+
+def replace_private(path, write):
+    """ replace file by new one atomically, readers see old or new file,
+    file is created with FILE_MODE and missed directory with DIR_MODE,
+    temporary file is removed on any error
+
+    Args:
+        path: absolute path to file
+        write: function that fill file by path given as argument,
+            file already exists and is empty
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, mode=DIR_MODE, exist_ok=True)
+    temp_path = "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+    os.close(os.open(
+        temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, FILE_MODE
+    ))
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# compact descriptions of volumes and instances
+
+
+class Record(object):
+    """ Base for compact description with dictionary like access,
+    each key is stored in own slot instead of dictionary per item
+
+    Record is not dict: isinstance(record, dict) is False, json.dumps
+    and other code that needs real dictionary must use to_dict(), and
+    only known keys can be set, unknown key raises KeyError.
+    """
+
+    __slots__ = ()
+
+    # keys in dictionary order, same as names of slots
+    _keys = ()
+
+    # keys for fast check
+    _key_set = frozenset()
+
+    def __init__(self, *values):
+        for key, value in zip(self._keys, values):
+            setattr(self, key, value)
+        for key in self._keys[len(values):]:
+            setattr(self, key, None)
+
+    def __getitem__(self, key):
+        if key not in self._key_set:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self._key_set:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        """ get value by key or default for unknown key """
+        if key not in self._key_set:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        """ list of keys, same as in dictionary format """
+        return list(self._keys)
+
+    def values(self):
+        """ list of values in order of keys """
+        return [getattr(self, key) for key in self._keys]
+
+    def items(self):
+        """ list of (key, value) tuples in order of keys """
+        return [(key, getattr(self, key)) for key in self._keys]
+
+    def to_dict(self):
+        """ description in dictionary format """
+        return dict(self.items())
+
+    def copy(self):
+        """ shallow copy of record """
+        return type(self)(*self.values())
+
+    def update(self, other=(), **kwargs):
+        """ set values of known keys from dictionary, record or list
+        of (key, value) tuples and keyword arguments
+        """
+        if hasattr(other, "keys"):
+            other = [(key, other[key]) for key in other.keys()]
+        for key, value in list(other) + list(kwargs.items()):
+            self[key] = value
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._key_set
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return type(self) is type(other) and \
+                self.values() == other.values()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return self.values()
+
+    def __setstate__(self, state):
+        Record.__init__(self, *state)
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self.to_dict())
+
+
+class VolumeRecord(Record):
+    """ Volume description, same keys as in dictionary format """
+
+    __slots__ = (
+        "id", "size", "status", "name", "description", "loaded",
+        "type", "boot", "attach"
+    )
+
+    _keys = __slots__
+
+    _key_set = frozenset(__slots__)
+
+    def __init__(
+        self, id=None, size=None, status=None, name=None, description=None,
+        loaded=None, type=None, boot=None, attach=None
+    ):
+        self.id = id
+        self.size = size
+        self.status = status
+        self.name = name
+        self.description = description
+        self.loaded = loaded
+        self.type = type
+        self.boot = boot
+        self.attach = attach
+
+
+class InstanceRecord(Record):
+    """ Instance description, same keys as in dictionary format """
+
+    __slots__ = ("id", "name", "status", "key_name", "human_id", "networks")
+
+    _keys = __slots__
+
+    _key_set = frozenset(__slots__)
+
+    def __init__(
+        self, id=None, name=None, status=None, key_name=None,
+        human_id=None, networks=None
+    ):
+        self.id = id
+        self.name = name
+        self.status = status
+        self.key_name = key_name
+        self.human_id = human_id
+        self.networks = networks
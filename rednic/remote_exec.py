@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# run commands on instances over ssh
+import socket
+import time
+
+# bytes requested from channel at once
+CHUNK_SIZE = 32768
+
+
+class RemoteResult(object):
+    """ Result of command on instance """
+
+    __slots__ = ("output", "marker", "exit_status", "timed_out")
+
+    def __init__(self, output, marker=None, exit_status=None,
+                 timed_out=False):
+        """ Args:
+            output: bytes from command output
+            marker: first found completion marker or None
+            exit_status: exit code of command or None if unknown
+            timed_out: command was not finished before deadline
+        """
+        self.output = output
+        self.marker = marker
+        self.exit_status = exit_status
+        self.timed_out = timed_out
+
+    @property
+    def text(self):
+        """ command output as string """
+        return self.output.decode("utf-8", "replace")
+
+
+def remote_exec(
+    client, command, markers=None, timeout=None, on_line=None,
+    get_pty=True, chunk_size=CHUNK_SIZE
+):
+    """ run command on instance and read output until one of markers
+    or end of output
+
+    Output is read by big chunks into bytearray, only new data is
+    searched for markers, so time is linear to size of output.
+
+    Args:
+        client: connected paramiko.SSHClient
+        command: command for run
+        markers: list of bytes or strings, read is stopped when any
+            of them is found in output, None for read until end
+            of output
+        timeout: maximum seconds for command, None for wait forever
+        on_line: function called with each line of output as bytes
+            without line end, last line without end is called after
+            end of read
+        get_pty: request pseudo terminal for command
+        chunk_size: bytes requested from channel at once
+
+    Returns:
+        RemoteResult
+    """
+    markers = [
+        marker.encode("utf-8") if isinstance(marker, str) else bytes(marker)
+        for marker in markers or []
+    ]
+    overlap = max([len(marker) for marker in markers] or [1]) - 1
+    deadline = None
+    if timeout is not None:
+        deadline = time.time() + timeout
+
+    buff = bytearray()
+    found = None
+    timed_out = False
+    exit_status = None
+    line_start = 0
+    chan = client.get_transport().open_session()
+    try:
+        if get_pty:
+            chan.get_pty()
+        chan.exec_command(command)
+        while True:
+            if deadline is not None:
+                left = deadline - time.time()
+                if left <= 0:
+                    # output can arrive faster than timeout of channel
+                    timed_out = True
+                    break
+                chan.settimeout(left)
+            try:
+                data = chan.recv(chunk_size)
+            except socket.timeout:
+                timed_out = True
+                break
+            if not data:
+                # end of output
+                break
+            scan_from = max(0, len(buff) - overlap)
+            buff.extend(data)
+            if on_line:
+                line_end = buff.find(b"\n", max(line_start, scan_from))
+                while line_end != -1:
+                    on_line(bytes(buff[line_start:line_end]).rstrip(b"\r"))
+                    line_start = line_end + 1
+                    line_end = buff.find(b"\n", line_start)
+            for marker in markers:
+                if buff.find(marker, scan_from) != -1:
+                    found = marker
+                    break
+            if found is not None:
+                break
+        if on_line and line_start < len(buff):
+            on_line(bytes(buff[line_start:]).rstrip(b"\r"))
+        if chan.exit_status_ready():
+            exit_status = chan.recv_exit_status()
+    finally:
+        chan.close()
+    return RemoteResult(bytes(buff), found, exit_status, timed_out)
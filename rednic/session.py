@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# keystone session shared by cinder and nova clients
+from rednic import lazy
+
+# keystoneauth1 and requests are imported on first session
+identity_v2 = lazy.LazyModule("keystoneauth1.identity.v2")
+identity_v3 = lazy.LazyModule("keystoneauth1.identity.v3")
+identity_generic = lazy.LazyModule("keystoneauth1.identity.generic")
+keystone_session = lazy.LazyModule("keystoneauth1.session")
+requests = lazy.LazyModule("requests")
+
+# count of kept alive connections to each host
+POOL_SIZE = 10
+
+# domain for users and projects in keystone v3
+DEFAULT_DOMAIN = "default"
+
+
+def create_auth(user, password, tenant, auth_url, domain=DEFAULT_DOMAIN):
+    """ create password authentication for keystone, version of
+    identity api is selected by auth_url without discovery request
+
+    Args:
+        user: user name in opensack
+        password: password for this user
+        tenant: project name
+        auth_url: authentication url, ends with /v2.0 or /v3 for
+            skip discovery of identity api version
+        domain: domain id of user and project for keystone v3
+
+    Returns:
+        keystoneauth1 authentication plugin
+    """
+    path = auth_url.rstrip("/")
+    if path.endswith("/v2.0"):
+        return identity_v2.Password(
+            auth_url, username=user, password=password, tenant_name=tenant
+        )
+    if path.endswith("/v3"):
+        identity = identity_v3
+    else:
+        identity = identity_generic
+    return identity.Password(
+        auth_url, username=user, password=password, project_name=tenant,
+        user_domain_id=domain, project_domain_id=domain
+    )
+
+
+def cache_tokens(auth, token_cache, user, tenant, auth_url):
+    """ use stored token for authentication and store each new token
+
+    Args:
+        auth: keystoneauth1 authentication plugin
+        token_cache: rednic.token_cache.TokenCache
+        user: user name in opensack
+        tenant: project name
+        auth_url: authentication url
+
+    Returns:
+        same authentication plugin
+    """
+    state = token_cache.load(auth_url, user, tenant)
+    if state:
+        auth.set_auth_state(state)
+    get_access = auth.get_access
+
+    def cached_get_access(session, **kwargs):
+        current = auth.auth_ref
+        access = get_access(session, **kwargs)
+        if access is not current and access.expires:
+            token_cache.save(
+                auth_url, user, tenant, auth.get_auth_state(),
+                access.expires.timestamp()
+            )
+        return access
+
+    auth.get_access = cached_get_access
+    return auth
+
+
+def create_session(
+    user, password, tenant, auth_url, pool_size=POOL_SIZE, timeout=None,
+    domain=DEFAULT_DOMAIN, token_cache=None
+):
+    """ create authenticated session with pool of kept alive
+    connections, one token is fetched and refreshed for all clients
+    that use this session
+
+    Args:
+        user: user name in opensack
+        password: password for this user
+        tenant: project name
+        auth_url: authentication url
+        pool_size: count of kept alive connections to each host
+        timeout: seconds for each request, None for wait forever
+        domain: domain id of user and project for keystone v3
+        token_cache: rednic.token_cache.TokenCache for reuse tokens
+            between runs, None for authenticate in each run
+
+    Returns:
+        keystoneauth1.session.Session
+    """
+    http = requests.Session()
+    for scheme in ("http://", "https://"):
+        http.mount(scheme, keystone_session.TCPKeepAliveAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        ))
+    auth = create_auth(user, password, tenant, auth_url, domain)
+    if token_cache is not None:
+        cache_tokens(auth, token_cache, user, tenant, auth_url)
+    return keystone_session.Session(auth=auth, session=http, timeout=timeout)
@@ -0,0 +1,927 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# in-process stand-in of cinder and nova for load tests without
+# openstack, clients are passed to ManageUtils as clients argument
+import argparse
+import bisect
+import datetime
+import json
+import random
+import re
+import sys
+import threading
+import time
+from concurrent import futures
+from rednic import inventory
+from rednic import lazy
+
+# exceptions are same as in real clients
+cinder_exceptions = lazy.LazyModule("cinderclient.exceptions")
+nova_exceptions = lazy.LazyModule("novaclient.exceptions")
+
+# status changes done by cloud after request:
+# request status -> final status
+TRANSITIONS = {
+    "creating": "available",
+    "attaching": "in-use",
+    "detaching": "available",
+    "deleting": "deleted",
+}
+
+# status of deleted instance, deleted instances are listed only
+# in list of changes
+SERVER_DELETED = "DELETED"
+
+# format of updated_at in cinder and nova responses
+VOLUME_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+SERVER_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+class _Volume(object):
+    """ State of volume inside of simulated cinder """
+
+    __slots__ = (
+        "id", "tenant", "size", "name", "description", "volume_type",
+        "bootable", "status", "ready_at", "attachments", "updated"
+    )
+
+    def __init__(self, vol_id, tenant, size, name, description,
+                 volume_type, status, ready_at, updated):
+        self.id = vol_id
+        self.tenant = tenant
+        self.size = size
+        self.name = name
+        self.description = description
+        self.volume_type = volume_type
+        self.bootable = "false"
+        self.status = status
+        self.ready_at = ready_at
+        self.attachments = []
+        self.updated = updated
+
+
+class _Server(object):
+    """ State of instance inside of simulated nova """
+
+    __slots__ = (
+        "id", "tenant", "name", "status", "key_name", "networks", "updated"
+    )
+
+    def __init__(self, ins_id, tenant, name, key_name, fixed_ip, updated):
+        self.id = ins_id
+        self.tenant = tenant
+        self.name = name
+        self.status = "ACTIVE"
+        self.key_name = key_name
+        self.networks = {"private": [fixed_ip]}
+        self.updated = updated
+
+
+class SimVolume(object):
+    """ Volume in response of simulated cinder, same attributes as
+    cinder volume resource
+    """
+
+    def __init__(self, manager, info):
+        self.manager = manager
+        self._info = info
+        for key, value in info.items():
+            setattr(self, key, value)
+
+    def is_loaded(self):
+        return True
+
+    def attach(self, instance_uuid, mountpoint, mode="rw"):
+        return self.manager.attach(self, instance_uuid, mountpoint, mode)
+
+    def detach(self):
+        return self.manager.detach(self)
+
+    def delete(self):
+        return self.manager.delete(self)
+
+    def __repr__(self):
+        return "<Volume: %s>" % self.id
+
+
+class SimServer(object):
+    """ Instance in response of simulated nova, same attributes as
+    nova server resource
+    """
+
+    def __init__(self, manager, info):
+        self.manager = manager
+        self._info = info
+        for key, value in info.items():
+            setattr(self, key, value)
+        self.human_id = info["name"]
+
+    def add_floating_ip(self, address, fixed_address=None):
+        return self.manager.add_floating_ip(self, address, fixed_address)
+
+    def remove_floating_ip(self, address):
+        return self.manager.remove_floating_ip(self, address)
+
+    def __repr__(self):
+        return "<Server: %s>" % self.name
+
+
+def _ref(value):
+    """ id of resource or id itself """
+    return getattr(value, "id", value)
+
+
+class _SimManager(object):
+    """ Base of simulated managers with latency and errors """
+
+    def __init__(self, cloud, tenant):
+        self.cloud = cloud
+        self.tenant = tenant
+
+
+class SimVolumeManager(_SimManager):
+    """ Simulated cinder volumes manager """
+
+    def get(self, volume_id):
+        return self.cloud.call(
+            "cinder", "volumes.get", self.__fetch__, _ref(volume_id)
+        )
+
+    def __fetch__(self, vol_id):
+        volume = self.cloud.__volume__(vol_id, self.tenant)
+        return SimVolume(self, self.cloud.__volume_info__(volume))
+
+    def list(self, detailed=True, search_opts=None, marker=None,
+             limit=None, **kwargs):
+        infos = self.cloud.call(
+            "cinder", "volumes.list", self.cloud.__volume_list__,
+            self.tenant, search_opts or {}, marker, limit
+        )
+        if not detailed:
+            # summary of volume without details
+            infos = [
+                {"id": info["id"], "display_name": info["display_name"]}
+                for info in infos
+            ]
+        return [SimVolume(self, info) for info in infos]
+
+    def create(self, size, display_name=None, display_description=None,
+               volume_type=None, **kwargs):
+        return SimVolume(self, self.cloud.call(
+            "cinder", "volumes.create", self.cloud.__volume_create__,
+            self.tenant, size, display_name, display_description,
+            volume_type
+        ))
+
+    def delete(self, volume):
+        return self.cloud.call(
+            "cinder", "volumes.delete", self.cloud.__volume_delete__,
+            _ref(volume), self.tenant
+        )
+
+    def attach(self, volume, instance_uuid, mountpoint, mode="rw"):
+        return self.cloud.call(
+            "cinder", "volumes.attach", self.cloud.__volume_attach__,
+            _ref(volume), self.tenant, instance_uuid, mountpoint
+        )
+
+    def detach(self, volume, attachment_uuid=None):
+        return self.cloud.call(
+            "cinder", "volumes.detach", self.cloud.__volume_detach__,
+            _ref(volume), self.tenant
+        )
+
+
+class SimServerManager(_SimManager):
+    """ Simulated nova servers manager """
+
+    def get(self, server):
+        return SimServer(self, self.cloud.call(
+            "nova", "servers.get", self.cloud.__server_get__,
+            _ref(server), self.tenant
+        ))
+
+    def list(self, detailed=True, search_opts=None, marker=None,
+             limit=None, **kwargs):
+        return [
+            SimServer(self, info) for info in self.cloud.call(
+                "nova", "servers.list", self.cloud.__server_list__,
+                self.tenant, search_opts or {}, marker, limit
+            )
+        ]
+
+    def add_floating_ip(self, server, address, fixed_address=None):
+        return self.cloud.call(
+            "nova", "servers.add_floating_ip", self.cloud.__floating_ip__,
+            _ref(server), self.tenant, address, True
+        )
+
+    def remove_floating_ip(self, server, address):
+        return self.cloud.call(
+            "nova", "servers.remove_floating_ip",
+            self.cloud.__floating_ip__, _ref(server), self.tenant,
+            address, False
+        )
+
+
+class SimCinderClient(object):
+    """ Simulated cinder client for one tenant """
+
+    def __init__(self, cloud, tenant):
+        self.volumes = SimVolumeManager(cloud, tenant)
+
+    def authenticate(self):
+        pass
+
+
+class SimNovaClient(object):
+    """ Simulated nova client for one tenant """
+
+    def __init__(self, cloud, tenant):
+        self.servers = SimServerManager(cloud, tenant)
+
+    def authenticate(self):
+        pass
+
+
+class SimulatedCloud(object):
+    """ State of cinder and nova with asynchronous status changes,
+    latency and random errors of calls.
+
+    Status of volume is changed by cloud after transition_time
+    seconds from request, like creating -> available or
+    detaching -> available, change is applied on next read.
+    """
+
+    # seconds of each call or dictionary "service call" -> seconds
+    _latency = None
+
+    # random part of latency, 0.1 is +-10%
+    _jitter = None
+
+    # probability of error for each call
+    _error_rate = None
+
+    # seconds before transitional status is changed
+    _transition_time = None
+
+    # probability that created volume goes to error status
+    _volume_error_rate = None
+
+    # function that return current time
+    _clock = None
+
+    # unix time of zero clock time
+    _epoch = None
+
+    # function that wait some seconds
+    _sleep = None
+
+    # random numbers for latency and errors
+    _random = None
+
+    # lock for all state
+    _lock = None
+
+    # volume id -> _Volume
+    _volumes = None
+
+    # sorted volume ids, order of list
+    _volume_ids = None
+
+    # (tenant, name) -> set of volume ids
+    _volume_names = None
+
+    # server id -> _Server
+    _servers = None
+
+    # sorted server ids, order of list
+    _server_ids = None
+
+    # counter for new ids
+    _next_id = 0
+
+    # "service call" -> count of calls
+    _calls = None
+
+    def __init__(
+        self, latency=0, jitter=0, error_rate=0, transition_time=0.5,
+        volume_error_rate=0, seed=None, clock=time.monotonic,
+        sleep=time.sleep
+    ):
+        """ Args:
+            latency: seconds of each call or dictionary
+                "service call" -> seconds, for example
+                {"cinder volumes.list": 0.2}, missed calls have
+                no latency
+            jitter: random part of latency, 0.1 is +-10%
+            error_rate: probability of error for each call
+            transition_time: seconds before transitional status
+                of volume is changed
+            volume_error_rate: probability that created volume goes
+                to error status instead of available
+            seed: seed for random latency and errors
+            clock: function that return current time in seconds
+            sleep: function that wait some seconds
+        """
+        self._latency = latency
+        self._jitter = jitter
+        self._error_rate = error_rate
+        self._transition_time = transition_time
+        self._volume_error_rate = volume_error_rate
+        self._clock = clock
+        self._epoch = time.time() - clock()
+        self._sleep = sleep
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._volumes = {}
+        self._volume_ids = []
+        self._volume_names = {}
+        self._servers = {}
+        self._server_ids = []
+        self._calls = {}
+
+    def cinder(self, tenant="demo"):
+        """ cinder client for tenant """
+        return SimCinderClient(self, tenant)
+
+    def nova(self, tenant="demo"):
+        """ nova client for tenant """
+        return SimNovaClient(self, tenant)
+
+    def clients(self, tenant="demo"):
+        """ clients argument of ManageUtils for tenant """
+        return {"cinder": self.cinder(tenant), "nova": self.nova(tenant)}
+
+    def calls(self):
+        """ dictionary "service call" -> count of calls """
+        with self._lock:
+            return dict(self._calls)
+
+    def __new_id__(self, prefix):
+        """ new id, ids are sorted in order of creation,
+        must be called with lock
+        """
+        self._next_id += 1
+        return "%s-%012d" % (prefix, self._next_id)
+
+    def populate(self, volumes=0, servers=0, tenant="demo", size=1):
+        """ add available volumes and active instances
+
+        Args:
+            volumes: count of volumes
+            servers: count of instances
+            tenant: owner of new volumes and instances
+            size: size of each volume
+
+        Returns:
+            (list of volume ids, list of instance ids)
+        """
+        vol_ids = []
+        ins_ids = []
+        with self._lock:
+            now = self._clock()
+            for _ in range(volumes):
+                vol_id = self.__new_id__("vol")
+                name = "volume-%d" % self._next_id
+                self._volumes[vol_id] = _Volume(
+                    vol_id, tenant, size, name, "", "lvm", "available", None,
+                    now
+                )
+                self._volume_names.setdefault(
+                    (tenant, name), set()
+                ).add(vol_id)
+                vol_ids.append(vol_id)
+            for _ in range(servers):
+                ins_id = self.__new_id__("ins")
+                self._servers[ins_id] = _Server(
+                    ins_id, tenant, "instance-%d" % self._next_id, "key",
+                    "10.%d.%d.%d" % (
+                        self._next_id >> 16 & 255, self._next_id >> 8 & 255,
+                        self._next_id & 255
+                    ), now
+                )
+                ins_ids.append(ins_id)
+            # new ids are bigger than all others
+            self._volume_ids.extend(vol_ids)
+            self._server_ids.extend(ins_ids)
+        return vol_ids, ins_ids
+
+    def sample_volume(self, rand=None, status=None):
+        """ id and name of random volume with status or any status,
+        None if not found after several tries
+        """
+        rand = rand or self._random
+        with self._lock:
+            for _ in range(100):
+                if not self._volume_ids:
+                    return None
+                volume = self._volumes[rand.choice(self._volume_ids)]
+                self.__refresh__(volume, self._clock())
+                if volume.id in self._volumes and (
+                    status is None or volume.status == status
+                ):
+                    return volume.id, volume.name
+        return None
+
+    def sample_server(self, rand=None):
+        """ id and name of random not deleted instance, None if not
+        found after several tries
+        """
+        rand = rand or self._random
+        with self._lock:
+            for _ in range(100):
+                if not self._server_ids:
+                    return None
+                server = self._servers[rand.choice(self._server_ids)]
+                if server.status != SERVER_DELETED:
+                    return server.id, server.name
+        return None
+
+    def delete_server(self, ins_id):
+        """ delete instance like somebody else, deleted instance is
+        returned only in list with changes-since filter
+        """
+        with self._lock:
+            server = self._servers[ins_id]
+            server.status = SERVER_DELETED
+            server.updated = self._clock()
+
+    def __timestamp__(self, value, time_format):
+        """ clock time in format of api """
+        return datetime.datetime.fromtimestamp(
+            self._epoch + value, datetime.timezone.utc
+        ).strftime(time_format)
+
+    def __since__(self, service, value):
+        """ clock time from iso 8601 time of filter
+
+        Raises:
+            BadRequest of service for wrong time
+        """
+        parsed = inventory.parse_timestamp(value)
+        if parsed is None:
+            raise self.__exceptions__(service).BadRequest(
+                400, message="Invalid time %r" % (value, )
+            )
+        return parsed.replace(
+            tzinfo=datetime.timezone.utc
+        ).timestamp() - self._epoch
+
+    def call(self, service, call, func, *args):
+        """ run call with latency and random error
+
+        Raises:
+            ClientException of service in case of random error
+        """
+        name = "%s %s" % (service, call)
+        with self._lock:
+            self._calls[name] = self._calls.get(name, 0) + 1
+            failed = self._error_rate and \
+                self._random.random() < self._error_rate
+            latency = self._latency
+            if isinstance(latency, dict):
+                latency = latency.get(name, 0)
+            if latency and self._jitter:
+                latency *= 1 + self._jitter * (self._random.random() * 2 - 1)
+        if latency:
+            self._sleep(latency)
+        if failed:
+            raise self.__exceptions__(service).ClientException(
+                500, message="simulated error of %s" % name
+            )
+        with self._lock:
+            return func(*args)
+
+    def __exceptions__(self, service):
+        """ module with exceptions of service client """
+        if service == "nova":
+            return nova_exceptions
+        return cinder_exceptions
+
+    def __refresh__(self, volume, now):
+        """ apply finished transition of volume, must be called
+        with lock
+        """
+        if volume.ready_at is None or now < volume.ready_at:
+            return
+        volume.updated = volume.ready_at
+        volume.ready_at = None
+        target = TRANSITIONS.get(volume.status)
+        if target is None:
+            return
+        if target == "deleted":
+            del self._volumes[volume.id]
+            pos = bisect.bisect_left(self._volume_ids, volume.id)
+            del self._volume_ids[pos]
+            names = self._volume_names[(volume.tenant, volume.name)]
+            names.discard(volume.id)
+            if not names:
+                del self._volume_names[(volume.tenant, volume.name)]
+            return
+        if volume.status == "creating" and self._volume_error_rate and \
+                self._random.random() < self._volume_error_rate:
+            target = "error"
+        if volume.status == "detaching":
+            volume.attachments = []
+        volume.status = target
+
+    def __start__(self, volume, status):
+        """ start transition of volume, must be called with lock """
+        volume.status = status
+        volume.updated = self._clock()
+        volume.ready_at = volume.updated + self._transition_time
+
+    def __volume__(self, vol_id, tenant, all_tenants=False):
+        """ current state of volume, must be called with lock
+
+        Raises:
+            cinderclient.exceptions.NotFound: for unknown volume
+        """
+        volume = self._volumes.get(vol_id)
+        if volume is not None:
+            self.__refresh__(volume, self._clock())
+        if volume is None or vol_id not in self._volumes or (
+            volume.tenant != tenant and not all_tenants
+        ):
+            raise cinder_exceptions.NotFound(
+                404, message="Volume %s could not be found." % vol_id
+            )
+        return volume
+
+    def __volume_info__(self, volume):
+        """ description of volume in format of cinder api """
+        return {
+            "id": volume.id,
+            "size": volume.size,
+            "status": volume.status,
+            "display_name": volume.name,
+            "display_description": volume.description,
+            "volume_type": volume.volume_type,
+            "bootable": volume.bootable,
+            "attachments": [dict(item) for item in volume.attachments],
+            "updated_at": self.__timestamp__(
+                volume.updated, VOLUME_TIME_FORMAT
+            ),
+        }
+
+    def __page__(self, ids, items, marker, limit, check, refresh=None):
+        """ items after marker that pass check, at most limit, only
+        visited items are passed to refresh, which can drop item from
+        ids and items, must be called with lock
+        """
+        pos = 0
+        if marker is not None:
+            pos = bisect.bisect_right(ids, marker)
+        result = []
+        while pos < len(ids):
+            item_id = ids[pos]
+            item = items.get(item_id)
+            if item is not None and refresh is not None:
+                refresh(item)
+                item = items.get(item_id)
+            if pos < len(ids) and ids[pos] == item_id:
+                # otherwise dropped item is removed from ids
+                pos += 1
+            if item is None or not check(item):
+                continue
+            result.append(item)
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+    def __volume_list__(self, tenant, search_opts, marker, limit):
+        all_tenants = bool(search_opts.get("all_tenants"))
+        name = search_opts.get("display_name", search_opts.get("name"))
+        status = search_opts.get("status")
+        since = None
+        updated_at = search_opts.get("updated_at")
+        if updated_at is not None:
+            if not updated_at.startswith("gte:"):
+                raise cinder_exceptions.BadRequest(
+                    400, message="Unsupported filter %s" % updated_at
+                )
+            since = self.__since__("cinder", updated_at[4:])
+        now = self._clock()
+        if name is not None and not all_tenants:
+            ids = sorted(self._volume_names.get((tenant, name), ()))
+        else:
+            ids = self._volume_ids
+
+        def check(volume):
+            return (all_tenants or volume.tenant == tenant) and \
+                (name is None or volume.name == name) and \
+                (status is None or volume.status == status) and \
+                (since is None or volume.updated >= since)
+
+        return [
+            self.__volume_info__(volume) for volume in self.__page__(
+                ids, self._volumes, marker, limit, check,
+                lambda volume: self.__refresh__(volume, now)
+            )
+        ]
+
+    def __volume_create__(self, tenant, size, name, description,
+                          volume_type):
+        if not isinstance(size, int) or size <= 0:
+            raise cinder_exceptions.BadRequest(
+                400, message="Invalid volume size %r" % (size, )
+            )
+        vol_id = self.__new_id__("vol")
+        volume = _Volume(
+            vol_id, tenant, size, name, description, volume_type,
+            "creating", None, None
+        )
+        self.__start__(volume, "creating")
+        self._volumes[vol_id] = volume
+        self._volume_ids.append(vol_id)
+        self._volume_names.setdefault((tenant, name), set()).add(vol_id)
+        return self.__volume_info__(volume)
+
+    def __volume_delete__(self, vol_id, tenant):
+        volume = self.__volume__(vol_id, tenant)
+        if volume.status not in ("available", "error"):
+            raise cinder_exceptions.BadRequest(
+                400, message="Volume status must be available or error"
+            )
+        self.__start__(volume, "deleting")
+
+    def __volume_attach__(self, vol_id, tenant, ins_id, mountpoint):
+        volume = self.__volume__(vol_id, tenant)
+        server = self._servers.get(ins_id)
+        if server is None or server.status == SERVER_DELETED:
+            raise cinder_exceptions.NotFound(
+                404, message="Instance %s could not be found." % ins_id
+            )
+        if volume.status != "available":
+            raise cinder_exceptions.BadRequest(
+                400, message="Volume status must be available"
+            )
+        volume.attachments = [{
+            "server_id": ins_id, "device": mountpoint, "volume_id": vol_id,
+            "id": vol_id,
+        }]
+        self.__start__(volume, "attaching")
+
+    def __volume_detach__(self, vol_id, tenant):
+        volume = self.__volume__(vol_id, tenant)
+        if volume.status != "in-use":
+            raise cinder_exceptions.BadRequest(
+                400, message="Volume must be attached in order to detach."
+            )
+        self.__start__(volume, "detaching")
+
+    def __server__(self, ins_id, tenant):
+        server = self._servers.get(ins_id)
+        if server is None or server.tenant != tenant or \
+                server.status == SERVER_DELETED:
+            raise nova_exceptions.NotFound(
+                404, message="Instance %s could not be found." % ins_id
+            )
+        return server
+
+    def __server_info__(self, server):
+        """ description of instance in format of nova api """
+        return {
+            "id": server.id,
+            "name": server.name,
+            "status": server.status,
+            "key_name": server.key_name,
+            "networks": dict(
+                (net, list(ips)) for net, ips in server.networks.items()
+            ),
+            "updated_at": self.__timestamp__(
+                server.updated, SERVER_TIME_FORMAT
+            ),
+        }
+
+    def __server_get__(self, ins_id, tenant):
+        return self.__server_info__(self.__server__(ins_id, tenant))
+
+    def __server_list__(self, tenant, search_opts, marker, limit):
+        all_tenants = bool(search_opts.get("all_tenants"))
+        name = search_opts.get("name")
+        pattern = re.compile(name) if name is not None else None
+        status = search_opts.get("status")
+        since = None
+        if search_opts.get("changes-since") is not None:
+            since = self.__since__("nova", search_opts["changes-since"])
+
+        def check(server):
+            if since is None:
+                if server.status == SERVER_DELETED:
+                    return False
+            elif server.updated < since:
+                return False
+            return (all_tenants or server.tenant == tenant) and \
+                (pattern is None or pattern.search(server.name)) and \
+                (status is None or server.status == status)
+
+        return [
+            self.__server_info__(server) for server in self.__page__(
+                self._server_ids, self._servers, marker, limit, check
+            )
+        ]
+
+    def __floating_ip__(self, ins_id, tenant, address, add):
+        server = self.__server__(ins_id, tenant)
+        ips = server.networks.setdefault("private", [])
+        if add:
+            if address not in ips:
+                ips.append(address)
+        elif address in ips:
+            ips.remove(address)
+        else:
+            raise nova_exceptions.NotFound(
+                404, message="Floating ip %s is not associated" % address
+            )
+        server.updated = self._clock()
+
+
+def _percentile(values, fraction):
+    """ nearest rank percentile of sorted values """
+    if not values:
+        return None
+    pos = max(0, min(len(values) - 1, int(round(fraction * len(values))) - 1))
+    return values[pos]
+
+
+def _summary(latencies, errors):
+    """ statistics of operation latencies in seconds """
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "mean": sum(latencies) / len(latencies) if latencies else None,
+        "p50": _percentile(latencies, 0.5),
+        "p99": _percentile(latencies, 0.99),
+        "max": latencies[-1] if latencies else None,
+    }
+
+
+def op_volume_get(manage, cloud, rand):
+    volume = cloud.sample_volume(rand)
+    manage.volume_get(vol_id=volume[0])
+
+
+def op_volume_get_name(manage, cloud, rand):
+    volume = cloud.sample_volume(rand)
+    manage.volume_get(name=volume[1])
+
+
+def op_instance_get_name(manage, cloud, rand):
+    server = cloud.sample_server(rand)
+    manage.instance_get(name=server[1])
+
+
+def op_volume_create(manage, cloud, rand):
+    manage.volume_create(1, "load-%d" % rand.randrange(1 << 30))
+
+
+def op_volume_attach(manage, cloud, rand):
+    volume = cloud.sample_volume(rand, "available")
+    server = cloud.sample_server(rand)
+    manage.volume_attach(
+        "/dev/vdb", vol_id=volume[0], ins_id=server[0], refresh=False
+    )
+
+
+def op_volume_detach(manage, cloud, rand):
+    volume = cloud.sample_volume(rand, "in-use")
+    if volume:
+        manage.volume_detach(vol_id=volume[0])
+
+
+def op_volume_delete(manage, cloud, rand):
+    volume = cloud.sample_volume(rand, "available")
+    manage.volume_delete(vol_id=volume[0])
+
+
+def op_floating_ip(manage, cloud, rand):
+    server = cloud.sample_server(rand)
+    address = "172.24.%d.%d" % (rand.randrange(256), rand.randrange(256))
+    manage.instance_attach_ip(address, ins_id=server[0])
+    manage.instance_detach_ip(address, ins_id=server[0])
+
+
+# default mix of operations for load: (name, weight, function)
+DEFAULT_MIX = [
+    ("volume_get", 30, op_volume_get),
+    ("volume_get_name", 20, op_volume_get_name),
+    ("instance_get_name", 10, op_instance_get_name),
+    ("volume_create", 10, op_volume_create),
+    ("volume_attach", 10, op_volume_attach),
+    ("volume_detach", 5, op_volume_detach),
+    ("volume_delete", 5, op_volume_delete),
+    ("floating_ip", 10, op_floating_ip),
+]
+
+
+def run_load(manage, cloud, clients=8, operations=1000, mix=None, seed=0):
+    """ run operations from concurrent clients and measure latency
+
+    Args:
+        manage: ManageUtils with clients of cloud
+        cloud: SimulatedCloud
+        clients: count of parallel clients
+        operations: count of operations from all clients
+        mix: list of (name, weight, function(manage, cloud, rand)),
+            DEFAULT_MIX by default
+        seed: seed for choice of operations
+
+    Returns:
+        dictionary with clients, operations, errors, seconds,
+        throughput (operations per second), latency (summary with
+        count, errors, mean, p50, p99 and max seconds for all
+        operations) and by operation (summary for each operation)
+    """
+    mix = mix or DEFAULT_MIX
+    names = [name for name, _, _ in mix]
+    weights = [weight for _, weight, _ in mix]
+    funcs = dict((name, func) for name, _, func in mix)
+    lock = threading.Lock()
+    latencies = dict((name, []) for name in names)
+    errors = dict((name, 0) for name in names)
+    left = [operations]
+
+    def client(number):
+        rand = random.Random(seed * 1000 + number)
+        while True:
+            with lock:
+                if left[0] <= 0:
+                    return
+                left[0] -= 1
+            name = rand.choices(names, weights)[0]
+            failed = False
+            start = time.perf_counter()
+            try:
+                funcs[name](manage, cloud, rand)
+            except BaseException:
+                failed = True
+            spent = time.perf_counter() - start
+            with lock:
+                latencies[name].append(spent)
+                if failed:
+                    errors[name] += 1
+
+    start = time.perf_counter()
+    with futures.ThreadPoolExecutor(max_workers=clients) as pool:
+        for job in [pool.submit(client, number) for number in range(clients)]:
+            job.result()
+    seconds = time.perf_counter() - start
+
+    total = [value for name in names for value in latencies[name]]
+    return {
+        "clients": clients,
+        "operations": len(total),
+        "errors": sum(errors.values()),
+        "seconds": seconds,
+        "throughput": len(total) / seconds if seconds else None,
+        "latency": _summary(total, sum(errors.values())),
+        "by_operation": dict(
+            (name, _summary(latencies[name], errors[name]))
+            for name in names if latencies[name]
+        ),
+    }
+
+
+def main(argv=None):
+    from rednic.manage_utils import ManageUtils
+
+    parser = argparse.ArgumentParser(
+        description="load test of ManageUtils over simulated openstack"
+    )
+    parser.add_argument("--volumes", type=int, default=100000)
+    parser.add_argument("--servers", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--operations", type=int, default=5000)
+    parser.add_argument(
+        "--latency", type=float, default=0.005,
+        help="seconds of each call"
+    )
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--transition-time", type=float, default=0.5)
+    parser.add_argument("--cache-ttl", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    cloud = SimulatedCloud(
+        latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, transition_time=args.transition_time,
+        seed=args.seed
+    )
+    cloud.populate(args.volumes, args.servers)
+    manage = ManageUtils(
+        "demo", "secrete", "demo", "http://127.0.0.1:5000/v2.0",
+        cache_ttl=args.cache_ttl, clients=cloud.clients()
+    )
+    report = run_load(
+        manage, cloud, args.clients, args.operations, seed=args.seed
+    )
+    report["calls"] = cloud.calls()
+    sys.stdout.write(json.dumps(report, indent=2, sort_keys=True) + "\n")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
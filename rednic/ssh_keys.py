@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# load and cache private keys for ssh
+import os
+import threading
+from rednic import lazy
+
+# paramiko is imported on first parse of key
+paramiko = lazy.LazyModule("paramiko")
+
+# supported types of private keys in order of check,
+# some of them can be missed in paramiko
+KEY_TYPES = ("RSAKey", "ECDSAKey", "Ed25519Key", "DSSKey")
+
+# path -> (mtime, size, key)
+_keys = {}
+
+# lock for keys cache
+_lock = threading.Lock()
+
+
+def parse_private_key(key_file, password=None):
+    """ parse private key of any supported type
+
+    Args:
+        key_file: file handler for private key
+        password: password for encrypted key or None
+
+    Returns:
+        paramiko private key
+
+    Raises:
+        paramiko.SSHException: in case of unknown key type
+    """
+    start = key_file.tell() if hasattr(key_file, "seek") else None
+    error = None
+    for name in KEY_TYPES:
+        if not hasattr(paramiko, name):
+            continue
+        if error is not None:
+            if start is None:
+                break
+            key_file.seek(start)
+        key_class = getattr(paramiko, name)
+        try:
+            if password:
+                return key_class.from_private_key(key_file, password)
+            return key_class.from_private_key(key_file)
+        except paramiko.SSHException as e:
+            error = e
+    raise error
+
+
+def load_private_key(path, password=None):
+    """ load private key from file, parsed key is cached while
+    file is not changed
+
+    Args:
+        path: path to private key
+        password: password for encrypted key or None
+
+    Returns:
+        paramiko private key
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    with _lock:
+        cached = _keys.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    with open(path) as key_file:
+        key = parse_private_key(key_file, password)
+    with _lock:
+        _keys[path] = (stat.st_mtime_ns, stat.st_size, key)
+    return key
+
+
+def private_key(key, password=None):
+    """ get parsed private key from any supported source
+
+    Args:
+        key: path to private key (cached), file handler for private
+            key (closed after parse) or already parsed key
+        password: password for encrypted key or None
+
+    Returns:
+        paramiko private key
+    """
+    if isinstance(key, str):
+        return load_private_key(key, password)
+    if hasattr(key, "read"):
+        with key:
+            return parse_private_key(key, password)
+    return key
+
+
+def clear():
+    """ drop all cached keys """
+    with _lock:
+        _keys.clear()
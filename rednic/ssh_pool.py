@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pool of ssh connections to instances
+import contextlib
+import socket
+import threading
+import time
+from rednic import lazy
+
+# paramiko is imported on first ssh connection
+paramiko = lazy.LazyModule("paramiko")
+
+
+class SSHConnection(object):
+    """ Connected ssh client with usage information """
+
+    # connected paramiko.SSHClient
+    client = None
+
+    # count of current users
+    users = 0
+
+    # time of last release
+    last_used = None
+
+    # connection is broken and must be closed after last user
+    dead = False
+
+    def __init__(self, client, now):
+        self.client = client
+        self.last_used = now
+
+    def is_active(self):
+        """ check that transport is still alive """
+        transport = self.client.get_transport()
+        return bool(transport and transport.is_active())
+
+
+class SSHPool(object):
+    """ Pool of live ssh connections keyed by (host, user, key),
+    one connection is shared by all users, each command uses own
+    channel inside of connection.
+
+    Count of connections never exceeds maximum size: least recently
+    used idle connection is closed for new one, and new connection
+    waits while all connections are busy.
+    """
+
+    # maximum count of connections
+    _max_size = None
+
+    # seconds before idle connection will be closed
+    _idle_timeout = None
+
+    # function that return current time
+    _clock = None
+
+    # (host, user, key) -> SSHConnection
+    _connections = None
+
+    # lock for all operations with connections
+    _lock = None
+
+    # condition with lock for wait of free place in pool
+    _condition = None
+
+    # count of connections in progress, each one reserves place
+    _connecting = 0
+
+    def __init__(self, max_size=8, idle_timeout=60, clock=time.monotonic):
+        """ Create empty pool
+
+        Args:
+            max_size: maximum count of connections, least recently
+                used idle connection will be closed on overflow,
+                new connection waits if all connections are busy
+            idle_timeout: seconds before idle connection will be closed
+            clock: function that return current time in seconds
+        """
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._clock = clock
+        self._connections = {}
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+
+    def __key__(self, host, username, pkey):
+        """ key of connection in pool """
+        if hasattr(pkey, "get_base64"):
+            return (host, username, pkey.get_base64())
+        return (host, username, pkey)
+
+    def __connect__(self, host, username, pkey, timeout):
+        """ create new connected ssh client """
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        if timeout is None:
+            ssh.connect(host, username=username, pkey=pkey)
+        else:
+            ssh.connect(
+                host, username=username, pkey=pkey, timeout=timeout,
+                banner_timeout=timeout, auth_timeout=timeout
+            )
+        return ssh
+
+    def __sweep__(self, now, reserve=0):
+        """ drop idle connections over time limit and size limit,
+        must be called with lock
+
+        Args:
+            now: current time
+            reserve: count of places required for new connections
+
+        Returns:
+            list of connections for close
+        """
+        closed = []
+        for key, connection in list(self._connections.items()):
+            if connection.users == 0 and (
+                connection.dead or
+                connection.last_used + self._idle_timeout <= now
+            ):
+                closed.append(self._connections.pop(key))
+        idle = sorted(
+            [
+                (connection.last_used, key)
+                for key, connection in self._connections.items()
+                if connection.users == 0
+            ], key=lambda item: item[0]
+        )
+        while idle and len(self._connections) + self._connecting + \
+                reserve > self._max_size:
+            closed.append(self._connections.pop(idle.pop(0)[1]))
+        return closed
+
+    def __close__(self, connections):
+        """ close clients outside of lock """
+        for connection in connections:
+            try:
+                connection.client.close()
+            except Exception:
+                pass
+
+    def __reserve__(self, key, closed):
+        """ check that live connection for key exists or place for new
+        one is reserved, must be called with lock
+
+        Args:
+            key: key of connection in pool
+            closed: list for connections dropped from pool
+
+        Returns:
+            True if connection can be used or created
+        """
+        connection = self._connections.get(key)
+        if connection and not connection.dead and connection.is_active():
+            return True
+        if connection:
+            connection.dead = True
+        closed.extend(self.__sweep__(self._clock(), 1))
+        # broken connection for key will be replaced by new one
+        replaced = 1 if key in self._connections else 0
+        return len(self._connections) + self._connecting - replaced < \
+            self._max_size
+
+    def __acquire__(self, host, username, pkey, timeout):
+        """ get live connection from pool or create new one
+
+        Raises:
+            socket.timeout: in case when all connections are busy
+                longer than timeout
+        """
+        key = self.__key__(host, username, pkey)
+        started = time.monotonic()
+        closed = []
+        try:
+            with self._condition:
+                if not self._condition.wait_for(
+                    lambda: self.__reserve__(key, closed), timeout
+                ):
+                    raise socket.timeout(
+                        "all %d ssh connections are busy" % self._max_size
+                    )
+                connection = self._connections.get(key)
+                if connection and not connection.dead:
+                    connection.users += 1
+                    return key, connection
+                self._connecting += 1
+        finally:
+            self.__close__(closed)
+
+        if timeout is not None:
+            # connect gets only time left after wait for place
+            timeout = max(0.001, timeout - (time.monotonic() - started))
+        try:
+            client = self.__connect__(host, username, pkey, timeout)
+        except BaseException:
+            with self._condition:
+                self._connecting -= 1
+                self._condition.notify_all()
+            raise
+
+        with self._condition:
+            self._connecting -= 1
+            current = self._connections.get(key)
+            if current and not current.dead:
+                # somebody was faster
+                current.users += 1
+                duplicate = SSHConnection(client, self._clock())
+                connection = current
+            else:
+                duplicate = None
+                if current:
+                    # replace broken connection
+                    del self._connections[key]
+                    if current.users == 0:
+                        duplicate = current
+                connection = SSHConnection(client, self._clock())
+                connection.users = 1
+                self._connections[key] = connection
+            closed = self.__sweep__(self._clock())
+            self._condition.notify_all()
+        if duplicate:
+            closed.append(duplicate)
+        self.__close__(closed)
+        return key, connection
+
+    def __release__(self, key, connection, broken):
+        """ return connection to pool """
+        with self._condition:
+            connection.users -= 1
+            connection.last_used = self._clock()
+            if broken:
+                connection.dead = True
+            closed = self.__sweep__(connection.last_used)
+            if connection.dead and connection.users == 0 and \
+                    connection not in closed and \
+                    self._connections.get(key) is not connection:
+                # already replaced in pool
+                closed.append(connection)
+            # idle connection can be replaced by waiting one
+            self._condition.notify_all()
+        self.__close__(closed)
+
+    @contextlib.contextmanager
+    def connection(self, host, username, pkey, timeout=None):
+        """ get connected ssh client for host
+
+        Args:
+            host: host name or ip for connect
+            username: user name on host
+            pkey: private key for authentication
+            timeout: seconds for wait of free place in pool and
+                connect to host together, None for wait forever
+
+        Returns:
+            context manager with connected paramiko.SSHClient,
+            connection is dropped from pool if transport is broken
+            after exception
+
+        Raises:
+            socket.timeout: in case when all connections are busy
+                longer than timeout
+        """
+        key, connection = self.__acquire__(host, username, pkey, timeout)
+        broken = False
+        try:
+            yield connection.client
+        except BaseException:
+            broken = not connection.is_active()
+            raise
+        finally:
+            self.__release__(key, connection, broken)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._connections)
+
+    def close(self):
+        """ close all idle connections and mark busy as dead """
+        with self._condition:
+            closed = []
+            for key, connection in list(self._connections.items()):
+                connection.dead = True
+                if connection.users == 0:
+                    closed.append(self._connections.pop(key))
+            self._condition.notify_all()
+        self.__close__(closed)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# keystone tokens stored in local file between runs
+import json
+import logging
+import os
+import threading
+import time
+from rednic.private_file import is_private, replace_private
+
+# seconds before expire when token is not used anymore,
+# same as minimal token life in keystoneauth1
+EXPIRE_MARGIN = 120
+
+
+class TokenCache(object):
+    """ Authentication states of keystone sessions in file readable
+    only by owner, keyed by (auth_url, user, tenant)
+    """
+
+    # path to cache file
+    _path = None
+
+    # function that return current unix time
+    _clock = None
+
+    # lock for read and write of file
+    _lock = None
+
+    # logging object
+    _log = None
+
+    def __init__(self, path, clock=time.time, log=None):
+        """ Args:
+            path: path to cache file, created on first save
+            clock: function that return current unix time
+            log: logging object, can be None
+        """
+        self._path = os.path.abspath(os.path.expanduser(path))
+        self._clock = clock
+        self._lock = threading.Lock()
+        if log:
+            self._log = log
+        else:
+            self._log = logging.getLogger('rednic.token_cache')
+
+    @property
+    def path(self):
+        """ path to cache file """
+        return self._path
+
+    def __key__(self, auth_url, user, tenant):
+        """ key of token in file """
+        return json.dumps([auth_url, user, tenant])
+
+    def __read__(self):
+        """ read all tokens from file, must be called with lock
+
+        Returns:
+            dictionary key -> {"expires": unix time, "state": state},
+            empty for missed, broken or unsafe file
+        """
+        try:
+            with open(self._path) as cache_file:
+                if not is_private(os.fstat(cache_file.fileno())):
+                    self._log.warning(
+                        "token cache %s is accessible by other users, "
+                        "ignored" % self._path
+                    )
+                    return {}
+                tokens = json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self._log.warning(
+                "token cache %s is not readable: %s" % (self._path, e)
+            )
+            return {}
+        if not isinstance(tokens, dict):
+            return {}
+        return tokens
+
+    def __write__(self, tokens):
+        """ replace file by new tokens, must be called with lock """
+        def write(temp_path):
+            with open(temp_path, "w") as cache_file:
+                json.dump(tokens, cache_file)
+
+        replace_private(self._path, write)
+
+    def load(self, auth_url, user, tenant):
+        """ get stored authentication state
+
+        Returns:
+            state from keystoneauth1 plugin get_auth_state or None
+            if token is not stored or will expire soon
+        """
+        with self._lock:
+            token = self.__read__().get(self.__key__(auth_url, user, tenant))
+        if not isinstance(token, dict):
+            return None
+        if token.get("expires", 0) - EXPIRE_MARGIN <= self._clock():
+            return None
+        return token.get("state")
+
+    def save(self, auth_url, user, tenant, state, expires):
+        """ store authentication state, expired tokens of other users
+        are dropped, errors of write are only logged
+
+        Args:
+            state: result of keystoneauth1 plugin get_auth_state
+            expires: unix time of token expire
+        """
+        now = self._clock()
+        with self._lock:
+            tokens = dict(
+                (key, token) for key, token in self.__read__().items()
+                if isinstance(token, dict) and token.get("expires", 0) > now
+            )
+            tokens[self.__key__(auth_url, user, tenant)] = {
+                "expires": expires, "state": state
+            }
+            try:
+                self.__write__(tokens)
+            except OSError as e:
+                # token is still usable in this process
+                self._log.warning(
+                    "token cache %s is not writable: %s" % (self._path, e)
+                )
+
+    def drop(self, auth_url, user, tenant):
+        """ forget stored token """
+        with self._lock:
+            tokens = self.__read__()
+            if tokens.pop(self.__key__(auth_url, user, tenant), None):
+                self.__write__(tokens)
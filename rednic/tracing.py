@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# span trees of operations with remote round-trips
+import collections
+import contextlib
+import contextvars
+import json
+import threading
+import time
+
+# span in progress in current thread or task
+_span = contextvars.ContextVar("rednic_span", default=None)
+
+# kind of span for remote call
+REMOTE = "remote"
+
+# kind of span for method of ManageUtils
+OPERATION = "operation"
+
+
+class BudgetExceeded(AssertionError):
+    """
+        operation made more round-trips than allowed
+    """
+    pass
+
+
+class Span(object):
+    """ One operation or remote call with child spans """
+
+    __slots__ = (
+        "name", "kind", "start", "duration", "error", "attributes",
+        "children"
+    )
+
+    def __init__(self, name, kind, attributes=None):
+        """ Args:
+            name: name of operation or remote call
+            kind: OPERATION or REMOTE
+            attributes: dictionary with additional values
+        """
+        self.name = name
+        self.kind = kind
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+        self.attributes = attributes or {}
+        self.children = []
+
+    def walk(self):
+        """ iterate over span and all children in depth """
+        yield self
+        for child in list(self.children):
+            for span in child.walk():
+                yield span
+
+    def round_trips(self):
+        """ count of remote calls inside of span
+
+        Returns:
+            collections.Counter with "service call" keys
+        """
+        return collections.Counter(
+            span.name for span in self.walk() if span.kind == REMOTE
+        )
+
+    def to_dict(self):
+        """ span tree in dictionary format """
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": dict(self.attributes),
+            "children": [child.to_dict() for child in list(self.children)],
+        }
+
+
+def payload_size(result):
+    """ estimate size of remote call result
+
+    Returns:
+        (count of items, size in bytes or None if unknown)
+    """
+    if result is None:
+        return 0, 0
+    if isinstance(result, (bytes, bytearray, str)):
+        return 1, len(result)
+    output = getattr(result, "output", None)
+    if isinstance(output, (bytes, bytearray)):
+        return 1, len(output)
+    info = getattr(result, "_info", None)
+    if isinstance(info, dict):
+        return 1, len(json.dumps(info, default=str))
+    if isinstance(result, (list, tuple)):
+        size = 0
+        for item in result:
+            size_item = payload_size(item)[1]
+            if size_item is None:
+                return len(result), None
+            size += size_item
+        return len(result), size
+    return 1, None
+
+
+class Tracer(object):
+    """ Collect span trees of finished operations """
+
+    # finished root spans, oldest first
+    _traces = None
+
+    # lock for traces and children of spans
+    _lock = None
+
+    def __init__(self, max_traces=1000):
+        """ Args:
+            max_traces: count of kept root spans, oldest are dropped
+        """
+        self._traces = collections.deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name, kind=OPERATION, **attributes):
+        """ record span inside of current span or as new root
+
+        Args:
+            name: name of operation or remote call
+            kind: OPERATION or REMOTE
+            attributes: additional values of span
+
+        Returns:
+            context manager with Span
+        """
+        span = Span(name, kind, attributes)
+        parent = _span.get()
+        token = _span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            _span.reset(token)
+            with self._lock:
+                if parent is None:
+                    self._traces.append(span)
+                else:
+                    parent.children.append(span)
+
+    def call(self, service, call, func, /, *args, **kwargs):
+        """ call func inside of remote span with size of result
+
+        Args:
+            service: "cinder", "nova" or "ssh"
+            call: name of call like "volumes.get"
+            func: function for call
+
+        Returns:
+            result of func
+        """
+        with self.span(
+            "%s %s" % (service, call), REMOTE, service=service, call=call
+        ) as span:
+            result = func(*args, **kwargs)
+            items, size = payload_size(result)
+            span.attributes["items"] = items
+            span.attributes["bytes"] = size
+            return result
+
+    def traces(self):
+        """ list of finished root spans, oldest first """
+        with self._lock:
+            return list(self._traces)
+
+    def last(self, name=None):
+        """ last finished root span with name or any name,
+        None if there is no such span
+        """
+        for span in reversed(self.traces()):
+            if name is None or span.name == name:
+                return span
+        return None
+
+    def clear(self):
+        """ drop all finished spans """
+        with self._lock:
+            self._traces.clear()
+
+    def to_json(self, indent=None):
+        """ all finished span trees as json list """
+        return json.dumps(
+            [span.to_dict() for span in self.traces()], indent=indent
+        )
+
+
+def check_budget(span, budget):
+    """ check that operation does not make more round-trips than
+    allowed, for use in tests
+
+    Args:
+        span: root span of operation
+        budget: maximum count of all remote calls or dictionary
+            "service call" -> maximum count, calls missed in
+            dictionary are not allowed
+
+    Raises:
+        BudgetExceeded: in case of extra remote calls
+    """
+    trips = span.round_trips()
+    if isinstance(budget, int):
+        total = sum(trips.values())
+        if total > budget:
+            raise BudgetExceeded(
+                "%s made %d round-trips, budget is %d: %s" % (
+                    span.name, total, budget, dict(trips)
+                )
+            )
+        return
+    extra = dict(
+        (name, count) for name, count in trips.items()
+        if count > budget.get(name, 0)
+    )
+    if extra:
+        raise BudgetExceeded(
+            "%s exceeded round-trip budget %s with calls %s" % (
+                span.name, budget, extra
+            )
+        )
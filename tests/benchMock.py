@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# benchmarks for manage utils over mocks with injected latency
+import unittest
+import logging
+import time
+import tracemalloc
+from mock import MagicMock
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__))
+from testMock import mockCinderVolume, mockNovaInstance, unitLogger
+from testMock import patchClients
+from testRemoteExec import mockChannel, mockClient
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic import metrics
+from rednic.manage_utils import ManageUtils
+from rednic.remote_exec import remote_exec
+
+# latency of one request to cinder/nova
+LATENCY = 0.02
+
+
+class BenchMock(unittest.TestCase):
+
+    _manage_obj = None
+
+    _cinder = None
+
+    _nova = None
+
+    def setUp(self):
+        self._cinder, self._nova = patchClients(self)
+        self._manage_obj = ManageUtils(
+            "demo", "secrete", "demo",
+            "http://10.0.2.15:5000/v2.0", unitLogger
+        )
+
+    def __report__(self, name, old, new):
+        """
+            show results of benchmark
+        """
+        sys.stderr.write(
+            "\n%s: old %.3fs, new %.3fs, speedup %.1fx\n" % (
+                name, old, new, old / new
+            )
+        )
+
+    def testVolumeCreateMany(self):
+        """
+            compare create in loop with parallel create
+        """
+        def create(size, display_name, display_description):
+            time.sleep(LATENCY)
+            return mockCinderVolume(
+                id=display_name, size=size, status="creating",
+                display_name=display_name,
+                display_description=display_description
+            )
+
+        self._cinder.volumes.create = MagicMock(side_effect=create)
+        specs = [(1, "disk%d" % i, "desc") for i in range(40)]
+
+        start = time.time()
+        for spec in specs:
+            self._manage_obj.volume_create(*spec)
+        serial = time.time() - start
+
+        start = time.time()
+        results = self._manage_obj.volume_create_many(specs, max_workers=8)
+        parallel = time.time() - start
+
+        self.assertEqual(
+            [volume["name"] for volume, _ in results],
+            [spec[1] for spec in specs]
+        )
+        self.__report__("volume_create_many", serial, parallel)
+        self.assertTrue(serial / parallel > 3)
+
+    def testVolumeAttachName(self):
+        """
+            compare serial search of volume and instance with parallel
+        """
+        def slow(result):
+            def call(*args, **kwargs):
+                time.sleep(LATENCY)
+                return result
+            return call
+
+        volume = mockCinderVolume(id="vol_id", display_name="vol_name")
+        volume.attach = MagicMock()
+        instance = mockNovaInstance(id="ins_id", name="ins_name")
+        self._cinder.volumes.list = MagicMock(side_effect=slow([volume]))
+        self._cinder.volumes.get = MagicMock(side_effect=slow(volume))
+        self._nova.servers.list = MagicMock(side_effect=slow([instance]))
+
+        count = 10
+        start = time.time()
+        for _ in range(count):
+            # old way: get, search and list, attach, get
+            volume_id = self._manage_obj.volume_get(name="vol_name")["id"]
+            self._cinder.volumes.get(volume_id)
+            self._manage_obj.instance_get(name="ins_name")
+            self._manage_obj.volume_get(volume_id)
+        serial = time.time() - start
+
+        start = time.time()
+        for _ in range(count):
+            self._manage_obj.volume_attach(
+                "/some/place", vol_name="vol_name", ins_name="ins_name",
+                refresh=False
+            )
+        parallel = time.time() - start
+
+        self.__report__("volume_attach by name", serial, parallel)
+        self.assertTrue(serial / parallel > 2)
+
+    def __convert_dict__(self, volume):
+        """
+            volume description in dictionary format, as before records
+        """
+        return {
+            "id": volume.id,
+            "size": volume.size,
+            "status": volume.status,
+            "name": volume.display_name,
+            "description": volume.display_description,
+            "loaded": volume.is_loaded(),
+            "type": volume.volume_type,
+            "boot": volume.bootable,
+            "attach": volume.attachments
+        }
+
+    def __measure__(self, convert, volumes):
+        """
+            time and memory for convert of all volumes
+        """
+        start = time.time()
+        result = [convert(volume) for volume in volumes]
+        spent = time.time() - start
+        del result
+        tracemalloc.start()
+        result = [convert(volume) for volume in volumes]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        self.assertEqual(len(result), len(volumes))
+        return spent, size
+
+    def testVolumeRecords(self):
+        """
+            compare memory and time of records with dictionaries
+        """
+        volumes = [
+            mockCinderVolume(
+                id="id%d" % pos, size=pos % 100, status="available",
+                display_name="disk%d" % pos, display_description="desc",
+                volume_type="lvm", bootable="false", attachments=[]
+            ) for pos in range(50000)
+        ]
+        convert = self._manage_obj.__volume_convert__
+        dict_time, dict_size = self.__measure__(
+            self.__convert_dict__, volumes
+        )
+        record_time, record_size = self.__measure__(convert, volumes)
+        sys.stderr.write(
+            "\n50000 volumes: dict %.3fs %dKB, records %.3fs %dKB\n" % (
+                dict_time, dict_size / 1024, record_time, record_size / 1024
+            )
+        )
+        self.assertTrue(record_size < dict_size * 0.6)
+
+    def testRemoteExec(self):
+        """
+            compare read of big output with old loop over 80 bytes
+        """
+        line = b"Writing inode tables: 1/64 2/64 3/64 4/64 done\r\n"
+        output = line * (256 * 1024 // len(line)) + b"\nOK\r\n"
+
+        # old way: whole buffer is searched after each 80 bytes
+        channel = mockChannel([
+            output[pos:pos + 80] for pos in range(0, len(output), 80)
+        ])
+        start = time.time()
+        buff = b""
+        buff += channel.recv(80)
+        while buff.find(b"\nOK") == -1 and buff.find(b"\nFAIL") == -1:
+            buff += channel.recv(80)
+        old = time.time() - start
+
+        # channel returns up to 32KB for each read
+        channel = mockChannel([
+            output[pos:pos + 32768]
+            for pos in range(0, len(output), 32768)
+        ])
+        start = time.time()
+        result = remote_exec(
+            mockClient(channel), "mkfs", markers=[b"\nOK", b"\nFAIL"]
+        )
+        new = time.time() - start
+
+        self.assertEqual(result.output, buff)
+        self.__report__("remote_exec 256KB output", old, new)
+        self.assertTrue(old / new > 10)
+
+        # new way is linear, so megabytes are fine too
+        output = line * (8 * 1024 * 1024 // len(line)) + b"\nOK\r\n"
+        channel = mockChannel([
+            output[pos:pos + 32768]
+            for pos in range(0, len(output), 32768)
+        ])
+        lines = []
+        start = time.time()
+        result = remote_exec(
+            mockClient(channel), "mkfs", markers=[b"\nOK", b"\nFAIL"],
+            on_line=lines.append
+        )
+        spent = time.time() - start
+        sys.stderr.write(
+            "\nremote_exec 8MB output with lines: %.3fs\n" % spent
+        )
+        self.assertEqual(result.marker, b"\nOK")
+        self.assertEqual(len(lines), output.count(b"\n"))
+        self.assertTrue(spent < 2)
+
+    def testMetricsOverhead(self):
+        """
+            compare cost of volume_get without decorator, with disabled
+            and with enabled metrics
+        """
+        volume = mockCinderVolume(id="id")
+        self._cinder.volumes.get = lambda vol_id: volume
+        count = 100000
+        # without write of log to file
+        quiet = logging.getLogger("rednic.bench.quiet")
+        quiet.setLevel(logging.CRITICAL)
+
+        def measure(manage, func):
+            start = time.perf_counter()
+            for _ in range(count):
+                func(manage, "id")
+            return (time.perf_counter() - start) / count * 1e9
+
+        manage = ManageUtils(
+            "demo", "secrete", "demo", "http://10.0.2.15:5000/v2.0", quiet
+        )
+        plain = measure(manage, ManageUtils.volume_get.__wrapped__)
+        disabled = measure(manage, ManageUtils.volume_get)
+        manage = ManageUtils(
+            "demo", "secrete", "demo", "http://10.0.2.15:5000/v2.0", quiet,
+            metrics=metrics.MemorySink()
+        )
+        enabled = measure(manage, ManageUtils.volume_get)
+        sys.stderr.write(
+            "\nvolume_get per call: plain %.0fns, metrics disabled %.0fns, "
+            "enabled %.0fns\n" % (plain, disabled, enabled)
+        )
+        # only one attribute check and one call more
+        self.assertTrue(disabled - plain < 2000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# benchmarks for shared keystone session over local http server
+import unittest
+import tempfile
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__))
+from testSession import stubOpenstack, stubManage
+
+# latency of one request to keystone/cinder/nova
+LATENCY = 0.005
+
+# count of calls to each service
+CALLS = 20
+
+
+class BenchSession(unittest.TestCase):
+
+    def __measure__(self, stub=None, **kwargs):
+        """
+            make calls to cinder and nova with new clients
+
+        Returns:
+            (seconds for first calls, seconds for all calls,
+             stats of this run)
+        """
+        if stub is None:
+            stub = stubOpenstack(LATENCY)
+            self.addCleanup(stub.close)
+        before = stub.stats
+        manage = stubManage(stub, **kwargs)
+        start = time.time()
+        manage.volume_list()
+        manage.instance_list()
+        first = time.time() - start
+        for _ in range(CALLS - 1):
+            manage.volume_list()
+            manage.instance_list()
+        spent = time.time() - start
+        stats = stub.stats
+        for key in stats:
+            stats[key] -= before[key]
+        return first, spent, stats
+
+    def testSharedSession(self):
+        """
+            compare separate authentication with shared session
+        """
+        old_first, old_all, old_stats = self.__measure__()
+        new_first, new_all, new_stats = self.__measure__(session=True)
+        sys.stderr.write(
+            "\nshared session, first calls: old %.3fs, new %.3fs, "
+            "all calls: old %.3fs, new %.3fs\n"
+            "tokens: old %d, new %d, connections: old %d, new %d, "
+            "requests: old %d, new %d\n" % (
+                old_first, new_first, old_all, new_all,
+                old_stats["tokens"], new_stats["tokens"],
+                old_stats["connections"], new_stats["connections"],
+                old_stats["requests"], new_stats["requests"]
+            )
+        )
+        self.assertEqual(new_stats["tokens"], 1)
+        self.assertTrue(new_stats["tokens"] < old_stats["tokens"])
+        self.assertTrue(
+            new_stats["connections"] <= old_stats["connections"]
+        )
+        self.assertTrue(new_first < old_first)
+
+    def testTokenCache(self):
+        """
+            compare first calls of new run with and without token cache
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "tokens.json")
+        stub = stubOpenstack(LATENCY)
+        self.addCleanup(stub.close)
+        # previous run
+        self.__measure__(stub, token_cache=path)
+
+        old_first, _, old_stats = self.__measure__(stub, session=True)
+        new_first, _, new_stats = self.__measure__(stub, token_cache=path)
+        sys.stderr.write(
+            "\ntoken cache, first calls: old %.3fs, new %.3fs, "
+            "tokens: old %d, new %d\n" % (
+                old_first, new_first, old_stats["tokens"],
+                new_stats["tokens"]
+            )
+        )
+        self.assertEqual(new_stats["tokens"], 0)
+        self.assertTrue(new_first < old_first)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# benchmarks of client side overhead of manage utils over fakes
+# with 1k-100k items, results are json, compared with baseline:
+#   python tests/benchSuite.py --output results.json
+#   python tests/benchSuite.py --save baseline.json
+#   python tests/benchSuite.py --baseline baseline.json --threshold 0.2
+import argparse
+import json
+import logging
+import platform
+import random
+import time
+from mock import patch, MagicMock
+import cinderclient.client
+import novaclient.client
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__))
+from testMock import mockCinderVolume, mockNovaInstance
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic.manage_utils import ManageUtils, exact_regex
+
+# count of volumes and instances in tenant
+SIZES = (1000, 10000, 100000)
+
+# count of runs of each case, best time is used
+REPEAT = 5
+
+# count of lookups by name in one run
+LOOKUPS = 100
+
+# allowed slowdown against baseline
+THRESHOLD = 0.2
+
+
+class benchVolume(mockCinderVolume):
+    """
+        volume that can be attached without mocks
+    """
+
+    def attach(self, ins_id, mount_point):
+        pass
+
+
+class fakeManager(object):
+    """
+        cinder volumes or nova servers manager over list of items,
+        search by name, marker and limit are done like on server,
+        search option of nova is exact regular expression of name
+    """
+
+    def __init__(self, items, name_attr, option, to_option=None):
+        self.items = items
+        self.by_id = dict((item.id, item) for item in items)
+        self.positions = dict(
+            (item.id, pos) for pos, item in enumerate(items)
+        )
+        self.by_name = {}
+        for item in items:
+            name = getattr(item, name_attr)
+            if to_option is not None:
+                name = to_option(name)
+            self.by_name.setdefault(name, []).append(item)
+        self.option = option
+
+    def get(self, item_id):
+        return self.by_id[item_id]
+
+    def list(self, search_opts=None, marker=None, limit=None):
+        if search_opts and self.option in search_opts:
+            items = self.by_name.get(search_opts[self.option], [])
+        else:
+            items = self.items
+        start = 0
+        if marker is not None:
+            start = self.positions[marker] + 1
+        if limit is None:
+            return items[start:]
+        return items[start:start + limit]
+
+
+def create_manage(size):
+    """
+        ManageUtils over fakes with size volumes and instances
+
+    Returns:
+        (manage, volumes, instances, patches for stop)
+    """
+    volumes = [
+        benchVolume(
+            id="vol-%d" % pos, size=1, status="available",
+            display_name="volume-%d" % pos, display_description="bench",
+            volume_type="lvm", bootable="false", attachments=[]
+        ) for pos in range(size)
+    ]
+    instances = [
+        mockNovaInstance(
+            id="ins-%d" % pos, name="instance-%d" % pos, status="ACTIVE",
+            key_name="key", human_id="instance-%d" % pos,
+            networks={"private": ["10.0.0.%d" % (pos % 250)]}
+        ) for pos in range(size)
+    ]
+    cinder = MagicMock()
+    cinder.volumes = fakeManager(volumes, "display_name", "display_name")
+    nova = MagicMock()
+    nova.servers = fakeManager(instances, "name", "name", exact_regex)
+    patches = [
+        patch.object(cinderclient.client, 'Client', return_value=cinder),
+        patch.object(novaclient.client, 'Client', return_value=nova),
+    ]
+    for one in patches:
+        one.start()
+    log = logging.getLogger("rednic.bench")
+    log.setLevel(logging.CRITICAL)
+    manage = ManageUtils(
+        "demo", "secrete", "demo", "http://10.0.2.15:5000/v2.0", log
+    )
+    return manage, volumes, instances, patches
+
+
+def case_volume_list(manage, volumes, instances, names):
+    manage.volume_list()
+
+
+def case_convert_volumes(manage, volumes, instances, names):
+    convert = manage.__volume_convert__
+    for volume in volumes:
+        convert(volume)
+
+
+def case_convert_instances(manage, volumes, instances, names):
+    convert = manage.__instance_convert__
+    for instance in instances:
+        convert(instance)
+
+
+def case_volume_get_name(manage, volumes, instances, names):
+    for vol_name, _ in names:
+        manage.volume_get(name=vol_name)
+
+
+def case_instance_get_name(manage, volumes, instances, names):
+    for _, ins_name in names:
+        manage.instance_get(name=ins_name)
+
+
+def case_volume_attach_name(manage, volumes, instances, names):
+    for vol_name, ins_name in names:
+        manage.volume_attach(
+            "/dev/vdb", vol_name=vol_name, ins_name=ins_name
+        )
+
+
+# name -> (function, count of operations in one run or None
+# for size of tenant)
+CASES = {
+    "volume_list": (case_volume_list, 1),
+    "convert_volumes": (case_convert_volumes, None),
+    "convert_instances": (case_convert_instances, None),
+    "volume_get_name": (case_volume_get_name, LOOKUPS),
+    "instance_get_name": (case_instance_get_name, LOOKUPS),
+    "volume_attach_name": (case_volume_attach_name, LOOKUPS),
+}
+
+
+def run(sizes=SIZES, repeat=REPEAT, cases=None, seed=1):
+    """
+        run cases for each size
+
+    Returns:
+        dictionary "case/size" -> {"seconds": best time of run,
+        "per_op_us": microseconds for one operation}
+    """
+    results = {}
+    for size in sizes:
+        manage, volumes, instances, patches = create_manage(size)
+        try:
+            rand = random.Random(seed)
+            names = [
+                (
+                    "volume-%d" % rand.randrange(size),
+                    "instance-%d" % rand.randrange(size)
+                ) for _ in range(LOOKUPS)
+            ]
+            for name in sorted(cases or CASES):
+                func, ops = CASES[name]
+                best = None
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    func(manage, volumes, instances, names)
+                    spent = time.perf_counter() - start
+                    if best is None or spent < best:
+                        best = spent
+                results["%s/%d" % (name, size)] = {
+                    "seconds": best,
+                    "per_op_us": best / (ops or size) * 1e6,
+                }
+        finally:
+            for one in patches:
+                one.stop()
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """
+        find regressions against baseline
+
+    Returns:
+        dictionary "case/size" -> slowdown for cases slower than
+        baseline more than threshold, cases missed in baseline
+        are skipped
+    """
+    regressions = {}
+    for key, value in results.items():
+        old = baseline.get(key)
+        if not old or not old["seconds"]:
+            continue
+        slowdown = value["seconds"] / old["seconds"] - 1
+        if slowdown > threshold:
+            regressions[key] = slowdown
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="benchmarks of client side overhead of manage utils"
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(SIZES),
+        help="count of volumes and instances"
+    )
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument(
+        "--cases", nargs="+", choices=sorted(CASES), default=None
+    )
+    parser.add_argument("--output", help="file for json results")
+    parser.add_argument("--save", help="save results as baseline")
+    parser.add_argument("--baseline", help="baseline for compare")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.cases)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    for path in (args.output, args.save):
+        if path:
+            with open(path, "w") as result_file:
+                result_file.write(text + "\n")
+    if not args.output:
+        sys.stdout.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for key in sorted(regressions):
+            sys.stderr.write(
+                "regression %s: %.0f%% slower than baseline\n" % (
+                    key, regressions[key] * 100
+                )
+            )
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
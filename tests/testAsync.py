@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+import asyncio
+import threading
+import time
+from mock import MagicMock
+import cinderclient.exceptions
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__))
+from testMock import mockCinderVolume, mockNovaInstance, unitLogger
+from testMock import patchClients
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic.async_manage_utils import AsyncManageUtils
+from rednic.manage_utils import ManageExeption
+
+
+class TestAsync(unittest.TestCase):
+
+    _cinder = None
+
+    _nova = None
+
+    def setUp(self):
+        self._cinder, self._nova = patchClients(self)
+
+    def __manage__(self, **kwargs):
+        """
+            create object for tests
+        """
+        return AsyncManageUtils(
+            "demo", "secrete", "demo",
+            "http://10.0.2.15:5000/v2.0", unitLogger, **kwargs
+        )
+
+    def testCalls(self):
+        """
+            check that coroutines return results of sync calls
+        """
+        volume = mockCinderVolume(id="id", display_name="name")
+        instance = mockNovaInstance(id="ins_id", name="ins_name")
+        self._cinder.volumes.get = MagicMock(return_value=volume)
+        self._cinder.volumes.list = MagicMock(return_value=[volume])
+        self._nova.servers.list = MagicMock(return_value=[instance])
+
+        async def run():
+            async with self.__manage__() as manage:
+                by_id, by_name, listed, ins = await asyncio.gather(
+                    manage.volume_get("id"),
+                    manage.volume_get(name="name"),
+                    manage.volume_list(),
+                    manage.instance_get(name="ins_name")
+                )
+                with self.assertRaises(ManageExeption):
+                    await manage.volume_get(name="wrong")
+            return by_id, by_name, listed, ins
+
+        by_id, by_name, listed, ins = asyncio.run(run())
+        self.assertEqual(by_id["id"], "id")
+        self.assertEqual(by_name["name"], "name")
+        self.assertEqual([v["id"] for v in listed], ["id"])
+        self.assertEqual(ins["id"], "ins_id")
+        self._cinder.volumes.get.assert_called_with("id")
+
+    def testWarmup(self):
+        """
+            check that warmup authenticates clients
+        """
+        async def run():
+            async with self.__manage__() as manage:
+                await manage.warmup(["cinder"])
+
+        asyncio.run(run())
+        self._cinder.authenticate.assert_called_once_with()
+        self._nova.authenticate.assert_not_called()
+
+    def testCreateMany(self):
+        """
+            check parallel create with limited pool
+        """
+        lock = threading.Lock()
+        running = [0]
+        parallel = []
+
+        def create(size, display_name, display_description):
+            with lock:
+                running[0] += 1
+                parallel.append(running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            if size < 0:
+                raise cinderclient.exceptions.BadRequest(400)
+            return mockCinderVolume(id=display_name, size=size)
+
+        self._cinder.volumes.create = MagicMock(side_effect=create)
+
+        async def run():
+            async with self.__manage__(max_workers=4) as manage:
+                return await manage.volume_create_many(
+                    [(1, "a"), (-1, "b"), (3, "c"), (4, "d")] * 2
+                )
+
+        results = asyncio.run(run())
+        self.assertEqual(len(results), 8)
+        self.assertEqual(results[0][0]["id"], "a")
+        self.assertIsNone(results[0][1])
+        self.assertIsNone(results[1][0])
+        self.assertIsInstance(
+            results[1][1], cinderclient.exceptions.BadRequest
+        )
+        self.assertEqual(results[7][0]["size"], 4)
+        # 8 calls in 4 threads
+        self.assertEqual(len(parallel), 8)
+        self.assertLessEqual(max(parallel), 4)
+        self.assertGreater(max(parallel), 1)
+
+    def testTimeout(self):
+        """
+            check timeout and cancel of calls waiting for thread
+        """
+        def get(vol_id):
+            time.sleep(0.2)
+            return mockCinderVolume(id=vol_id)
+
+        self._cinder.volumes.get = MagicMock(side_effect=get)
+
+        async def run():
+            async with self.__manage__(max_workers=1) as manage:
+                first = asyncio.ensure_future(manage.volume_get("first"))
+                await asyncio.sleep(0.01)
+                # waits for thread busy with first call
+                with self.assertRaises(asyncio.TimeoutError):
+                    await manage.volume_get("second", timeout=0.05)
+                return await first
+
+        self.assertEqual(asyncio.run(run())["id"], "first")
+        # second call is cancelled before start
+        self._cinder.volumes.get.assert_called_once_with("first")
+
+    def testClose(self):
+        """
+            check that close does not block event loop
+        """
+        threads = []
+
+        async def run():
+            manage = self.__manage__()
+            manage.manage.close = MagicMock(
+                side_effect=lambda: threads.append(threading.current_thread())
+            )
+            await manage.close()
+
+        asyncio.run(run())
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+if __name__ == '__main__':
+    unittest.main()
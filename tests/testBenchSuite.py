@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+import json
+import tempfile
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__))
+import benchSuite
+
+
+class TestBenchSuite(unittest.TestCase):
+
+    def testRun(self):
+        """
+            check that all cases are measured for each size
+        """
+        results = benchSuite.run(sizes=[10, 20], repeat=1)
+        self.assertEqual(
+            sorted(results), sorted(
+                "%s/%d" % (name, size)
+                for name in benchSuite.CASES for size in (10, 20)
+            )
+        )
+        for value in results.values():
+            self.assertTrue(value["seconds"] > 0)
+            self.assertTrue(value["per_op_us"] > 0)
+
+    def testCompare(self):
+        """
+            check search of regressions
+        """
+        baseline = {
+            "volume_list/10": {"seconds": 1.0},
+            "volume_get_name/10": {"seconds": 1.0},
+        }
+        results = {
+            "volume_list/10": {"seconds": 1.5},
+            "volume_get_name/10": {"seconds": 1.1},
+            "instance_get_name/10": {"seconds": 9.0},
+        }
+        regressions = benchSuite.compare(results, baseline, 0.2)
+        self.assertEqual(list(regressions), ["volume_list/10"])
+        self.assertAlmostEqual(regressions["volume_list/10"], 0.5)
+
+    def testMain(self):
+        """
+            check save of baseline and exit code for regression
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, "baseline.json")
+            args = [
+                "--sizes", "10", "--repeat", "1", "--cases", "volume_list",
+                "--output", os.devnull
+            ]
+            self.assertEqual(benchSuite.main(args + ["--save", baseline]), 0)
+            with open(baseline) as baseline_file:
+                saved = json.load(baseline_file)
+            self.assertEqual(list(saved["results"]), ["volume_list/10"])
+
+            # baseline is much faster
+            saved["results"]["volume_list/10"]["seconds"] = 1e-9
+            with open(baseline, "w") as baseline_file:
+                json.dump(saved, baseline_file)
+            self.assertEqual(
+                benchSuite.main(args + ["--baseline", baseline]), 1
+            )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__))
+from testMock import fakeClock
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic.cache import TTLCache
+
+
+class TestCache(unittest.TestCase):
+
+    def testExpire(self):
+        """
+            check that value expired after ttl
+        """
+        clock = fakeClock()
+        cache = TTLCache(10, clock=clock)
+        cache.set("name", "id")
+        clock.now = 9
+        self.assertEqual(cache.get("name"), "id")
+        self.assertTrue("name" in cache)
+        clock.now = 10
+        self.assertIsNone(cache.get("name"))
+        self.assertFalse("name" in cache)
+        self.assertEqual(len(cache), 0)
+
+    def testLRU(self):
+        """
+            check that least recently used value dropped on overflow
+        """
+        cache = TTLCache(10, max_size=2)
+        cache.set("first", 1)
+        cache.set("second", 2)
+        # touch first, so second become oldest
+        self.assertEqual(cache.get("first"), 1)
+        cache.set("third", 3)
+        self.assertEqual(cache.get("first"), 1)
+        self.assertIsNone(cache.get("second"))
+        self.assertEqual(cache.get("third"), 3)
+
+    def testPop(self):
+        """
+            check drop values
+        """
+        cache = TTLCache(10)
+        cache.set("name", "id")
+        self.assertEqual(cache.pop("name"), "id")
+        self.assertEqual(cache.pop("name", "default"), "default")
+        cache.set("name", "id")
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
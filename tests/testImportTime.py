@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+import subprocess
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.abspath(__file__)) + "/.."
+
+# modules that must be imported only on first use
+HEAVY_MODULES = [
+    "cinderclient", "novaclient", "keystoneauth1", "paramiko",
+    "cryptography", "requests"
+]
+
+# maximum cumulative import time of rednic modules in microseconds,
+# import with all clients took about 500ms before
+MAX_IMPORT_US = 150000
+
+
+class TestImportTime(unittest.TestCase):
+
+    def __run__(self, code):
+        """
+            run code in new interpreter with python -X importtime
+
+        Returns:
+            (stdout, dictionary module -> cumulative import time in us)
+        """
+        process = subprocess.Popen(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True
+        )
+        out, err = process.communicate()
+        self.assertEqual(process.returncode, 0, err)
+        times = {}
+        for line in err.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            parts = line[len("import time:"):].split("|")
+            if len(parts) != 3 or not parts[1].strip().isdigit():
+                continue
+            times[parts[2].strip()] = int(parts[1])
+        return out, times
+
+    def __check_heavy__(self, times):
+        """
+            check that heavy modules are not imported
+        """
+        for module in times:
+            self.assertNotIn(module.split(".")[0], HEAVY_MODULES, module)
+
+    def testManageUtils(self):
+        """
+            check import time of manage utils
+        """
+        _, times = self.__run__("import rednic.manage_utils")
+        self.__check_heavy__(times)
+        self.assertTrue(
+            times["rednic.manage_utils"] < MAX_IMPORT_US,
+            "import took %dus" % times["rednic.manage_utils"]
+        )
+
+    def testAsyncManageUtils(self):
+        """
+            check import time of asyncio version
+        """
+        _, times = self.__run__("import rednic.async_manage_utils")
+        self.__check_heavy__(times)
+
+    def testFirstUse(self):
+        """
+            check that only used client is imported
+        """
+        out, _ = self.__run__(
+            "import sys\n"
+            "import rednic.manage_utils as manage_utils\n"
+            "manage_utils.cinder_client.Client\n"
+            "print(' '.join(sorted(set(\n"
+            "    name.split('.')[0] for name in sys.modules\n"
+            "))))\n"
+        )
+        loaded = out.split()
+        self.assertIn("cinderclient", loaded)
+        self.assertNotIn("novaclient", loaded)
+        self.assertNotIn("paramiko", loaded)
+
+if __name__ == '__main__':
+    unittest.main()
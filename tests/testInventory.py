@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+import datetime
+import os
+import stat
+import sys
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(__file__))
+from testMock import fakeClock, unitLogger
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic import simulator
+from rednic.inventory import Inventory, parse_timestamp
+from rednic.manage_utils import ManageUtils, ManageExeption
+from rednic.records import VolumeRecord, InstanceRecord
+
+
+class ignoreFilters(object):
+    """
+        manager of server that ignores filters of changes
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def list(self, search_opts=None, **kwargs):
+        return self.manager.list(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.manager, name)
+
+
+class TestInventory(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self._path = os.path.join(directory.name, "cache", "inventory.db")
+        self._cloud = simulator.SimulatedCloud(transition_time=0, seed=1)
+        self._vol_ids, self._ins_ids = self._cloud.populate(
+            volumes=20, servers=5
+        )
+
+    def __manage__(self, cloud=None, **kwargs):
+        """
+            create object for tests over simulated cloud
+        """
+        return ManageUtils(
+            "demo", "secrete", "demo", "http://10.0.2.15:5000/v2.0",
+            unitLogger, clients=(cloud or self._cloud).clients(), **kwargs
+        )
+
+    def testSaveLoad(self):
+        """
+            check snapshot of records with time of refresh
+        """
+        inventory = Inventory(self._path, clock=lambda: 1000, log=unitLogger)
+        self.assertTrue(inventory.stale)
+        self.assertFalse(inventory.save())
+        volume = VolumeRecord(
+            "vol_id", 1, "in-use", "vol", "", True, "lvm", "false",
+            [{"server_id": "ins_id", "device": "/dev/vdb"}]
+        )
+        instance = InstanceRecord(
+            "ins_id", "ins", "ACTIVE", "key", "ins", {"private": ["10.0.0.2"]}
+        )
+        mark = datetime.datetime(2016, 1, 2, 3, 4, 5, 6)
+        inventory.replace([volume], [instance], watermarks={
+            "volumes": mark, "instances": None
+        })
+        self.assertFalse(inventory.stale)
+        self.assertTrue(inventory.save())
+        self.assertEqual(
+            stat.S_IMODE(os.stat(self._path).st_mode), 0o600
+        )
+
+        loaded = Inventory(self._path, log=unitLogger)
+        self.assertTrue(loaded.load())
+        self.assertTrue(loaded.stale)
+        self.assertEqual(loaded.refreshed_at, 1000)
+        self.assertEqual(loaded.watermark("volumes"), mark)
+        self.assertIsNone(loaded.watermark("instances"))
+        self.assertEqual(loaded.volume_by_name("vol"), volume)
+        self.assertEqual(loaded.instance("ins_id"), instance)
+        self.assertFalse(loaded.wait_fresh(0))
+
+        loaded.drop_volume("vol_id")
+        self.assertIsNone(loaded.volume_by_name("vol"))
+        self.assertEqual(loaded.instances(), [instance])
+
+    def testBrokenSnapshot(self):
+        """
+            check that broken or unsafe snapshots are ignored
+        """
+        inventory = Inventory(self._path, log=unitLogger)
+        self.assertFalse(inventory.load())
+        os.makedirs(os.path.dirname(self._path))
+        with open(self._path, "w") as snapshot:
+            snapshot.write("broken")
+        os.chmod(self._path, 0o600)
+        self.assertFalse(inventory.load())
+
+        inventory.replace([VolumeRecord("vol_id", name="vol")], [])
+        self.assertTrue(inventory.save())
+        os.chmod(self._path, 0o644)
+        self.assertFalse(Inventory(self._path, log=unitLogger).load())
+
+    def testWarmStart(self):
+        """
+            check lookups from snapshot before end of revalidation
+        """
+        manage = self.__manage__(inventory=self._path)
+        manage.inventory_revalidate(wait=True)
+        self.assertFalse(manage.inventory.stale)
+        self.assertEqual(len(manage.inventory.volumes()), 20)
+        name = manage.volume_get(self._vol_ids[3])["name"]
+        ins_name = manage.instance_get(self._ins_ids[2])["name"]
+
+        # new process, lists are blocked until gate is opened
+        gate = threading.Event()
+        cloud = simulator.SimulatedCloud(
+            latency={"cinder volumes.list": 1}, sleep=lambda _: gate.wait(10),
+            transition_time=0, seed=1
+        )
+        cloud.populate(volumes=20, servers=5)
+        manage = self.__manage__(cloud, inventory=self._path)
+        volume, stale = manage.volume_lookup(name)
+        self.assertEqual(volume["id"], self._vol_ids[3])
+        self.assertTrue(stale)
+        instance, stale = manage.instance_lookup(ins_name)
+        self.assertEqual(instance["id"], self._ins_ids[2])
+        self.assertTrue(stale)
+        self.assertNotIn("cinder volumes.get", cloud.calls())
+
+        gate.set()
+        self.assertTrue(manage.inventory.wait_fresh(10))
+        # running refresh is reused, wait for save of snapshot
+        manage.inventory_revalidate(wait=True)
+        volume, stale = manage.volume_lookup(name)
+        self.assertFalse(stale)
+        # unknown name is requested from cinder
+        with self.assertRaises(ManageExeption):
+            manage.volume_lookup("missed")
+
+    def testLookupByName(self):
+        """
+            check that inventory replaces list for search by name
+        """
+        manage = self.__manage__(inventory=self._path)
+        manage.inventory_revalidate(wait=True)
+        cinder = self._cloud.cinder()
+        name = cinder.volumes.get(self._vol_ids[5]).display_name
+        lists = self._cloud.calls()["cinder volumes.list"]
+
+        self.assertEqual(manage.volume_get(name=name)["id"], self._vol_ids[5])
+        self.assertEqual(self._cloud.calls()["cinder volumes.list"], lists)
+
+        # dropped by somebody else
+        cinder.volumes.delete(self._vol_ids[5])
+        with self.assertRaises(ManageExeption):
+            manage.volume_get(name=name)
+        self.assertIsNone(manage.inventory.volume(self._vol_ids[5]))
+
+        # created by somebody else
+        volume = cinder.volumes.create(1, display_name="new")
+        self.assertEqual(manage.volume_get(name="new")["id"], volume.id)
+        self.assertEqual(manage.inventory.volume_by_name("new").id, volume.id)
+
+    def testOwnChanges(self):
+        """
+            check that own changes of volumes are stored to inventory
+        """
+        manage = self.__manage__(inventory=Inventory(log=unitLogger))
+        manage.inventory_revalidate(wait=True)
+        ins_id = self._ins_ids[0]
+
+        volume = manage.volume_create(1, "own")
+        self.assertEqual(manage.inventory.volume_by_name("own").id,
+                         volume["id"])
+        manage.volume_attach("/dev/vdb", vol_id=volume["id"], ins_id=ins_id,
+                             refresh=False)
+        self.assertEqual(
+            manage.inventory.volume(volume["id"]).status, "attaching"
+        )
+        manage.volume_detach(name="own")
+        self.assertEqual(
+            manage.inventory.volume(volume["id"]).status, "detaching"
+        )
+        manage.volume_delete(vol_id=volume["id"])
+        self.assertEqual(
+            manage.inventory.volume(volume["id"]).status, "deleting"
+        )
+        # delete is finished before sync
+        manage.inventory_sync()
+        self.assertIsNone(manage.inventory.volume(volume["id"]))
+
+    def testFailedRefresh(self):
+        """
+            check that inventory stays stale after failed refresh
+        """
+        cloud = simulator.SimulatedCloud(error_rate=1, seed=1)
+        manage = self.__manage__(cloud, inventory=Inventory(log=unitLogger))
+        with self.assertRaises(Exception):
+            manage.inventory_revalidate(wait=True)
+        self.assertTrue(manage.inventory.stale)
+        with self.assertRaises(ManageExeption):
+            self.__manage__().inventory_refresh()
+
+    def testTimestamps(self):
+        """
+            check parse of cinder and nova times
+        """
+        self.assertEqual(
+            parse_timestamp("2016-01-02T03:04:05.000006"),
+            datetime.datetime(2016, 1, 2, 3, 4, 5, 6)
+        )
+        self.assertEqual(
+            parse_timestamp("2016-01-02T03:04:05Z"),
+            datetime.datetime(2016, 1, 2, 3, 4, 5)
+        )
+        self.assertEqual(
+            parse_timestamp("2016-01-02T05:04:05+02:00"),
+            datetime.datetime(2016, 1, 2, 3, 4, 5)
+        )
+        self.assertIsNone(parse_timestamp("broken"))
+        self.assertIsNone(parse_timestamp(None))
+
+    def testSync(self):
+        """
+            check that sync receives only changes and deletions
+        """
+        clock = fakeClock(100)
+        cloud = simulator.SimulatedCloud(
+            transition_time=5, clock=clock, seed=1
+        )
+        vol_ids, ins_ids = cloud.populate(volumes=100, servers=10)
+        manage = self.__manage__(cloud, inventory=Inventory(log=unitLogger))
+        manage.inventory_revalidate(wait=True)
+        self.assertEqual(len(manage.inventory.volumes()), 100)
+        cinder = cloud.cinder()
+
+        # move watermarks after populated items
+        clock.now += 10
+        cloud.nova().servers.add_floating_ip(ins_ids[1], "172.24.4.1")
+        warm = cinder.volumes.create(1, display_name="warm")
+        manage.inventory_sync()
+
+        clock.now += 10
+        cinder.volumes.delete(vol_ids[0])
+        new = cinder.volumes.create(1, display_name="new")
+        cloud.delete_server(ins_ids[0])
+        calls = cloud.calls()
+        # warm is available now, instance with floating ip is
+        # received again as newest item
+        self.assertEqual(manage.inventory_sync(), 5)
+        # only list of changes finished by empty page
+        self.assertEqual(
+            cloud.calls()["cinder volumes.list"],
+            calls["cinder volumes.list"] + 2
+        )
+        self.assertEqual(
+            cloud.calls().get("cinder volumes.get", 0),
+            calls.get("cinder volumes.get", 0)
+        )
+        self.assertEqual(manage.inventory.volume(warm.id).status, "available")
+        self.assertEqual(manage.inventory.volume(new.id).status, "creating")
+        self.assertEqual(
+            manage.inventory.volume(vol_ids[0]).status, "deleting"
+        )
+        self.assertIsNone(manage.inventory.instance(ins_ids[0]))
+        self.assertIn(
+            "172.24.4.1", manage.inventory.instance(ins_ids[1]).networks[
+                "private"
+            ]
+        )
+
+        clock.now += 10
+        calls = cloud.calls()
+        # new is available, deleting volume is not found by id,
+        # deleted instance is received again as newest item
+        self.assertEqual(manage.inventory_sync(), 3)
+        self.assertEqual(
+            cloud.calls()["cinder volumes.list"],
+            calls["cinder volumes.list"] + 2
+        )
+        self.assertEqual(
+            cloud.calls()["cinder volumes.get"],
+            calls.get("cinder volumes.get", 0) + 1
+        )
+        self.assertEqual(manage.inventory.volume(new.id).status, "available")
+        self.assertIsNone(manage.inventory.volume(vol_ids[0]))
+        self.assertEqual(len(manage.inventory.volumes()), 101)
+        self.assertEqual(len(manage.inventory.instances()), 9)
+
+        # deleted by somebody else between syncs is dropped only by
+        # full refresh
+        cinder.volumes.delete(vol_ids[1])
+        clock.now += 10
+        manage.inventory_sync()
+        self.assertEqual(
+            manage.inventory.volume(vol_ids[1]).status, "available"
+        )
+        self.assertEqual(manage.inventory_sync(full=True), 109)
+        self.assertIsNone(manage.inventory.volume(vol_ids[1]))
+        self.assertEqual(len(manage.inventory.volumes()), 100)
+
+    def testSyncIgnoredFilter(self):
+        """
+            check that old items are skipped if server ignores filter
+        """
+        clock = fakeClock(100)
+        cloud = simulator.SimulatedCloud(
+            transition_time=0, clock=clock, seed=1
+        )
+        cloud.populate(volumes=10)
+        clients = cloud.clients()
+        clients["cinder"].volumes = ignoreFilters(clients["cinder"].volumes)
+        manage = ManageUtils(
+            "demo", "secrete", "demo", "http://10.0.2.15:5000/v2.0",
+            unitLogger, clients=clients, inventory=Inventory(log=unitLogger)
+        )
+        manage.inventory_revalidate(wait=True)
+        clock.now += 10
+        cloud.cinder().volumes.create(1, display_name="warm")
+        # populated volumes are not older than watermark
+        self.assertEqual(manage.inventory_sync(), 11)
+        clock.now += 10
+        cloud.cinder().volumes.create(1, display_name="new")
+        # warm is received again as newest item
+        self.assertEqual(manage.inventory_sync(), 2)
+        self.assertEqual(len(manage.inventory.volumes()), 12)
+
+if __name__ == '__main__':
+    unittest.main()
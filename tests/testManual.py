@@ -93,31 +93,24 @@ class TestManual(unittest.TestCase):
         self.assertEqual(volume['description'], desc)
         self.assertEqual(volume['size'], size)
 
-        count_try = 0
-        while volume and volume['status'] == "creating" and \
-                count_try < MAXWAIT:
-            time.sleep(5)
-            volume = self._manage_obj.volume_get(created['id'])
-            unitLogger.debug("Creating...")
-        self.assertTrue(count_try < MAXWAIT)
+        statuses = self._manage_obj.wait_for_volumes(
+            [created['id']], "available", timeout=MAXWAIT * 5
+        )
+        self.assertEqual(statuses[created['id']], "available")
 
-        return volume
+        return self._manage_obj.volume_get(created['id'])
 
     def __drop_volume__(self, created):
         """
             drop some volume
         """
         self._manage_obj.volume_delete(created['id'])
-        volume = self.__search_volume__(created['id'])
         # must be deleting
-        # or if we do everything very fast must be None
-        count_try = 0
-        while volume and volume['status'] == "deleting" and \
-                count_try < MAXWAIT:
-            time.sleep(5)
-            volume = self.__search_volume__(created['id'])
-            unitLogger.debug("Deleting...")
-        self.assertTrue(count_try < MAXWAIT)
+        # or if we do everything very fast must be deleted
+        statuses = self._manage_obj.wait_for_volumes(
+            [created['id']], "deleted", timeout=MAXWAIT * 5
+        )
+        self.assertEqual(statuses[created['id']], "deleted")
 
         # reget info
         volume = self.__search_volume__(created['id'])
@@ -152,18 +145,13 @@ class TestManual(unittest.TestCase):
         unitLogger.debug("testDropByName")
         created = self.__create_volume__()
         self._manage_obj.volume_delete(name=created['name'])
-        volume = self.__search_volume__(created['id'])
 
         # must be deleting
-        # or if we do everything very fast must be None
-        count_try = 0
-        while volume and volume['status'] == "deleting" and \
-                count_try < MAXWAIT:
-            time.sleep(5)
-            volume = self.__search_volume__(created['id'])
-            count_try += 1
-            unitLogger.debug("Deleting...")
-        self.assertTrue(count_try < MAXWAIT)
+        # or if we do everything very fast must be deleted
+        statuses = self._manage_obj.wait_for_volumes(
+            [created['id']], "deleted", timeout=MAXWAIT * 5
+        )
+        self.assertEqual(statuses[created['id']], "deleted")
 
         # reget info
         volume = self.__search_volume__(created['id'])
@@ -205,6 +193,10 @@ class TestManual(unittest.TestCase):
 
         # detach
         self._manage_obj.volume_detach(created['id'])
+        statuses = self._manage_obj.wait_for_volumes(
+            [created['id']], "available", timeout=MAXWAIT * 5
+        )
+        self.assertEqual(statuses[created['id']], "available")
 
         # drop
         self.__drop_volume__(created)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+from mock import patch, MagicMock, Mock
+import paramiko
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__))
+from testMock import mockCinderVolume, mockNovaInstance, unitLogger
+from testMock import mockSSHChannel, mockSSHHosts, patchClients
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic import metrics
+from rednic.manage_utils import ManageUtils, ManageExeption
+
+
+class TestMetrics(unittest.TestCase):
+
+    _cinder = None
+
+    _nova = None
+
+    def setUp(self):
+        self._cinder, self._nova = patchClients(self)
+
+    def __manage__(self, **kwargs):
+        """
+            create object for tests
+        """
+        return ManageUtils(
+            "demo", "secrete", "demo",
+            "http://10.0.2.15:5000/v2.0", unitLogger, **kwargs
+        )
+
+    def testHistogram(self):
+        """
+            check buckets of histogram
+        """
+        histogram = metrics.Histogram((0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 3.65)
+        self.assertEqual(
+            histogram.cumulative(), [(0.1, 2), (1, 3), (float("inf"), 4)]
+        )
+
+    def testDisabled(self):
+        """
+            check that clients are not wrapped without sink
+        """
+        manage = self.__manage__()
+        self.assertIs(manage._cinder, self._cinder)
+        self._cinder.volumes.list = MagicMock(return_value=[])
+        self.assertEqual(manage.volume_list(), [])
+
+    def testOperations(self):
+        """
+            check latency and calls of operations
+        """
+        sink = metrics.MemorySink()
+        manage = self.__manage__(metrics=sink)
+        volume = mockCinderVolume(id="vol_id", display_name="vol")
+        volume.attach = MagicMock()
+        instance = mockNovaInstance(id="ins_id", name="ins")
+        self._cinder.volumes.list = MagicMock(return_value=[volume])
+        self._cinder.volumes.get = MagicMock(return_value=volume)
+        self._nova.servers.list = MagicMock(return_value=[instance])
+
+        manage.volume_attach("/dev/vdc", vol_name="vol", ins_name="ins")
+        manage.volume_get("vol_id")
+        manage.volume_get("vol_id")
+        with self.assertRaises(ManageExeption):
+            manage.volume_get(name="missed")
+
+        data = sink.snapshot()
+        # volume_get inside of volume_attach is not separate operation
+        self.assertEqual(data["operations"]["volume_attach"]["count"], 1)
+        self.assertEqual(data["operations"]["volume_get"]["count"], 3)
+        self.assertEqual(data["operations"]["volume_get"]["errors"], 1)
+        self.assertEqual(data["operations"]["volume_attach"]["errors"], 0)
+        self.assertEqual(data["calls"], {
+            ("volume_attach", "cinder", "volumes.list"): 1,
+            ("volume_attach", "nova", "servers.list"): 1,
+            ("volume_attach", "cinder", "volumes.attach"): 1,
+            ("volume_attach", "cinder", "volumes.get"): 1,
+            ("volume_get", "cinder", "volumes.get"): 2,
+            # missed name, short page is followed by next page
+            ("volume_get", "cinder", "volumes.list"): 2,
+        })
+
+        # calls outside of operations
+        list(manage.iter_volumes())
+        self.assertEqual(
+            sink.snapshot()["calls"][("", "cinder", "volumes.list")], 2
+        )
+
+        sink.reset()
+        self.assertEqual(sink.snapshot(), {"operations": {}, "calls": {}})
+
+    def testThreads(self):
+        """
+            check that calls in pool are counted for outer operation
+        """
+        sink = metrics.MemorySink()
+        manage = self.__manage__(metrics=sink)
+        self._cinder.volumes.create = MagicMock(
+            side_effect=lambda size, **kwargs: mockCinderVolume(
+                id="id", size=size
+            )
+        )
+        manage.volume_create_many([(1, ), (2, ), (3, )])
+        data = sink.snapshot()
+        self.assertEqual(list(data["operations"]), ["volume_create_many"])
+        self.assertEqual(data["calls"], {
+            ("volume_create_many", "cinder", "volumes.create"): 3
+        })
+
+    def testSSH(self):
+        """
+            check count of ssh commands
+        """
+        sink = metrics.MemorySink()
+        manage = self.__manage__(metrics=sink, ssh_key=Mock(spec=[]))
+        hosts = mockSSHHosts({
+            "first": [mockSSHChannel(b"\nOK") for _ in range(2)],
+            "second": [mockSSHChannel(b"\nOK")],
+        })
+        with patch.object(paramiko, 'SSHClient', side_effect=hosts):
+            manage.volume_format("/dev/vdb", None, "username", "first")
+            manage.volume_format_many(
+                [("first", "/dev/vdc"), ("second", "/dev/vdb")],
+                None, "username"
+            )
+        self.assertEqual(sink.snapshot()["calls"], {
+            ("volume_format", "ssh", "exec"): 1,
+            ("volume_format_many", "ssh", "exec"): 2,
+        })
+
+    def testClientMethods(self):
+        """
+            check calls of client methods and warmup
+        """
+        sink = metrics.MemorySink()
+        manage = self.__manage__(metrics=sink)
+        manage.warmup(["cinder"], wait=True)
+        self._cinder.authenticate.assert_called_once_with()
+        self.assertEqual(sink.snapshot()["calls"], {
+            ("", "cinder", "authenticate"): 1
+        })
+
+    def testPrometheus(self):
+        """
+            check text exposition format
+        """
+        sink = metrics.PrometheusSink(bounds=(0.1, 1))
+        sink.observe("volume_get", 0.05, False)
+        sink.observe("volume_get", 0.5, True)
+        sink.count("volume_get", "cinder", "volumes.get")
+        sink.count('a"b', "ssh", "exec")
+        self.assertEqual(sink.exposition(), "\n".join([
+            "# HELP rednic_operation_seconds Latency of operations.",
+            "# TYPE rednic_operation_seconds histogram",
+            'rednic_operation_seconds_bucket'
+            '{operation="volume_get",le="0.1"} 1',
+            'rednic_operation_seconds_bucket'
+            '{operation="volume_get",le="1"} 2',
+            'rednic_operation_seconds_bucket'
+            '{operation="volume_get",le="+Inf"} 2',
+            'rednic_operation_seconds_sum{operation="volume_get"} 0.55',
+            'rednic_operation_seconds_count{operation="volume_get"} 2',
+            "# HELP rednic_operation_errors_total Failed operations.",
+            "# TYPE rednic_operation_errors_total counter",
+            'rednic_operation_errors_total{operation="volume_get"} 1',
+            "# HELP rednic_remote_calls_total "
+            "Calls to cinder, nova and ssh.",
+            "# TYPE rednic_remote_calls_total counter",
+            'rednic_remote_calls_total'
+            '{operation="a\\"b",service="ssh",call="exec"} 1',
+            'rednic_remote_calls_total'
+            '{operation="volume_get",service="cinder",'
+            'call="volumes.get"} 1',
+        ]) + "\n")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,16 +1,23 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import unittest
+from concurrent import futures
 import logging
 from mock import patch, MagicMock, Mock
-import cinderclient
-import novaclient
+import cinderclient.client
+import cinderclient.exceptions
+import novaclient.client
 import paramiko
+import re
+import socket
+import time
 import sys
 import os
 
 sys.path.append(os.path.dirname(__file__) + "/..")
 from rednic.manage_utils import ManageUtils, ManageExeption
+from rednic import remote_exec
+from rednic import ssh_keys
 
 unitLogger = logging.getLogger('unittest')
 unitLogger.setLevel(logging.DEBUG)
@@ -91,20 +98,127 @@ class mockCinderVolume(object):
             self.attachments = attachments
 
 
+class mockSSHChannel(object):
+    """
+        object for use as ssh channel in mocks,
+        return output by parts with delay before each part
+    """
+
+    output = None
+
+    delay = None
+
+    timeout = None
+
+    command = None
+
+    def __init__(self, output, delay=0):
+        self.output = output
+        self.delay = delay
+
+    def get_pty(self):
+        pass
+
+    def exec_command(self, command):
+        self.command = command
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def recv(self, size):
+        if self.timeout is not None and self.timeout < self.delay:
+            time.sleep(self.timeout)
+            raise socket.timeout()
+        time.sleep(self.delay)
+        chunk = self.output[:size]
+        self.output = self.output[size:]
+        return chunk
+
+    def exit_status_ready(self):
+        return not self.output
+
+    def recv_exit_status(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+class mockSSHHosts(object):
+    """
+        replace of paramiko.SSHClient with channels for each host
+    """
+
+    channels = None
+
+    def __init__(self, channels):
+        self.channels = channels
+
+    def __call__(self):
+        client = Mock()
+        hosts = self.channels
+
+        def connect(host, **kwargs):
+            if host not in hosts:
+                raise socket.error("no route to host")
+            client.get_transport.return_value.open_session = MagicMock(
+                side_effect=lambda: hosts[host].pop(0)
+            )
+
+        client.connect = MagicMock(side_effect=connect)
+        return client
+
+
+class fakeClock(object):
+    """
+        time controlled by test
+    """
+
+    def __init__(self, now=0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def patchClients(test):
+    """
+        replace cinder and nova clients by mocks until end of test
+
+    Returns:
+        (cinder mock, nova mock)
+    """
+    cinder = Mock()
+    nova = Mock()
+    for module, client in (
+        (cinderclient.client, cinder), (novaclient.client, nova)
+    ):
+        client_patch = patch.object(module, 'Client', return_value=client)
+        client_patch.start()
+        test.addCleanup(client_patch.stop)
+    return cinder, nova
+
+
 class TestMock(unittest.TestCase):
 
     _manage_obj = None
 
-    def __init_checks__(self, mock_cinder, mock_nova):
+    def __init_checks__(self, mock_cinder, mock_nova, **kwargs):
         """
             check init
         """
         # check init
         self._manage_obj = ManageUtils(
             "demo", "secrete", "demo",
-            "http://10.0.2.15:5000/v2.0", unitLogger
+            "http://10.0.2.15:5000/v2.0", unitLogger, **kwargs
         )
 
+        # clients are created on first use
+        mock_nova.assert_not_called()
+        mock_cinder.assert_not_called()
+        self.assertIs(self._manage_obj._cinder, mock_cinder.return_value)
+        self.assertIs(self._manage_obj._nova, mock_nova.return_value)
+
         # check correct calls inside
         mock_nova.assert_called_once_with(
             "2", "demo", "secrete", "demo",
@@ -127,6 +241,93 @@ class TestMock(unittest.TestCase):
             ) as mock_nova:
                 self.__init_checks__(mock_cinder, mock_nova)
 
+    def testLazyClients(self):
+        """
+            check that only used clients are created
+        """
+        will_be_cinder = Mock()
+        will_be_cinder.volumes.list = MagicMock(return_value=[])
+        with patch.object(
+            cinderclient.client, 'Client', return_value=will_be_cinder
+        ) as mock_cinder:
+            with patch.object(
+                novaclient.client, 'Client', return_value=Mock()
+            ) as mock_nova:
+                manage = ManageUtils(
+                    "demo", "secrete", "demo",
+                    "http://10.0.2.15:5000/v2.0", unitLogger
+                )
+                self.assertEqual(manage.volume_list(), [])
+                self.assertEqual(manage.volume_list(), [])
+                mock_cinder.assert_called_once_with(
+                    "1", "demo", "secrete", "demo",
+                    "http://10.0.2.15:5000/v2.0"
+                )
+                mock_nova.assert_not_called()
+
+    def testLazyClientsThreads(self):
+        """
+            check that client is created once for parallel calls
+        """
+        def slow_client(*args):
+            time.sleep(0.05)
+            return Mock()
+
+        with patch.object(
+            novaclient.client, 'Client', side_effect=slow_client
+        ) as mock_nova:
+            manage = ManageUtils(
+                "demo", "secrete", "demo",
+                "http://10.0.2.15:5000/v2.0", unitLogger
+            )
+            with futures.ThreadPoolExecutor(max_workers=8) as executor:
+                clients = list(executor.map(
+                    lambda _: manage._nova, range(8)
+                ))
+            self.assertEqual(mock_nova.call_count, 1)
+            for client in clients:
+                self.assertIs(client, clients[0])
+
+    def testWarmup(self):
+        """
+            check creation and authentication of clients in background
+        """
+        will_be_nova = Mock()
+        will_be_cinder = Mock()
+        with patch.object(
+            cinderclient.client, 'Client', return_value=will_be_cinder
+        ) as mock_cinder:
+            with patch.object(
+                novaclient.client, 'Client', return_value=will_be_nova
+            ) as mock_nova:
+                manage = ManageUtils(
+                    "demo", "secrete", "demo",
+                    "http://10.0.2.15:5000/v2.0", unitLogger
+                )
+                # only cinder
+                jobs = manage.warmup(["cinder"])
+                self.assertEqual(len(jobs), 1)
+                self.assertIsNone(jobs[0].result())
+                mock_cinder.assert_called_once()
+                will_be_cinder.authenticate.assert_called_once_with()
+                mock_nova.assert_not_called()
+
+                # all services, created cinder client is reused
+                manage.warmup(wait=True)
+                mock_cinder.assert_called_once()
+                mock_nova.assert_called_once()
+                will_be_nova.authenticate.assert_called_once_with()
+
+                # errors of authentication
+                will_be_cinder.authenticate = MagicMock(
+                    side_effect=ValueError("auth")
+                )
+                jobs = manage.warmup(["cinder"])
+                with self.assertRaises(ValueError):
+                    jobs[0].result()
+                with self.assertRaises(ValueError):
+                    manage.warmup(["cinder"], wait=True)
+
     def __compare_instance__(self, result, origin):
         """
             compare instances in result and set in mock
@@ -205,8 +406,81 @@ class TestMock(unittest.TestCase):
                     # wrong name
                     self._manage_obj.instance_get(name="id")
                 res_instance = self._manage_obj.instance_get(name="name")
-                will_be_nova.servers.list.assert_called_with()
+                will_be_nova.servers.list.assert_called_with(
+                    search_opts={"name": "^name$"},
+                    marker=None, limit=1000
+                )
+                self.__compare_instance__(res_instance, instance)
+
+    def testInstanceCache(self):
+        """
+            test for instance cache with ip operations
+        """
+        will_be_nova = Mock()
+        will_be_cinder = Mock()
+        instance = mockNovaInstance(
+            id="id", name="name", status="status",
+            key_name="key_name",  human_id="human_id",
+            networks="networks"
+        )
+        instance.add_floating_ip = MagicMock()
+        instance.remove_floating_ip = MagicMock()
+        volume = mockCinderVolume(id="vol_id", display_name="vol_name")
+        volume.attach = MagicMock()
+        with patch.object(
+            cinderclient.client, 'Client', return_value=will_be_cinder
+        ) as mock_cinder:
+            with patch.object(
+                novaclient.client, 'Client', return_value=will_be_nova
+            ) as mock_nova:
+                self.__init_checks__(mock_cinder, mock_nova, cache_ttl=60)
+                will_be_nova.servers.list = MagicMock(
+                    return_value=[instance]
+                )
+                will_be_nova.servers.get = MagicMock(
+                    return_value=instance
+                )
+
+                # first search fill cache
+                res_instance = self._manage_obj.instance_get(name="name")
+                self.__compare_instance__(res_instance, instance)
+                res_instance = self._manage_obj.instance_get(name="name")
+                self.__compare_instance__(res_instance, instance)
+                self.assertEqual(will_be_nova.servers.list.call_count, 1)
+
+                # attach by name without list and get
+                will_be_cinder.volumes.get = MagicMock(return_value=volume)
+                self._manage_obj.volume_attach(
+                    "/some/place", vol_id="vol_id", ins_name="name"
+                )
+                volume.attach.assert_called_with("id", "/some/place")
+                self._manage_obj.instance_attach_ip(
+                    "1.1.1.1", name="name"
+                )
+                instance.add_floating_ip.assert_called_with("1.1.1.1")
+                self.assertEqual(will_be_nova.servers.list.call_count, 1)
+                will_be_nova.servers.get.assert_not_called()
+
+                # cached instance is kept after change of networks
+                self._manage_obj.instance_detach_ip(
+                    "1.1.1.1", name="name"
+                )
+                instance.remove_floating_ip.assert_called_with("1.1.1.1")
+                self.assertEqual(will_be_nova.servers.list.call_count, 1)
+                will_be_nova.servers.get.assert_not_called()
+
+                # outdated networks are reloaded by id once
+                res_instance = self._manage_obj.instance_get(name="name")
                 self.__compare_instance__(res_instance, instance)
+                res_instance = self._manage_obj.instance_get(name="name")
+                will_be_nova.servers.get.assert_called_once_with("id")
+                self.assertEqual(will_be_nova.servers.list.call_count, 1)
+
+                # full cleanup
+                self._manage_obj.cache_clear()
+                self._manage_obj.instance_get(name="name")
+                self.assertEqual(will_be_nova.servers.list.call_count, 2)
+                will_be_nova.servers.get.assert_called_once_with("id")
 
     def testInstanceIpDetach(self):
         """
@@ -245,7 +519,10 @@ class TestMock(unittest.TestCase):
                 self._manage_obj.instance_detach_ip(
                     "1.1.1.1", name="name"
                 )
-                will_be_nova.servers.list.assert_called_with()
+                will_be_nova.servers.list.assert_called_with(
+                    search_opts={"name": "^name$"},
+                    marker=None, limit=1000
+                )
                 instance.remove_floating_ip.assert_called_with("1.1.1.1")
 
     def testInstanceIpAttach(self):
@@ -285,7 +562,10 @@ class TestMock(unittest.TestCase):
                 self._manage_obj.instance_attach_ip(
                     "1.1.1.1", name="name"
                 )
-                will_be_nova.servers.list.assert_called_with()
+                will_be_nova.servers.list.assert_called_with(
+                    search_opts={"name": "^name$"},
+                    marker=None, limit=1000
+                )
                 instance.add_floating_ip.assert_called_with("1.1.1.1")
 
     def testInstanceList(self):
@@ -408,6 +688,62 @@ class TestMock(unittest.TestCase):
                     "id", "/some/place"
                 )
 
+    def testVolumeAttachCalls(self):
+        """
+            check count of calls to cinder and nova for attach
+        """
+        # object that will replace volume and instance
+        instance = mockNovaInstance(id="ins_id", name="ins_name")
+        volume = mockCinderVolume(
+            id="vol_id", display_name="vol_name", status="available"
+        )
+        volume.attach = MagicMock()
+        variants = [
+            # arguments, expected calls of:
+            # volumes.get, volumes.list, servers.get, servers.list
+            ({"vol_id": "vol_id", "ins_id": "ins_id"}, (2, 0, 0, 0)),
+            ({"vol_id": "vol_id", "ins_id": "ins_id", "refresh": False},
+             (1, 0, 0, 0)),
+            ({"vol_name": "vol_name", "ins_name": "ins_name"},
+             (1, 1, 0, 1)),
+            ({"vol_name": "vol_name", "ins_name": "ins_name",
+              "refresh": False}, (0, 1, 0, 1)),
+            ({"vol_id": "vol_id", "ins_name": "ins_name",
+              "refresh": False}, (1, 0, 0, 1)),
+        ]
+        for kwargs, calls in variants:
+            will_be_cinder = Mock()
+            will_be_nova = Mock()
+            with patch.object(
+                cinderclient.client, 'Client', return_value=will_be_cinder
+            ) as mock_cinder:
+                with patch.object(
+                    novaclient.client, 'Client', return_value=will_be_nova
+                ) as mock_nova:
+                    self.__init_checks__(mock_cinder, mock_nova)
+                    will_be_cinder.volumes.get = MagicMock(
+                        return_value=volume
+                    )
+                    will_be_cinder.volumes.list = MagicMock(
+                        return_value=[volume]
+                    )
+                    will_be_nova.servers.list = MagicMock(
+                        return_value=[instance]
+                    )
+                    res_volume = self._manage_obj.volume_attach(
+                        "/some/place", **kwargs
+                    )
+                    self.__compare_volume__(res_volume, volume)
+                    volume.attach.assert_called_with(
+                        "ins_id", "/some/place"
+                    )
+                    self.assertEqual((
+                        will_be_cinder.volumes.get.call_count,
+                        will_be_cinder.volumes.list.call_count,
+                        will_be_nova.servers.get.call_count,
+                        will_be_nova.servers.list.call_count,
+                    ), calls, kwargs)
+
     def testVolumeCreate(self):
         # some objects for replace cinder and nova
         will_be_cinder = Mock()
@@ -441,6 +777,113 @@ class TestMock(unittest.TestCase):
                     size='size'
                 )
 
+    def testVolumeCreateMany(self):
+        """
+            check parallel create with error for one volume
+        """
+        # some objects for replace cinder and nova
+        will_be_cinder = Mock()
+        will_be_nova = Mock()
+
+        def create(size, display_name, display_description):
+            if size < 0:
+                raise cinderclient.exceptions.BadRequest(400)
+            return mockCinderVolume(
+                id=display_name, size=size, status="creating",
+                display_name=display_name,
+                display_description=display_description
+            )
+
+        with patch.object(
+            cinderclient.client, 'Client', return_value=will_be_cinder
+        ) as mock_cinder:
+            with patch.object(
+                novaclient.client, 'Client', return_value=will_be_nova
+            ) as mock_nova:
+                self.__init_checks__(mock_cinder, mock_nova)
+                will_be_cinder.volumes.create = MagicMock(
+                    side_effect=create
+                )
+                # real run
+                results = self._manage_obj.volume_create_many([
+                    (1, "first", "desc"), (-1, "wrong", "desc"),
+                    (3, "third"), (4, )
+                ], max_workers=2)
+                # compare calls and results
+                self.assertEqual(len(results), 4)
+                self.assertEqual(will_be_cinder.volumes.create.call_count, 4)
+                self.assertEqual(results[0][0]["name"], "first")
+                self.assertEqual(results[0][0]["size"], 1)
+                self.assertIsNone(results[0][1])
+                self.assertIsNone(results[1][0])
+                self.assertIsInstance(
+                    results[1][1], cinderclient.exceptions.BadRequest
+                )
+                self.assertEqual(results[2][0]["name"], "third")
+                self.assertIsNone(results[2][0]["description"])
+                self.assertIsNone(results[3][0]["name"])
+                self.assertEqual(results[3][0]["size"], 4)
+                self.assertEqual(self._manage_obj.volume_create_many([]), [])
+
+    def testWaitForVolumes(self):
+        """
+            check wait for several volumes with one list on each step
+        """
+        # some objects for replace cinder and nova
+        will_be_cinder = Mock()
+        will_be_nova = Mock()
+
+        def volumes(*statuses):
+            return [
+                mockCinderVolume(id="id%d" % pos, status=status)
+                for pos, status in enumerate(statuses) if status
+            ]
+
+        with patch.object(
+            cinderclient.client, 'Client', return_value=will_be_cinder
+        ) as mock_cinder:
+            with patch.object(
+                novaclient.client, 'Client', return_value=will_be_nova
+            ) as mock_nova:
+                self.__init_checks__(mock_cinder, mock_nova)
+                will_be_cinder.volumes.list = MagicMock(side_effect=[
+                    volumes("creating", "creating", "creating", "in-use"),
+                    volumes("available", "creating", "creating", "in-use"),
+                    volumes("available", "error", "creating", "in-use"),
+                    volumes("creating", "error", "available", "in-use"),
+                ])
+                # real run
+                statuses = self._manage_obj.wait_for_volumes(
+                    ["id0", "id1", "id2", "id3", "id4"], "available",
+                    interval=0
+                )
+                # one list on each step, without gets
+                self.assertEqual(will_be_cinder.volumes.list.call_count, 4)
+                will_be_cinder.volumes.get.assert_not_called()
+                self.assertEqual(statuses, {
+                    "id0": "available", "id1": "error", "id2": "available",
+                    "id3": "in-use", "id4": "deleted"
+                })
+
+                # wait for drop
+                will_be_cinder.volumes.list = MagicMock(side_effect=[
+                    volumes("deleting"), volumes()
+                ])
+                statuses = self._manage_obj.wait_for_volumes(
+                    ["id0"], "deleted", interval=0
+                )
+                self.assertEqual(statuses, {"id0": "deleted"})
+
+                # timeout
+                will_be_cinder.volumes.list = MagicMock(
+                    return_value=volumes("detaching")
+                )
+                statuses = self._manage_obj.wait_for_volumes(
+                    ["id0"], timeout=0.05, interval=0.01, max_interval=0.02
+                )
+                self.assertEqual(statuses, {"id0": "detaching"})
+                self.assertTrue(will_be_cinder.volumes.list.call_count > 1)
+
     def testVolumeGetId(self):
         """
             check get volume by id
@@ -506,7 +949,318 @@ class TestMock(unittest.TestCase):
                 )
                 # compare calls and results
                 self.__compare_volume__(res_volume, volume)
-                will_be_cinder.volumes.list.assert_called_with()
+                will_be_cinder.volumes.list.assert_called_with(
+                    search_opts={"display_name": "display_name"},
+                    marker=None, limit=1000
+                )
+
+    def testVolumeGetNameIndex(self):
+        """
+            check get volume by name with name index
+        """
+        # some objects for replace cinder and nova
+        will_be_cinder = Mock()
+        will_be_nova = Mock()
+        volume = mockCinderVolume(
+            id="id", size="size", status="status",
+            display_name="display_name",
+            display_description="display_description",
+            loaded="loaded", volume_type="volume_type",
+            bootable="bootable", attachments="attachments"
+        )
+        created = mockCinderVolume(
+            id="new_id", size="size", status="creating",
+            display_name="new_name", display_description="desc"
+        )
+        with patch.object(
+            cinderclient.client, 'Client', return_value=will_be_cinder
+        ) as mock_cinder:
+            with patch.object(
+                novaclient.client, 'Client', return_value=will_be_nova
+            ) as mock_nova:
+                self.__init_checks__(mock_cinder, mock_nova, cache_ttl=60)
+                will_be_cinder.volumes.list = MagicMock(
+                    return_value=[volume]
+                )
+                will_be_cinder.volumes.get = MagicMock(
+                    return_value=volume
+                )
+                # first search fill index from list
+                res_volume = self._manage_obj.volume_get(
+                    name="display_name"
+                )
+                self.__compare_volume__(res_volume, volume)
+                self.assertEqual(will_be_cinder.volumes.list.call_count, 1)
+                will_be_cinder.volumes.get.assert_not_called()
+
+                # second search use index and direct get
+                res_volume = self._manage_obj.volume_get(
+                    name="display_name"
+                )
+                self.__compare_volume__(res_volume, volume)
+                self.assertEqual(will_be_cinder.volumes.list.call_count, 1)
+                will_be_cinder.volumes.get.assert_called_once_with("id")
+
+                # created volume visible without list
+                will_be_cinder.volumes.create = MagicMock(
+                    return_value=created
+                )
+                self._manage_obj.volume_create("size", "new_name", "desc")
+                will_be_cinder.volumes.get = MagicMock(
+                    return_value=created
+                )
+                res_volume = self._manage_obj.volume_get(name="new_name")
+                self.__compare_volume__(res_volume, created)
+                will_be_cinder.volumes.get.assert_called_once_with("new_id")
+                self.assertEqual(will_be_cinder.volumes.list.call_count, 1)
+
+                # deleted volume dropped from index
+                will_be_cinder.volumes.delete = MagicMock()
+                self._manage_obj.volume_delete(name="new_name")
+                will_be_cinder.volumes.delete.assert_called_with(created)
+                with self.assertRaises(ManageExeption):
+                    self._manage_obj.volume_get(name="new_name")
+                # short page is followed by request of next page
+                self.assertEqual(will_be_cinder.volumes.list.call_count, 3)
+
+                # volume dropped by somebody else, fall back to list
+                will_be_cinder.volumes.get = MagicMock(
+                    side_effect=cinderclient.exceptions.NotFound(404)
+                )
+                will_be_cinder.volumes.list = MagicMock(return_value=[])
+                with self.assertRaises(ManageExeption):
+                    self._manage_obj.volume_get(name="display_name")
+                will_be_cinder.volumes.get.assert_called_once_with("id")
+                will_be_cinder.volumes.list.assert_called_once_with(
+                    search_opts={"display_name": "display_name"},
+                    marker=None, limit=1000
+                )
+
+    def testIterVolumes(self):
+        """
+            check iterate volumes and instances by pages
+        """
+        # some objects for replace cinder and nova
+        will_be_cinder = Mock()
+        will_be_nova = Mock()
+        volumes = [
+            mockCinderVolume(id="id%d" % pos, display_name="name%d" % pos)
+            for pos in range(5)
+        ]
+        instances = [
+            mockNovaInstance(id="id%d" % pos, name="name%d" % pos)
+            for pos in range(4)
+        ]
+
+        def pages(items):
+            def list_call(search_opts=None, marker=None, limit=None):
+                start = 0
+                if marker:
+                    start = [i.id for i in items].index(marker) + 1
+                return items[start:start + limit]
+            return list_call
+
+        with patch.object(
+            cinderclient.client, 'Client', return_value=will_be_cinder
+        ) as mock_cinder:
+            with patch.object(
+                novaclient.client, 'Client', return_value=will_be_nova
+            ) as mock_nova:
+                self.__init_checks__(mock_cinder, mock_nova)
+                will_be_cinder.volumes.list = MagicMock(
+                    side_effect=pages(volumes)
+                )
+                will_be_nova.servers.list = MagicMock(
+                    side_effect=pages(instances)
+                )
+                # real run
+                result = list(self._manage_obj.iter_volumes(page_size=2))
+                self.assertEqual(len(result), 5)
+                for res_volume, volume in zip(result, volumes):
+                    self.__compare_volume__(res_volume, volume)
+                self.assertEqual([
+                    call[1] for call in
+                    will_be_cinder.volumes.list.call_args_list
+                ], [
+                    {"search_opts": None, "marker": None, "limit": 2},
+                    {"search_opts": None, "marker": "id1", "limit": 2},
+                    {"search_opts": None, "marker": "id3", "limit": 2},
+                    {"search_opts": None, "marker": "id4", "limit": 2},
+                ])
+
+                # list is finished by empty page
+                result = list(self._manage_obj.iter_instances(page_size=2))
+                self.assertEqual(len(result), 4)
+                for res_instance, instance in zip(result, instances):
+                    self.__compare_instance__(res_instance, instance)
+                self.assertEqual(will_be_nova.servers.list.call_count, 3)
+
+                # search by name stops on first page
+                will_be_cinder.volumes.list.reset_mock()
+                res_volume = self._manage_obj.volume_get(name="name0")
+                self.__compare_volume__(res_volume, volumes[0])
+                will_be_cinder.volumes.list.assert_called_once_with(
+                    search_opts={"display_name": "name0"},
+                    marker=None, limit=1000
+                )
+
+                # server without support of limit, returns everything
+                will_be_cinder.volumes.list = MagicMock(
+                    return_value=volumes
+                )
+                result = list(self._manage_obj.iter_volumes(page_size=2))
+                self.assertEqual(len(result), 5)
+                will_be_cinder.volumes.list.assert_called_once_with(
+                    search_opts=None, marker=None, limit=2
+                )
+
+    def testCappedPages(self):
+        """
+            check that short page of server with own limit is not end
+        """
+        will_be_cinder = Mock()
+        will_be_nova = Mock()
+        volumes = [
+            mockCinderVolume(id="id%d" % pos, display_name="name%d" % pos)
+            for pos in range(7)
+        ]
+
+        def list_call(search_opts=None, marker=None, limit=None):
+            # server returns at most 2 items for any limit
+            start = 0
+            if marker:
+                start = [i.id for i in volumes].index(marker) + 1
+            return volumes[start:start + min(limit, 2)]
+
+        with patch.object(
+            cinderclient.client, 'Client', return_value=will_be_cinder
+        ) as mock_cinder:
+            with patch.object(
+                novaclient.client, 'Client', return_value=will_be_nova
+            ) as mock_nova:
+                self.__init_checks__(mock_cinder, mock_nova)
+                will_be_cinder.volumes.list = MagicMock(
+                    side_effect=list_call
+                )
+                result = list(self._manage_obj.iter_volumes(page_size=5))
+                self.assertEqual(
+                    [volume["id"] for volume in result],
+                    [volume.id for volume in volumes]
+                )
+                # 4 pages and empty one
+                self.assertEqual(will_be_cinder.volumes.list.call_count, 5)
+                self.assertEqual(
+                    self._manage_obj.volume_get(name="name6")["id"], "id6"
+                )
+
+    def testFind(self):
+        """
+            check search with server side filters
+        """
+        # some objects for replace cinder and nova
+        will_be_cinder = Mock()
+        will_be_nova = Mock()
+        volumes = [
+            mockCinderVolume(id="id1", display_name="disk", status="error"),
+            mockCinderVolume(
+                id="id2", display_name="disk", status="available"
+            ),
+        ]
+        instances = [
+            mockNovaInstance(id="id1", name="web", status="ACTIVE"),
+            mockNovaInstance(id="id2", name="web1", status="ACTIVE"),
+        ]
+        with patch.object(
+            cinderclient.client, 'Client', return_value=will_be_cinder
+        ) as mock_cinder:
+            with patch.object(
+                novaclient.client, 'Client', return_value=will_be_nova
+            ) as mock_nova:
+                self.__init_checks__(mock_cinder, mock_nova)
+                # server ignore status filter
+                will_be_cinder.volumes.list = MagicMock(
+                    return_value=volumes
+                )
+                # search by name is regular expression in nova
+                will_be_nova.servers.list = MagicMock(
+                    return_value=instances
+                )
+                # real run
+                result = self._manage_obj.volume_find(
+                    name="disk", status="available", all_tenants=1,
+                    bootable=True
+                )
+                self.assertEqual(len(result), 1)
+                self.__compare_volume__(result[0], volumes[1])
+                will_be_cinder.volumes.list.assert_any_call(
+                    search_opts={
+                        "display_name": "disk", "status": "available",
+                        "all_tenants": 1, "bootable": True
+                    }, marker=None, limit=1000
+                )
+                # next page after short one
+                self.assertEqual(will_be_cinder.volumes.list.call_count, 2)
+
+                result = self._manage_obj.instance_find(
+                    name="web", page_size=10
+                )
+                self.assertEqual(len(result), 1)
+                self.__compare_instance__(result[0], instances[0])
+                will_be_nova.servers.list.assert_any_call(
+                    search_opts={"name": "^web$"}, marker=None, limit=10
+                )
+
+                # exact match for instance by name
+                res_instance = self._manage_obj.instance_get(name="web")
+                self.__compare_instance__(res_instance, instances[0])
+                with self.assertRaises(ManageExeption):
+                    self._manage_obj.instance_get(name="we")
+
+    def testFindRegexName(self):
+        """
+            check that nova regular expression matches only whole name
+        """
+        will_be_cinder = Mock()
+        will_be_nova = Mock()
+        instances = [
+            mockNovaInstance(id="id1", name="dbb1", status="ACTIVE"),
+            mockNovaInstance(id="id2", name="db+1", status="ACTIVE"),
+            mockNovaInstance(id="id3", name="web1", status="ACTIVE"),
+            mockNovaInstance(id="id4", name="web(1)", status="ACTIVE"),
+            mockNovaInstance(id="id5", name="web(1)-old", status="ACTIVE"),
+        ]
+
+        def list_call(search_opts=None, marker=None, limit=None):
+            # nova checks name by re.search
+            if marker is not None:
+                return []
+            return [
+                instance for instance in instances
+                if re.search(search_opts["name"], instance.name)
+            ]
+
+        with patch.object(
+            cinderclient.client, 'Client', return_value=will_be_cinder
+        ) as mock_cinder:
+            with patch.object(
+                novaclient.client, 'Client', return_value=will_be_nova
+            ) as mock_nova:
+                self.__init_checks__(mock_cinder, mock_nova)
+                will_be_nova.servers.list = MagicMock(side_effect=list_call)
+                self.assertEqual(
+                    [ins["id"] for ins in self._manage_obj.instance_find(
+                        name="web(1)"
+                    )], ["id4"]
+                )
+                self.assertEqual(
+                    self._manage_obj.instance_get(name="db+1")["id"], "id2"
+                )
+                will_be_nova.servers.list.assert_called_with(
+                    search_opts={"name": "^db\\+1$"}, marker=None,
+                    limit=1000
+                )
+                with self.assertRaises(ManageExeption):
+                    self._manage_obj.instance_get(name="web(")
 
     def testVolumeDeleteId(self):
         """
@@ -576,9 +1330,13 @@ class TestMock(unittest.TestCase):
                 # real run
                 result = self._manage_obj.volume_delete(name="display_name")
                 self.assertEqual("Correct", result)
-                will_be_cinder.volumes.get.assert_called_with("id")
+                # volume from list is used as is
+                will_be_cinder.volumes.get.assert_not_called()
                 will_be_cinder.volumes.delete.assert_called_with(volume)
-                will_be_cinder.volumes.list.assert_called_with()
+                will_be_cinder.volumes.list.assert_called_with(
+                    search_opts={"display_name": "display_name"},
+                    marker=None, limit=1000
+                )
 
     def testVolumeDetachId(self):
         """
@@ -648,9 +1406,137 @@ class TestMock(unittest.TestCase):
                 # real run
                 result = self._manage_obj.volume_detach(name="display_name")
                 self.assertEqual("Correct", result)
-                will_be_cinder.volumes.get.assert_called_with("id")
+                # volume from list is used as is
+                will_be_cinder.volumes.get.assert_not_called()
                 will_be_cinder.volumes.detach.assert_called_with(volume)
-                will_be_cinder.volumes.list.assert_called_with()
+                will_be_cinder.volumes.list.assert_called_with(
+                    search_opts={"display_name": "display_name"},
+                    marker=None, limit=1000
+                )
+
+    def testVolumeDetachMany(self):
+        """
+            check parallel detach by ids and names
+        """
+        # some objects for replace cinder and nova
+        will_be_cinder = Mock()
+        will_be_nova = Mock()
+        first = mockCinderVolume(id="first_id", display_name="first")
+        second = mockCinderVolume(id="second_id", display_name="second")
+        with patch.object(
+            cinderclient.client, 'Client', return_value=will_be_cinder
+        ) as mock_cinder:
+            with patch.object(
+                novaclient.client, 'Client', return_value=will_be_nova
+            ) as mock_nova:
+                self.__init_checks__(mock_cinder, mock_nova)
+                will_be_cinder.volumes.list = MagicMock(
+                    return_value=[first, second]
+                )
+                will_be_cinder.volumes.detach = MagicMock(
+                    return_value="Correct"
+                )
+                # real run
+                results = self._manage_obj.volume_detach_many(
+                    vol_ids=["some_id"], names=["second", "wrong", "first"]
+                )
+                # one list for all names and no get at all
+                will_be_cinder.volumes.list.assert_any_call(
+                    search_opts=None,
+                    marker=None, limit=1000
+                )
+                self.assertEqual(will_be_cinder.volumes.list.call_count, 2)
+                will_be_cinder.volumes.get.assert_not_called()
+                self.assertEqual(len(results), 4)
+                self.assertEqual(results[0], ("Correct", None))
+                self.assertEqual(results[1], ("Correct", None))
+                self.assertIsNone(results[2][0])
+                self.assertIsInstance(results[2][1], ManageExeption)
+                self.assertEqual(results[3], ("Correct", None))
+                self.assertEqual(
+                    sorted([
+                        call[0][0] for call in
+                        will_be_cinder.volumes.detach.call_args_list
+                    ], key=str),
+                    sorted(["some_id", second, first], key=str)
+                )
+
+    def testVolumeDeleteMany(self):
+        """
+            check parallel detach and delete
+        """
+        # some objects for replace cinder and nova
+        will_be_cinder = Mock()
+        will_be_nova = Mock()
+        attached = mockCinderVolume(
+            id="attached_id", display_name="attached", status="in-use"
+        )
+        free = mockCinderVolume(
+            id="free_id", display_name="free", status="available"
+        )
+        broken = mockCinderVolume(
+            id="broken_id", display_name="broken", status="in-use"
+        )
+        statuses = {
+            "attached_id": ["detaching", "available"],
+            "broken_id": ["detaching", "error_detaching"],
+        }
+
+        def detach(volume):
+            if volume.status != "in-use":
+                raise cinderclient.exceptions.BadRequest(400)
+
+        def get(vol_id):
+            return mockCinderVolume(
+                id=vol_id, status=statuses[vol_id].pop(0)
+            )
+
+        with patch.object(
+            cinderclient.client, 'Client', return_value=will_be_cinder
+        ) as mock_cinder:
+            with patch.object(
+                novaclient.client, 'Client', return_value=will_be_nova
+            ) as mock_nova:
+                self.__init_checks__(mock_cinder, mock_nova)
+                will_be_cinder.volumes.list = MagicMock(
+                    return_value=[attached, free, broken]
+                )
+                will_be_cinder.volumes.detach = MagicMock(
+                    side_effect=detach
+                )
+                will_be_cinder.volumes.get = MagicMock(side_effect=get)
+                will_be_cinder.volumes.delete = MagicMock(
+                    return_value="Correct"
+                )
+                # real run
+                results = self._manage_obj.volume_delete_many(
+                    names=["attached", "free", "broken"], detach=True,
+                    interval=0
+                )
+                will_be_cinder.volumes.list.assert_called_once_with(
+                    search_opts=None,
+                    marker=None, limit=1000
+                )
+                self.assertEqual(results[0], ("Correct", None))
+                self.assertEqual(results[1], ("Correct", None))
+                self.assertIsNone(results[2][0])
+                self.assertIsInstance(results[2][1], ManageExeption)
+                self.assertEqual(will_be_cinder.volumes.detach.call_count, 3)
+                self.assertEqual(will_be_cinder.volumes.get.call_count, 4)
+                self.assertEqual(will_be_cinder.volumes.delete.call_count, 2)
+
+                # delete without detach
+                will_be_cinder.volumes.delete = MagicMock(
+                    return_value="Correct"
+                )
+                results = self._manage_obj.volume_delete_many(
+                    vol_ids=["attached_id"]
+                )
+                self.assertEqual(results, [("Correct", None)])
+                will_be_cinder.volumes.delete.assert_called_once_with(
+                    "attached_id"
+                )
+                self.assertEqual(will_be_cinder.volumes.detach.call_count, 3)
 
     @patch.object(novaclient.client, 'Client')
     @patch.object(cinderclient.client, 'Client')
@@ -671,7 +1557,7 @@ class TestMock(unittest.TestCase):
         channel_mock = Mock()
         channel_mock.get_pty = MagicMock()
         channel_mock.exec_command = MagicMock()
-        return_value = "*" * 160 + "RECV\nOK"
+        return_value = b"*" * 160 + b"RECV\nOK"
         channel_mock.recv = MagicMock(return_value=return_value)
         # transport mock
         transport_mock = MagicMock()
@@ -707,9 +1593,152 @@ class TestMock(unittest.TestCase):
                         "sudo /sbin/mkfs.ext4 mount_point && " +
                         "echo OK || echo FAIL"
                     )
-                    self.assertEqual(result, return_value)
+                    self.assertEqual(result, return_value.decode())
+
+                    # second format on same instance reuse connection
+                    key = open(
+                        os.path.dirname(__file__) + "/../configs/cloud.key"
+                    )
+                    self._manage_obj.volume_format(
+                        "other_point", key, "username", "ins_ip"
+                    )
+                    self.assertEqual(mock_ssh_client.call_count, 1)
+                    self.assertEqual(will_be_ssh.connect.call_count, 1)
+                    self.assertEqual(transport_mock.open_session.call_count, 2)
+                    channel_mock.exec_command.assert_called_with(
+                        "sudo /sbin/mkfs.ext4 other_point && " +
+                        "echo OK || echo FAIL"
+                    )
+                    will_be_ssh.close.assert_not_called()
+                    self._manage_obj.close()
+                    will_be_ssh.close.assert_called_once_with()
         key.close()
 
+    @patch.object(novaclient.client, 'Client')
+    @patch.object(cinderclient.client, 'Client')
+    def testVolumeFormatMany(self, mock_cinder, mock_nova):
+        """
+            test parallel format on several instances
+        """
+        self.__init_checks__(mock_cinder, mock_nova)
+        ok = b"mke2fs\r\n" * 30 + b"\nOK\r\n"
+        hosts = mockSSHHosts({
+            "first": [
+                mockSSHChannel(ok, 0.01), mockSSHChannel(ok, 0.01)
+            ],
+            "slow": [mockSSHChannel(ok, 1)],
+            "fail": [mockSSHChannel(b"error\nFAIL\r\n", 0.01)],
+        })
+        with patch.object(
+            paramiko, 'SSHClient', side_effect=hosts
+        ) as mock_ssh_client:
+            with patch.object(
+                paramiko.RSAKey, 'from_private_key', return_value="secret"
+            ):
+                start = time.time()
+                results = self._manage_obj.volume_format_many([
+                    ("first", "/dev/vdb"), ("slow", "/dev/vdb"),
+                    ("down", "/dev/vdb"), ("first", "/dev/vdc"),
+                    ("fail", "/dev/vdb"),
+                ], open(
+                    os.path.dirname(__file__) + "/../configs/cloud.key"
+                ), "username", max_parallel=5, timeout=0.3)
+                spent = time.time() - start
+                with self.assertRaises(ManageExeption):
+                    hosts.channels["slow"].append(mockSSHChannel(ok, 1))
+                    self._manage_obj.volume_format(
+                        "/dev/vdb", open(
+                            os.path.dirname(__file__) +
+                            "/../configs/cloud.key"
+                        ), "username", "slow", timeout=0.1
+                    )
+        self.assertEqual(
+            [(r["ip"], r["mount_point"], r["status"]) for r in results], [
+                ("first", "/dev/vdb", "OK"),
+                ("slow", "/dev/vdb", "timeout"),
+                ("down", "/dev/vdb", "error"),
+                ("first", "/dev/vdc", "OK"),
+                ("fail", "/dev/vdb", "FAIL"),
+            ]
+        )
+        self.assertEqual(results[0]["output"], ok.decode())
+        self.assertIsNone(results[0]["error"])
+        self.assertEqual(results[1]["output"], "")
+        self.assertIsInstance(results[2]["error"], socket.error)
+        self.assertEqual(results[4]["output"], "error\nFAIL\r\n")
+        # slow instance is limited by timeout only
+        self.assertTrue(spent < 0.9)
+        # one connection for each instance
+        self.assertEqual(mock_ssh_client.call_count, 4)
+
+    @patch.object(novaclient.client, 'Client')
+    @patch.object(cinderclient.client, 'Client')
+    def testVolumeFormatDeadline(self, mock_cinder, mock_nova):
+        """
+            check that connect and format share one timeout
+        """
+        self.__init_checks__(mock_cinder, mock_nova)
+        hosts = mockSSHHosts({"slow": [mockSSHChannel(b"\nOK")]})
+
+        def slow_client():
+            client = hosts()
+            connect = client.connect.side_effect
+
+            def slow_connect(host, **kwargs):
+                time.sleep(0.2)
+                connect(host, **kwargs)
+
+            client.connect.side_effect = slow_connect
+            return client
+
+        with patch.object(paramiko, 'SSHClient', side_effect=slow_client):
+            with patch.object(
+                remote_exec, 'remote_exec', wraps=remote_exec.remote_exec
+            ) as mock_exec:
+                self._manage_obj.volume_format(
+                    "/dev/vdb", open(
+                        os.path.dirname(__file__) + "/../configs/cloud.key"
+                    ), "username", "slow", timeout=0.3
+                )
+        # format gets only time left after connect
+        self.assertLessEqual(mock_exec.call_args[1]["timeout"], 0.1)
+
+    @patch.object(novaclient.client, 'Client')
+    @patch.object(cinderclient.client, 'Client')
+    def testVolumeFormatKey(self, mock_cinder, mock_nova):
+        """
+            test that default key is parsed once
+        """
+        ssh_keys.clear()
+        self.__init_checks__(
+            mock_cinder, mock_nova,
+            ssh_key=os.path.dirname(__file__) + "/../configs/cloud.key"
+        )
+        hosts = mockSSHHosts({
+            "host": [mockSSHChannel(b"\nOK") for _ in range(3)],
+        })
+        with patch.object(paramiko, 'SSHClient', side_effect=hosts):
+            with patch.object(
+                ssh_keys, 'parse_private_key',
+                wraps=ssh_keys.parse_private_key
+            ) as mock_parse:
+                self._manage_obj.volume_format(
+                    "/dev/vdb", None, "username", "host"
+                )
+                self._manage_obj.volume_format_many(
+                    [("host", "/dev/vdc"), ("host", "/dev/vdd")],
+                    None, "username"
+                )
+                self.assertEqual(mock_parse.call_count, 1)
+        # without default key
+        mock_cinder.reset_mock()
+        mock_nova.reset_mock()
+        self.__init_checks__(mock_cinder, mock_nova)
+        with self.assertRaises(ManageExeption):
+            self._manage_obj.volume_format(
+                "/dev/vdb", None, "username", "host"
+            )
+
     def testVolumeList(self):
         """
             test list call
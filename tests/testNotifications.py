@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+import json
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__))
+from testMock import fakeClock, unitLogger
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic import notifications
+from rednic import simulator
+from rednic.inventory import Inventory
+from rednic.manage_utils import ManageUtils
+from rednic.records import VolumeRecord
+
+
+class TestNotifications(unittest.TestCase):
+
+    def setUp(self):
+        self._inventory = Inventory(log=unitLogger)
+        self._changes = []
+        self._listener = notifications.NotificationListener(
+            self._inventory, notifications.MemoryBroker().consumer(),
+            lambda *change: self._changes.append(change), unitLogger
+        )
+
+    def testParse(self):
+        """
+            check messages with and without envelope
+        """
+        body = notifications.notification(
+            "volume.create.end", {"volume_id": "vol_id"}
+        )
+        self.assertEqual(
+            notifications.parse(body),
+            ("volume.create.end", {"volume_id": "vol_id"})
+        )
+        self.assertEqual(
+            notifications.parse(body.encode("utf-8")),
+            ("volume.create.end", {"volume_id": "vol_id"})
+        )
+        self.assertEqual(
+            notifications.parse(json.loads(json.loads(body)["oslo.message"])),
+            ("volume.create.end", {"volume_id": "vol_id"})
+        )
+        self.assertEqual(notifications.parse({"event": 1}), (None, None))
+
+    def testVolumeEvents(self):
+        """
+            check update of volumes in inventory
+        """
+        self._inventory.put_volume(VolumeRecord(
+            "vol_id", 1, "available", "vol", "description", True, "lvm"
+        ))
+        self.assertTrue(self._listener.handle(notifications.notification(
+            "volume.attach.end", {
+                "volume_id": "vol_id", "status": "in-use",
+                "display_name": "vol", "size": 1,
+                "volume_attachment": [{"instance_uuid": "ins_id"}]
+            }
+        )))
+        volume = self._inventory.volume("vol_id")
+        self.assertEqual(volume.status, "in-use")
+        self.assertEqual(volume.attach, [{"instance_uuid": "ins_id"}])
+        # values missed in payload are kept
+        self.assertEqual(volume.description, "description")
+        kind, old, new = self._changes[-1]
+        self.assertEqual(kind, "volumes")
+        self.assertEqual(old.status, "available")
+        self.assertIs(new, volume)
+
+        self.assertTrue(self._listener.handle(notifications.notification(
+            "volume.delete.end", {"volume_id": "vol_id"}
+        )))
+        self.assertIsNone(self._inventory.volume("vol_id"))
+        self.assertIsNone(self._changes[-1][2])
+        self.assertEqual(self._listener.sequence(), 2)
+
+    def testInstanceEvents(self):
+        """
+            check update of instances in inventory
+        """
+        self.assertTrue(self._listener.handle(notifications.notification(
+            "compute.instance.create.end", {
+                "instance_id": "ins_id", "display_name": "ins",
+                "state": "active", "fixed_ips": [{
+                    "label": "private", "address": "10.0.0.2",
+                    "floating_ips": [{"address": "172.24.4.1"}]
+                }]
+            }
+        )))
+        instance = self._inventory.instance_by_name("ins")
+        self.assertEqual(instance.status, "ACTIVE")
+        self.assertEqual(
+            instance.networks, {"private": ["10.0.0.2", "172.24.4.1"]}
+        )
+        self._listener.handle(notifications.notification(
+            "compute.instance.power_off.end", {
+                "instance_id": "ins_id", "state": "stopped"
+            }
+        ))
+        instance = self._inventory.instance("ins_id")
+        self.assertEqual(instance.status, "SHUTOFF")
+        self.assertEqual(instance.name, "ins")
+        self.assertEqual(instance.networks["private"][0], "10.0.0.2")
+
+        self._listener.handle(notifications.notification(
+            "compute.instance.delete.end", {
+                "instance_id": "ins_id", "state": "deleted"
+            }
+        ))
+        self.assertIsNone(self._inventory.instance("ins_id"))
+
+    def testWrongMessages(self):
+        """
+            check that wrong and unknown messages are skipped
+        """
+        self.assertFalse(self._listener.handle("broken"))
+        self.assertFalse(self._listener.handle(notifications.notification(
+            "image.upload", {"id": "image_id"}
+        )))
+        self.assertFalse(self._listener.handle(notifications.notification(
+            "volume.create.end", {"size": 1}
+        )))
+        self.assertEqual(self._listener.sequence(), 0)
+        self.assertEqual(self._changes, [])
+
+    def testListener(self):
+        """
+            check background consume of messages from broker
+        """
+        broker = notifications.MemoryBroker()
+        listener = notifications.NotificationListener(
+            self._inventory, broker.consumer(), log=unitLogger
+        )
+        listener.start()
+        self.addCleanup(listener.stop)
+        self.assertTrue(listener.running)
+        since = listener.sequence()
+        broker.publish("volume.create.end", {
+            "volume_id": "vol_id", "status": "available"
+        })
+        self.assertTrue(listener.wait(["vol_id"], since, 10))
+        self.assertEqual(self._inventory.volume("vol_id").status, "available")
+        self.assertFalse(listener.wait(["other"], since, 0))
+        listener.stop()
+        self.assertFalse(listener.running)
+
+    def testForgetChanges(self):
+        """
+            check that only limited count of changes is remembered
+        """
+        listener = notifications.NotificationListener(
+            self._inventory, notifications.MemoryBroker().consumer(),
+            log=unitLogger, max_changes=2
+        )
+        for vol_id in ("first", "second", "first", "third"):
+            listener.handle(notifications.notification(
+                "volume.create.end", {"volume_id": vol_id}
+            ))
+        self.assertEqual(listener.sequence(), 4)
+        self.assertEqual(list(listener._changed), ["first", "third"])
+        # second is forgotten, so old waiter is woken at once
+        self.assertTrue(listener.wait(["other"], 1, 0))
+        self.assertTrue(listener.wait(["first"], 2, 0))
+        self.assertFalse(listener.wait(["second"], 2, 0))
+        self.assertFalse(listener.wait(["third"], 4, 0))
+
+    def testWaitForVolumes(self):
+        """
+            check that waiters are woken by notification
+        """
+        clock = fakeClock(100)
+        cloud = simulator.SimulatedCloud(
+            transition_time=5, clock=clock, seed=1
+        )
+        broker = notifications.MemoryBroker()
+        manage = ManageUtils(
+            "demo", "secrete", "demo", "http://10.0.2.15:5000/v2.0",
+            unitLogger, clients=cloud.clients(),
+            notifications=broker.consumer()
+        )
+        self.addCleanup(manage.close)
+        manage.inventory_revalidate(wait=True)
+        volume = manage.volume_create(1, "vol")
+        result = {}
+
+        def wait():
+            result.update(manage.wait_for_volumes(
+                [volume["id"]], timeout=60, interval=30
+            ))
+
+        lists = cloud.calls()["cinder volumes.list"]
+        waiter = threading.Thread(target=wait)
+        start = time.time()
+        waiter.start()
+        # first check is done, next one is planned after interval
+        while cloud.calls()["cinder volumes.list"] == lists:
+            time.sleep(0.01)
+        # volume is ready, but nobody knows
+        clock.now += 5
+        broker.publish("volume.create.end", {
+            "volume_id": volume["id"], "status": "available",
+            "display_name": "vol", "size": 1
+        })
+        waiter.join(30)
+        self.assertLess(time.time() - start, 10)
+        self.assertEqual(result, {volume["id"]: "available"})
+        self.assertEqual(
+            manage.inventory.volume(volume["id"]).status, "available"
+        )
+
+    def testCaches(self):
+        """
+            check that changed names are dropped from caches
+        """
+        cloud = simulator.SimulatedCloud(transition_time=0, seed=1)
+        vol_ids, _ = cloud.populate(volumes=1)
+        manage = ManageUtils(
+            "demo", "secrete", "demo", "http://10.0.2.15:5000/v2.0",
+            unitLogger, clients=cloud.clients(), cache_ttl=60,
+            notifications=notifications.MemoryBroker().consumer()
+        )
+        self.addCleanup(manage.close)
+        manage.inventory_revalidate(wait=True)
+        name = manage.volume_get(vol_ids[0])["name"]
+        manage._volume_index.set(name, vol_ids[0])
+        manage.listener.handle(notifications.notification(
+            "volume.update.end", {
+                "volume_id": vol_ids[0], "display_name": "renamed"
+            }
+        ))
+        self.assertNotIn(name, manage._volume_index)
+        self.assertEqual(manage.inventory.volume_by_name("renamed").id,
+                         vol_ids[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+import os
+import stat
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic.private_file import is_private, replace_private
+
+
+class TestPrivateFile(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self._path = os.path.join(directory.name, "private", "file")
+
+    def __write__(self, data):
+        def write(temp_path):
+            with open(temp_path, "w") as temp_file:
+                temp_file.write(data)
+        return write
+
+    def testReplace(self):
+        """
+            check that file and directory are created readable only by
+            owner and replaced by new content
+        """
+        replace_private(self._path, self.__write__("old"))
+        self.assertEqual(stat.S_IMODE(os.stat(self._path).st_mode), 0o600)
+        self.assertEqual(
+            stat.S_IMODE(os.stat(os.path.dirname(self._path)).st_mode),
+            0o700
+        )
+        self.assertTrue(is_private(os.stat(self._path)))
+
+        replace_private(self._path, self.__write__("new"))
+        with open(self._path) as result:
+            self.assertEqual(result.read(), "new")
+        self.assertEqual(os.listdir(os.path.dirname(self._path)), ["file"])
+
+        os.chmod(self._path, 0o640)
+        self.assertFalse(is_private(os.stat(self._path)))
+
+    def testFailedWrite(self):
+        """
+            check that old file is kept and temporary file is removed
+            on error of write
+        """
+        replace_private(self._path, self.__write__("old"))
+
+        def broken(temp_path):
+            self.__write__("partial")(temp_path)
+            raise OSError("no space left on device")
+
+        with self.assertRaises(OSError):
+            replace_private(self._path, broken)
+        with open(self._path) as result:
+            self.assertEqual(result.read(), "old")
+        self.assertEqual(os.listdir(os.path.dirname(self._path)), ["file"])
+
+
+if __name__ == '__main__':
+    unittest.main()
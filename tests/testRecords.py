@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+import json
+import pickle
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic.records import VolumeRecord, InstanceRecord
+
+
+class TestRecords(unittest.TestCase):
+
+    def testDictAccess(self):
+        """
+            check that record can be used as dictionary
+        """
+        volume = VolumeRecord(
+            "id", 1, "available", "name", "desc", True, "type", False, []
+        )
+        self.assertEqual(volume["id"], "id")
+        self.assertEqual(volume["attach"], [])
+        self.assertEqual(volume.size, 1)
+        self.assertEqual(volume.get("name"), "name")
+        self.assertEqual(volume.get("wrong", "default"), "default")
+        self.assertTrue("status" in volume)
+        self.assertFalse("keys" in volume)
+        with self.assertRaises(KeyError):
+            volume["keys"]
+        with self.assertRaises(KeyError):
+            volume["wrong"] = 1
+        volume["status"] = "in-use"
+        self.assertEqual(volume.status, "in-use")
+        self.assertEqual(len(volume), 9)
+        self.assertEqual(list(volume), [
+            "id", "size", "status", "name", "description", "loaded",
+            "type", "boot", "attach"
+        ])
+        self.assertEqual(dict(volume), volume.to_dict())
+        self.assertEqual(volume.to_dict(), {
+            "id": "id", "size": 1, "status": "in-use", "name": "name",
+            "description": "desc", "loaded": True, "type": "type",
+            "boot": False, "attach": []
+        })
+
+    def testCopyUpdate(self):
+        """
+            check dictionary methods that return or change values
+        """
+        volume = VolumeRecord("id", 1, "available", "name")
+        copy = volume.copy()
+        self.assertEqual(copy, volume)
+        self.assertIsNot(copy, volume)
+        copy.update({"status": "in-use"}, size=2)
+        copy.update([("id", "other"), ("name", "other")])
+        self.assertEqual(
+            (copy.id, copy.size, copy.status, copy.name),
+            ("other", 2, "in-use", "other")
+        )
+        self.assertEqual(volume.status, "available")
+        with self.assertRaises(KeyError):
+            copy.update(wrong=1)
+        # not a dict, real dictionary is required for json
+        self.assertNotIsInstance(volume, dict)
+        with self.assertRaises(TypeError):
+            json.dumps(volume)
+        self.assertEqual(
+            json.loads(json.dumps(volume.to_dict())), volume.to_dict()
+        )
+
+    def testCompare(self):
+        """
+            check compare with records and dictionaries
+        """
+        instance = InstanceRecord(id="id", name="name")
+        self.assertEqual(instance, {
+            "id": "id", "name": "name", "status": None, "key_name": None,
+            "human_id": None, "networks": None
+        })
+        self.assertEqual(instance, InstanceRecord("id", "name"))
+        self.assertNotEqual(instance, InstanceRecord("id", "other"))
+        self.assertNotEqual(instance, VolumeRecord("id"))
+        self.assertFalse(hasattr(instance, "__dict__"))
+
+    def testPickle(self):
+        """
+            check save and load
+        """
+        volume = VolumeRecord("id", 1, "available")
+        self.assertEqual(pickle.loads(pickle.dumps(volume)), volume)
+        self.assertTrue(repr(volume).startswith("VolumeRecord("))
+
+if __name__ == '__main__':
+    unittest.main()
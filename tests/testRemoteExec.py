@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+from mock import MagicMock
+import socket
+import sys
+import time
+import os
+
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic.remote_exec import remote_exec
+
+
+class mockChannel(object):
+    """
+        ssh channel that return prepared chunks of output,
+        socket.timeout is raised for None in chunks
+    """
+
+    chunks = None
+
+    timeout = None
+
+    command = None
+
+    pty = False
+
+    closed = False
+
+    def __init__(self, chunks, exit_status=None):
+        self.chunks = list(chunks)
+        self.exit_status = exit_status
+
+    def get_pty(self):
+        self.pty = True
+
+    def exec_command(self, command):
+        self.command = command
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def recv(self, size):
+        if not self.chunks:
+            return b""
+        chunk = self.chunks.pop(0)
+        if chunk is None:
+            raise socket.timeout()
+        return chunk
+
+    def exit_status_ready(self):
+        return self.exit_status is not None and not self.chunks
+
+    def recv_exit_status(self):
+        return self.exit_status
+
+    def close(self):
+        self.closed = True
+
+
+def mockClient(channel):
+    """
+        ssh client with one channel
+    """
+    client = MagicMock()
+    client.get_transport.return_value.open_session.return_value = channel
+    return client
+
+
+class TestRemoteExec(unittest.TestCase):
+
+    def testMarkers(self):
+        """
+            check stop on marker split between chunks
+        """
+        channel = mockChannel([b"line 1\r\nline 2\r\n", b"O", b"K\r\n", b"x"])
+        lines = []
+        result = remote_exec(
+            mockClient(channel), "ls", markers=["\nFAIL", b"\nOK"],
+            on_line=lines.append
+        )
+        self.assertEqual(result.marker, b"\nOK")
+        self.assertEqual(result.output, b"line 1\r\nline 2\r\nOK\r\n")
+        self.assertEqual(result.text, "line 1\r\nline 2\r\nOK\r\n")
+        self.assertFalse(result.timed_out)
+        self.assertIsNone(result.exit_status)
+        self.assertEqual(lines, [b"line 1", b"line 2", b"OK"])
+        self.assertEqual(channel.command, "ls")
+        self.assertTrue(channel.pty)
+        self.assertTrue(channel.closed)
+        # rest of output is not read
+        self.assertEqual(channel.chunks, [b"x"])
+
+    def testExitStatus(self):
+        """
+            check read until end of output
+        """
+        channel = mockChannel([b"first\nsec", b"ond\nlast"], exit_status=3)
+        lines = []
+        result = remote_exec(
+            mockClient(channel), "ls", on_line=lines.append, get_pty=False
+        )
+        self.assertIsNone(result.marker)
+        self.assertEqual(result.exit_status, 3)
+        self.assertEqual(result.output, b"first\nsecond\nlast")
+        self.assertEqual(lines, [b"first", b"second", b"last"])
+        self.assertFalse(channel.pty)
+
+    def testTimeout(self):
+        """
+            check stop on deadline
+        """
+        channel = mockChannel([b"partial", None, b"\nOK"])
+        result = remote_exec(
+            mockClient(channel), "ls", markers=[b"\nOK"], timeout=5
+        )
+        self.assertTrue(result.timed_out)
+        self.assertIsNone(result.marker)
+        self.assertEqual(result.output, b"partial")
+        self.assertTrue(0 < channel.timeout <= 5)
+        self.assertTrue(channel.closed)
+
+    def testTimeoutStreaming(self):
+        """
+            check stop on deadline while output keeps arriving
+        """
+        class streamChannel(mockChannel):
+            def recv(self, size):
+                time.sleep(0.01)
+                return b"line\n"
+
+        channel = streamChannel([])
+        start = time.time()
+        result = remote_exec(
+            mockClient(channel), "mkfs", markers=[b"\nOK"], timeout=0.2
+        )
+        self.assertLess(time.time() - start, 1)
+        self.assertTrue(result.timed_out)
+        self.assertIsNone(result.marker)
+        self.assertTrue(result.output.startswith(b"line\n"))
+        self.assertTrue(channel.closed)
+
+if __name__ == '__main__':
+    unittest.main()
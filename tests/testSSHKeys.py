@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+from mock import patch
+import paramiko
+import tempfile
+import shutil
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic import ssh_keys
+
+KEY_PATH = os.path.dirname(__file__) + "/../configs/cloud.key"
+
+
+class TestSSHKeys(unittest.TestCase):
+
+    _dir = None
+
+    def setUp(self):
+        ssh_keys.clear()
+        self._dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self._dir)
+
+    def testCache(self):
+        """
+            check that key is parsed once while file is not changed
+        """
+        path = os.path.join(self._dir, "key")
+        shutil.copy(KEY_PATH, path)
+        with patch.object(
+            ssh_keys, 'parse_private_key', wraps=ssh_keys.parse_private_key
+        ) as mock_parse:
+            first = ssh_keys.private_key(path)
+            self.assertIsInstance(first, paramiko.RSAKey)
+            self.assertIs(ssh_keys.private_key(path), first)
+            self.assertEqual(mock_parse.call_count, 1)
+            # file changed
+            os.utime(path, ns=(0, 0))
+            second = ssh_keys.private_key(path)
+            self.assertIsNot(second, first)
+            self.assertEqual(second, first)
+            self.assertEqual(mock_parse.call_count, 2)
+
+    def testTypes(self):
+        """
+            check load of not rsa keys and other sources
+        """
+        key = paramiko.ECDSAKey.generate()
+        path = os.path.join(self._dir, "ecdsa")
+        key.write_private_key_file(path)
+        loaded = ssh_keys.private_key(path)
+        self.assertIsInstance(loaded, paramiko.ECDSAKey)
+        self.assertEqual(loaded.get_base64(), key.get_base64())
+        # file handler is closed after parse
+        key_file = open(path)
+        loaded = ssh_keys.private_key(key_file)
+        self.assertEqual(loaded.get_base64(), key.get_base64())
+        self.assertTrue(key_file.closed)
+        # parsed key is used as is
+        self.assertIs(ssh_keys.private_key(key), key)
+
+    def testWrongKey(self):
+        """
+            check error for unknown key
+        """
+        path = os.path.join(self._dir, "wrong")
+        with open(path, "w") as key_file:
+            key_file.write("not a key")
+        with self.assertRaises(paramiko.SSHException):
+            ssh_keys.private_key(path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+from mock import patch, MagicMock
+import paramiko
+import socket
+import sys
+import threading
+import os
+
+sys.path.append(os.path.dirname(__file__))
+from testMock import fakeClock
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic.ssh_pool import SSHPool
+
+
+class mockSSHClient(object):
+    """
+        object for use as ssh client in mocks
+    """
+
+    active = True
+
+    closed = False
+
+    connected = None
+
+    def __init__(self):
+        self.set_missing_host_key_policy = MagicMock()
+        self.transport = MagicMock()
+        self.transport.is_active = lambda: self.active
+
+    def connect(self, host, username=None, pkey=None, **kwargs):
+        self.connected = (host, username, pkey)
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.closed = True
+
+
+class TestSSHPool(unittest.TestCase):
+
+    def setUp(self):
+        self.clients = []
+
+        def create():
+            client = mockSSHClient()
+            self.clients.append(client)
+            return client
+
+        ssh_patch = patch.object(paramiko, 'SSHClient', side_effect=create)
+        ssh_patch.start()
+        self.addCleanup(ssh_patch.stop)
+
+    def testReuse(self):
+        """
+            check that connection is reused for same host, user and key
+        """
+        pool = SSHPool()
+        with pool.connection("host", "user", "key") as first:
+            self.assertEqual(first.connected, ("host", "user", "key"))
+            # shared by parallel users
+            with pool.connection("host", "user", "key") as second:
+                self.assertIs(first, second)
+        with pool.connection("host", "user", "key") as third:
+            self.assertIs(first, third)
+        with pool.connection("host", "other", "key") as other:
+            self.assertIsNot(first, other)
+        with pool.connection("other", "user", "key") as other:
+            self.assertIsNot(first, other)
+        self.assertEqual(len(self.clients), 3)
+        self.assertEqual(len(pool), 3)
+        pool.close()
+        self.assertEqual(len(pool), 0)
+        self.assertTrue(all(client.closed for client in self.clients))
+
+    def testIdle(self):
+        """
+            check close of idle connections
+        """
+        clock = fakeClock()
+        pool = SSHPool(idle_timeout=10, clock=clock)
+        with pool.connection("host", "user", "key") as first:
+            pass
+        clock.now = 20
+        with pool.connection("other", "user", "key"):
+            pass
+        self.assertTrue(first.closed)
+        self.assertEqual(len(pool), 1)
+        with pool.connection("host", "user", "key") as second:
+            self.assertIsNot(first, second)
+
+    def testMaxSize(self):
+        """
+            check close of least recently used idle connection
+        """
+        clock = fakeClock()
+        pool = SSHPool(max_size=2, clock=clock)
+        with pool.connection("first", "user", "key") as first:
+            pass
+        clock.now = 1
+        with pool.connection("second", "user", "key") as second:
+            clock.now = 2
+            with pool.connection("third", "user", "key") as third:
+                # first is idle and oldest
+                self.assertTrue(first.closed)
+                clock.now = 3
+                # everything busy, limit is never exceeded
+                with self.assertRaises(socket.timeout):
+                    with pool.connection("fourth", "user", "key", 0.01):
+                        pass
+                self.assertEqual(len(pool), 2)
+        self.assertEqual(len(pool), 2)
+        self.assertFalse(second.closed)
+        self.assertFalse(third.closed)
+        self.assertEqual(len(self.clients), 3)
+
+    def testWaitBusy(self):
+        """
+            check that new connection waits for release of busy one
+        """
+        pool = SSHPool(max_size=1)
+        result = []
+
+        def connect():
+            with pool.connection("second", "user", "key", 10) as second:
+                result.append(second)
+
+        with pool.connection("first", "user", "key") as first:
+            waiter = threading.Thread(target=connect)
+            waiter.start()
+            waiter.join(0.05)
+            # waits for release of first
+            self.assertTrue(waiter.is_alive())
+            self.assertEqual(result, [])
+        waiter.join(10)
+        self.assertTrue(first.closed)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(len(pool), 1)
+
+    def testBroken(self):
+        """
+            check replace of broken connections
+        """
+        pool = SSHPool()
+        with pool.connection("host", "user", "key") as first:
+            pass
+        first.active = False
+        with pool.connection("host", "user", "key") as second:
+            self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+
+        with self.assertRaises(IOError):
+            with pool.connection("host", "user", "key") as third:
+                self.assertIs(second, third)
+                second.active = False
+                raise IOError()
+        self.assertTrue(second.closed)
+        self.assertEqual(len(pool), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+import http.server
+import json
+import threading
+import time
+from mock import patch, Mock
+import keystoneauth1.identity
+import keystoneauth1.session
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__))
+from testMock import unitLogger
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic import manage_utils
+from rednic import session
+from rednic.manage_utils import ManageUtils
+
+
+class stubOpenstackHandler(http.server.BaseHTTPRequestHandler):
+    """
+        keystone v2, cinder and nova on one port, each new object
+        is new connection
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    # headers and body are sent by separate writes
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        http.server.BaseHTTPRequestHandler.setup(self)
+        with self.server.lock:
+            self.server.stats["connections"] += 1
+
+    def log_message(self, *args):
+        pass
+
+    def __send__(self, code, body):
+        time.sleep(self.server.latency)
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def __count__(self, name):
+        with self.server.lock:
+            self.server.stats[name] += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.path.endswith("/tokens"):
+            self.__count__("requests")
+            return self.__send__(404, {})
+        self.__count__("tokens")
+        base = "http://127.0.0.1:%d" % self.server.server_port
+        self.__send__(200, {"access": {
+            "token": {
+                "id": "token", "expires": "2099-01-01T00:00:00Z",
+                "tenant": {"id": "tenant", "name": "demo"}
+            },
+            "serviceCatalog": [{
+                "type": "volumev3", "name": "cinderv3", "endpoints": [{
+                    "publicURL": base + "/volume/v3/tenant",
+                    "region": "RegionOne", "id": "1"
+                }]
+            }, {
+                "type": "compute", "name": "nova", "endpoints": [{
+                    "publicURL": base + "/compute/v2.1",
+                    "region": "RegionOne", "id": "2"
+                }]
+            }],
+            "user": {"id": "user", "name": "demo", "roles": []},
+            "metadata": {}
+        }})
+
+    def do_GET(self):
+        self.__count__("requests")
+        if self.path.startswith("/v2.0"):
+            # no discovery of identity versions
+            self.__send__(404, {})
+        elif self.headers.get("X-Auth-Token") != "token":
+            self.__send__(401, {})
+        elif "/volumes" in self.path:
+            self.__send__(200, {"volumes": []})
+        elif "/servers" in self.path:
+            self.__send__(200, {"servers": []})
+        else:
+            self.__send__(404, {})
+
+
+class stubOpenstack(object):
+    """
+        local http server with keystone, cinder and nova
+    """
+
+    def __init__(self, latency=0):
+        self.server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), stubOpenstackHandler
+        )
+        self.server.daemon_threads = True
+        self.server.latency = latency
+        self.server.lock = threading.Lock()
+        self.server.stats = {"connections": 0, "tokens": 0, "requests": 0}
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+
+    @property
+    def auth_url(self):
+        return "http://127.0.0.1:%d/v2.0" % self.server.server_port
+
+    @property
+    def stats(self):
+        with self.server.lock:
+            return dict(self.server.stats)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def stubManage(stub, **kwargs):
+    """
+        create ManageUtils for stub server with real clients,
+        installed cinderclient has no api v1
+    """
+    with patch.dict(manage_utils.SERVICE_CLIENTS, {
+        "cinder": (manage_utils.cinder_client, '3')
+    }):
+        manage = ManageUtils(
+            "demo", "secrete", "demo", stub.auth_url, unitLogger, **kwargs
+        )
+        # create clients with patched version
+        manage._cinder
+        manage._nova
+    return manage
+
+
+class TestSession(unittest.TestCase):
+
+    def testCreateAuth(self):
+        """
+            check selection of identity version by url
+        """
+        auth = session.create_auth(
+            "demo", "secrete", "demo", "http://10.0.2.15:5000/v2.0/"
+        )
+        self.assertIsInstance(auth, keystoneauth1.identity.v2.Password)
+        self.assertEqual(auth.tenant_name, "demo")
+
+        auth = session.create_auth(
+            "demo", "secrete", "demo", "http://10.0.2.15:5000/v3",
+            domain="other"
+        )
+        self.assertIsInstance(auth, keystoneauth1.identity.v3.Password)
+        self.assertEqual(auth.project_name, "demo")
+        self.assertEqual(auth.project_domain_id, "other")
+
+        auth = session.create_auth(
+            "demo", "secrete", "demo", "http://10.0.2.15:5000"
+        )
+        self.assertIsInstance(
+            auth, keystoneauth1.identity.generic.Password
+        )
+
+    def testCreateSession(self):
+        """
+            check pool of connections in session
+        """
+        result = session.create_session(
+            "demo", "secrete", "demo", "http://10.0.2.15:5000/v2.0",
+            pool_size=3, timeout=5
+        )
+        self.assertIsInstance(result, keystoneauth1.session.Session)
+        self.assertEqual(result.timeout, 5)
+        for scheme in ("http://", "https://"):
+            adapter = result.session.get_adapter(scheme + "10.0.2.15")
+            self.assertIsInstance(
+                adapter, keystoneauth1.session.TCPKeepAliveAdapter
+            )
+            self.assertEqual(adapter._pool_connections, 3)
+            self.assertEqual(adapter._pool_maxsize, 3)
+
+    def testSessionObject(self):
+        """
+            check that given session is passed to clients
+        """
+        shared = object()
+        with patch.object(manage_utils, "SERVICE_CLIENTS", {
+            "cinder": (Mock(), '1'), "nova": (Mock(), '2')
+        }):
+            manage = ManageUtils(
+                "demo", "secrete", "demo", "http://10.0.2.15:5000/v2.0",
+                unitLogger, session=shared
+            )
+            manage._cinder
+            manage._nova
+            for module, version in manage_utils.SERVICE_CLIENTS.values():
+                module.Client.assert_called_once_with(
+                    version, session=shared
+                )
+
+    def testSharedSession(self):
+        """
+            check that clients share one token and connections
+        """
+        stub = stubOpenstack()
+        self.addCleanup(stub.close)
+        manage = stubManage(stub, session=True, pool_size=2)
+        # no requests before first call
+        self.assertEqual(stub.stats["tokens"], 0)
+        for _ in range(3):
+            self.assertEqual(manage.volume_list(), [])
+            self.assertEqual(manage.instance_list(), [])
+        stats = stub.stats
+        self.assertEqual(stats["tokens"], 1)
+        self.assertEqual(stats["requests"], 6)
+        self.assertEqual(stats["connections"], 1)
+        self.assertIs(
+            manage._cinder.client.session, manage._nova.client.session
+        )
+
+    def testSharedSessionWarmup(self):
+        """
+            check that warmup fetch token once for all clients
+        """
+        stub = stubOpenstack()
+        self.addCleanup(stub.close)
+        manage = stubManage(stub, session=True)
+        manage.warmup(wait=True)
+        self.assertEqual(stub.stats["tokens"], 1)
+        self.assertEqual(manage.volume_list(), [])
+        self.assertEqual(stub.stats["tokens"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+import cinderclient.exceptions
+import novaclient.exceptions
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__))
+from testMock import fakeClock, unitLogger
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic import metrics
+from rednic import simulator
+from rednic.manage_utils import ManageUtils, ManageExeption
+
+
+class TestSimulator(unittest.TestCase):
+
+    def setUp(self):
+        self._clock = fakeClock(100)
+        self._cloud = simulator.SimulatedCloud(
+            transition_time=5, clock=self._clock, seed=1
+        )
+
+    def __manage__(self, **kwargs):
+        """
+            create object for tests over simulated cloud
+        """
+        return ManageUtils(
+            "demo", "secrete", "demo", "http://10.0.2.15:5000/v2.0",
+            unitLogger, clients=self._cloud.clients(), **kwargs
+        )
+
+    def testTransitions(self):
+        """
+            check asynchronous status changes of volumes
+        """
+        cinder = self._cloud.cinder()
+        _, (ins_id, ) = self._cloud.populate(servers=1)
+        volume = cinder.volumes.create(1, display_name="vol")
+        self.assertEqual(volume.status, "creating")
+        self._clock.now += 5
+        self.assertEqual(cinder.volumes.get(volume.id).status, "available")
+
+        volume.attach(ins_id, "/dev/vdb")
+        self.assertEqual(cinder.volumes.get(volume.id).status, "attaching")
+        # attached volume can not be deleted or attached again
+        self._clock.now += 5
+        volume = cinder.volumes.get(volume.id)
+        self.assertEqual(volume.status, "in-use")
+        self.assertEqual(volume.attachments[0]["server_id"], ins_id)
+        self.assertEqual(volume.attachments[0]["device"], "/dev/vdb")
+        with self.assertRaises(cinderclient.exceptions.BadRequest):
+            cinder.volumes.delete(volume)
+        with self.assertRaises(cinderclient.exceptions.BadRequest):
+            volume.attach(ins_id, "/dev/vdc")
+
+        cinder.volumes.detach(volume)
+        self.assertEqual(cinder.volumes.get(volume.id).status, "detaching")
+        self._clock.now += 5
+        volume = cinder.volumes.get(volume.id)
+        self.assertEqual(volume.status, "available")
+        self.assertEqual(volume.attachments, [])
+        with self.assertRaises(cinderclient.exceptions.BadRequest):
+            cinder.volumes.detach(volume)
+
+        cinder.volumes.delete(volume)
+        self.assertEqual(
+            [item.status for item in cinder.volumes.list()], ["deleting"]
+        )
+        self._clock.now += 5
+        self.assertEqual(cinder.volumes.list(), [])
+        with self.assertRaises(cinderclient.exceptions.NotFound):
+            cinder.volumes.get(volume.id)
+
+    def testList(self):
+        """
+            check filters, paging and tenants of lists
+        """
+        vol_ids, ins_ids = self._cloud.populate(volumes=5, servers=3)
+        self._cloud.populate(volumes=2, servers=1, tenant="other")
+        cinder = self._cloud.cinder()
+        nova = self._cloud.nova()
+
+        self.assertEqual([item.id for item in cinder.volumes.list()], vol_ids)
+        page = cinder.volumes.list(marker=vol_ids[1], limit=2)
+        self.assertEqual([item.id for item in page], vol_ids[2:4])
+        self.assertEqual(
+            len(cinder.volumes.list(search_opts={"all_tenants": 1})), 7
+        )
+        name = cinder.volumes.get(vol_ids[3]).display_name
+        found = cinder.volumes.list(search_opts={"display_name": name})
+        self.assertEqual([item.id for item in found], [vol_ids[3]])
+        self.assertEqual(
+            cinder.volumes.list(search_opts={"status": "in-use"}), []
+        )
+
+        self.assertEqual([item.id for item in nova.servers.list()], ins_ids)
+        server = nova.servers.get(ins_ids[0])
+        found = nova.servers.list(search_opts={"name": server.name})
+        self.assertEqual([item.id for item in found], [server.id])
+        with self.assertRaises(novaclient.exceptions.NotFound):
+            self._cloud.nova("other").servers.get(ins_ids[0])
+
+        server.add_floating_ip("172.24.4.1")
+        self.assertIn(
+            "172.24.4.1", nova.servers.get(server.id).networks["private"]
+        )
+        server.remove_floating_ip("172.24.4.1")
+        with self.assertRaises(novaclient.exceptions.NotFound):
+            server.remove_floating_ip("172.24.4.1")
+
+    def testPagesWithDeletes(self):
+        """
+            check paging while deletes are finished by list
+        """
+        vol_ids, _ = self._cloud.populate(volumes=10)
+        cinder = self._cloud.cinder()
+        for vol_id in vol_ids[1:8:2]:
+            cinder.volumes.delete(vol_id)
+        self._clock.now += 5
+        listed = []
+        marker = None
+        while True:
+            page = cinder.volumes.list(marker=marker, limit=3)
+            if not page:
+                break
+            listed.extend(volume.id for volume in page)
+            marker = page[-1].id
+        self.assertEqual(
+            listed, [vol_id for vol_id in vol_ids if vol_id not in
+                     vol_ids[1:8:2]]
+        )
+        self.assertEqual(self._cloud.calls()["cinder volumes.list"], 3)
+
+    def testErrors(self):
+        """
+            check random errors and latency of calls
+        """
+        waits = []
+        cloud = simulator.SimulatedCloud(
+            latency={"cinder volumes.get": 0.5}, error_rate=1,
+            sleep=waits.append, seed=1
+        )
+        vol_ids, ins_ids = cloud.populate(volumes=1, servers=1)
+        with self.assertRaises(cinderclient.exceptions.ClientException):
+            cloud.cinder().volumes.get(vol_ids[0])
+        with self.assertRaises(novaclient.exceptions.ClientException):
+            cloud.nova().servers.get(ins_ids[0])
+        self.assertEqual(waits, [0.5])
+        self.assertEqual(cloud.calls(), {
+            "cinder volumes.get": 1, "nova servers.get": 1
+        })
+
+        cloud = simulator.SimulatedCloud(
+            volume_error_rate=1, transition_time=0, seed=1
+        )
+        volume = cloud.cinder().volumes.create(1, display_name="vol")
+        self.assertEqual(cloud.cinder().volumes.get(volume.id).status, "error")
+
+    def testManage(self):
+        """
+            check operations of ManageUtils over simulated cloud
+        """
+        _, (ins_id, ) = self._cloud.populate(servers=1)
+        sink = metrics.MemorySink()
+        manage = self.__manage__(metrics=sink)
+        ins_name = manage.instance_get(ins_id)["name"]
+
+        volume = manage.volume_create(1, "vol")
+        self.assertEqual(volume["status"], "creating")
+        self._clock.now += 5
+        self.assertEqual(
+            manage.wait_for_volumes([volume["id"]], timeout=0),
+            {volume["id"]: "available"}
+        )
+        manage.volume_attach("/dev/vdb", vol_name="vol", ins_name=ins_name)
+        self._clock.now += 5
+        self.assertEqual(manage.volume_get(name="vol")["status"], "in-use")
+
+        manage.instance_attach_ip("172.24.4.1", name=ins_name)
+        manage.instance_detach_ip("172.24.4.1", name=ins_name)
+
+        manage.volume_detach(name="vol")
+        self._clock.now += 5
+        manage.volume_delete(name="vol")
+        self._clock.now += 5
+        with self.assertRaises(ManageExeption):
+            manage.volume_get(name="vol")
+        # clients of cloud are instrumented like created
+        self.assertEqual(
+            sink.snapshot()["operations"]["volume_attach"]["count"], 1
+        )
+
+    def testLargeTenant(self):
+        """
+            check lookup by name in tenant with 100k volumes
+        """
+        vol_ids, _ = self._cloud.populate(volumes=100000)
+        manage = self.__manage__()
+        name = self._cloud.cinder().volumes.get(vol_ids[-1]).display_name
+        self.assertEqual(manage.volume_get(name=name)["id"], vol_ids[-1])
+        self.assertEqual(
+            len(self._cloud.cinder().volumes.list(limit=1000)), 1000
+        )
+
+    def testRunLoad(self):
+        """
+            check report of load from concurrent clients
+        """
+        cloud = simulator.SimulatedCloud(
+            error_rate=0.05, transition_time=0, seed=1
+        )
+        cloud.populate(volumes=200, servers=10)
+        manage = ManageUtils(
+            "demo", "secrete", "demo", "http://10.0.2.15:5000/v2.0",
+            unitLogger, clients=cloud.clients()
+        )
+        report = simulator.run_load(manage, cloud, clients=4, operations=200)
+        self.assertEqual(report["clients"], 4)
+        self.assertEqual(report["operations"], 200)
+        self.assertEqual(
+            sum(item["count"] for item in report["by_operation"].values()),
+            200
+        )
+        self.assertGreater(report["errors"], 0)
+        self.assertGreater(report["throughput"], 0)
+        latency = report["latency"]
+        self.assertTrue(latency["p50"] <= latency["p99"] <= latency["max"])
+
+    def testPercentile(self):
+        """
+            check nearest rank percentiles
+        """
+        values = list(range(1, 101))
+        self.assertEqual(simulator._percentile(values, 0.5), 50)
+        self.assertEqual(simulator._percentile(values, 0.99), 99)
+        self.assertEqual(simulator._percentile([7], 0.99), 7)
+        self.assertIsNone(simulator._percentile([], 0.5))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+import json
+import os
+import stat
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(__file__))
+from testMock import fakeClock, unitLogger
+from testSession import stubOpenstack, stubManage
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic.token_cache import TokenCache
+
+AUTH_URL = "http://10.0.2.15:5000/v2.0"
+
+
+class TestTokenCache(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self._path = os.path.join(directory.name, "cache", "tokens.json")
+
+    def testSaveLoad(self):
+        """
+            check store of tokens with expire
+        """
+        clock = fakeClock(1000000)
+        cache = TokenCache(self._path, clock, unitLogger)
+        self.assertIsNone(cache.load(AUTH_URL, "demo", "demo"))
+        cache.save(AUTH_URL, "demo", "demo", "state", clock.now + 3600)
+        cache.save(AUTH_URL, "admin", "demo", "admin", clock.now + 60)
+
+        # only owner can read
+        self.assertEqual(stat.S_IMODE(os.stat(self._path).st_mode), 0o600)
+        self.assertEqual(
+            stat.S_IMODE(os.stat(os.path.dirname(self._path)).st_mode),
+            0o700
+        )
+
+        # new object reads same file
+        cache = TokenCache(self._path, clock, unitLogger)
+        self.assertEqual(cache.load(AUTH_URL, "demo", "demo"), "state")
+        self.assertIsNone(cache.load(AUTH_URL, "demo", "other"))
+        self.assertIsNone(cache.load(AUTH_URL + "/", "demo", "demo"))
+        # expires soon
+        self.assertIsNone(cache.load(AUTH_URL, "admin", "demo"))
+
+        # expired tokens are dropped on save
+        clock.now += 120
+        cache.save(AUTH_URL, "demo", "other", "other", clock.now + 3600)
+        with open(self._path) as cache_file:
+            self.assertEqual(len(json.load(cache_file)), 2)
+
+        clock.now += 3600 - 120
+        self.assertIsNone(cache.load(AUTH_URL, "demo", "demo"))
+
+        cache.drop(AUTH_URL, "demo", "other")
+        self.assertIsNone(cache.load(AUTH_URL, "demo", "other"))
+
+    def testUnsafeFile(self):
+        """
+            check that file readable by others or broken file is ignored
+        """
+        clock = fakeClock(1000000)
+        cache = TokenCache(self._path, clock, unitLogger)
+        cache.save(AUTH_URL, "demo", "demo", "state", clock.now + 3600)
+        os.chmod(self._path, 0o644)
+        self.assertIsNone(cache.load(AUTH_URL, "demo", "demo"))
+
+        with open(self._path, "w") as cache_file:
+            cache_file.write("{broken")
+        os.chmod(self._path, 0o600)
+        self.assertIsNone(cache.load(AUTH_URL, "demo", "demo"))
+        # file is rewritten
+        cache.save(AUTH_URL, "demo", "demo", "state", clock.now + 3600)
+        self.assertEqual(cache.load(AUTH_URL, "demo", "demo"), "state")
+
+    def testNotWritable(self):
+        """
+            check that error of write is not raised
+        """
+        os.makedirs(self._path)
+        cache = TokenCache(self._path, log=unitLogger)
+        cache.save(AUTH_URL, "demo", "demo", "state", 2 ** 40)
+        self.assertIsNone(cache.load(AUTH_URL, "demo", "demo"))
+
+    def testRestart(self):
+        """
+            check that next run uses token from file
+        """
+        stub = stubOpenstack()
+        self.addCleanup(stub.close)
+        manage = stubManage(stub, token_cache=self._path)
+        self.assertEqual(manage.volume_list(), [])
+        self.assertEqual(manage.instance_list(), [])
+        self.assertEqual(stub.stats["tokens"], 1)
+
+        # new process
+        manage = stubManage(stub, token_cache=self._path)
+        self.assertEqual(manage.volume_list(), [])
+        self.assertEqual(manage.instance_list(), [])
+        self.assertEqual(stub.stats["tokens"], 1)
+        self.assertEqual(stub.stats["requests"], 4)
+
+    def testRevokedToken(self):
+        """
+            check that rejected stored token is replaced
+        """
+        stub = stubOpenstack()
+        self.addCleanup(stub.close)
+        manage = stubManage(stub, token_cache=self._path)
+        manage.warmup(["cinder"], wait=True)
+        self.assertEqual(stub.stats["tokens"], 1)
+
+        # token is not valid anymore
+        with open(self._path) as cache_file:
+            tokens = json.load(cache_file)
+        for token in tokens.values():
+            state = json.loads(token["state"])
+            state["auth_token"] = "revoked"
+            token["state"] = json.dumps(state)
+        with open(self._path, "w") as cache_file:
+            json.dump(tokens, cache_file)
+
+        manage = stubManage(stub, token_cache=self._path)
+        self.assertEqual(manage.volume_list(), [])
+        self.assertEqual(stub.stats["tokens"], 2)
+        with open(self._path) as cache_file:
+            tokens = json.load(cache_file)
+        for token in tokens.values():
+            self.assertEqual(
+                json.loads(token["state"])["auth_token"], "token"
+            )
+
+if __name__ == '__main__':
+    unittest.main()
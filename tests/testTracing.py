@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import unittest
+import json
+from mock import MagicMock, Mock
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__))
+from testMock import mockCinderVolume, mockNovaInstance, unitLogger
+from testMock import patchClients
+sys.path.append(os.path.dirname(__file__) + "/..")
+from rednic import metrics
+from rednic import tracing
+from rednic.manage_utils import ManageUtils, ManageExeption
+
+# round-trip budget of composite operations without caches:
+# (operation, arguments, budget)
+BUDGETS = [
+    ("volume_attach", {
+        "mount_point": "/dev/vdb", "vol_name": "vol", "ins_name": "ins"
+    }, {
+        "cinder volumes.list": 1, "nova servers.list": 1,
+        "cinder volumes.attach": 1, "cinder volumes.get": 1
+    }),
+    ("volume_attach", {
+        "mount_point": "/dev/vdb", "vol_id": "vol_id", "ins_id": "ins_id",
+        "refresh": False
+    }, {
+        "cinder volumes.get": 1, "cinder volumes.attach": 1
+    }),
+    ("volume_delete", {"name": "vol"}, {
+        "cinder volumes.list": 1, "cinder volumes.delete": 1
+    }),
+    ("volume_detach", {"name": "vol"}, {
+        "cinder volumes.list": 1, "cinder volumes.detach": 1
+    }),
+    ("instance_attach_ip", {"ip": "10.0.0.1", "name": "ins"}, {
+        "nova servers.list": 1, "nova servers.add_floating_ip": 1
+    }),
+    ("instance_detach_ip", {"ip": "10.0.0.1", "name": "ins"}, {
+        "nova servers.list": 1, "nova servers.remove_floating_ip": 1
+    }),
+    ("volume_get", {"name": "vol"}, {"cinder volumes.list": 1}),
+    ("instance_get", {"name": "ins"}, {"nova servers.list": 1}),
+]
+
+# round-trip budget of lookups by name with warm caches
+CACHED_BUDGETS = [
+    ("volume_get", {"name": "vol"}, {"cinder volumes.get": 1}),
+    ("volume_delete", {"name": "vol"}, {
+        "cinder volumes.get": 1, "cinder volumes.delete": 1
+    }),
+    ("instance_attach_ip", {"ip": "10.0.0.1", "name": "ins"}, {
+        "nova servers.add_floating_ip": 1
+    }),
+]
+
+
+class TestTracing(unittest.TestCase):
+
+    _cinder = None
+
+    _nova = None
+
+    def setUp(self):
+        self._cinder, self._nova = patchClients(self)
+
+        volume = mockCinderVolume(
+            id="vol_id", display_name="vol", status="available"
+        )
+        volume.attach = MagicMock()
+        instance = mockNovaInstance(id="ins_id", name="ins")
+        instance.add_floating_ip = MagicMock()
+        instance.remove_floating_ip = MagicMock()
+        self._cinder.volumes.list = MagicMock(return_value=[volume])
+        self._cinder.volumes.get = MagicMock(return_value=volume)
+        self._nova.servers.list = MagicMock(return_value=[instance])
+        self._nova.servers.get = MagicMock(return_value=instance)
+
+    def __manage__(self, **kwargs):
+        """
+            create object for tests
+        """
+        return ManageUtils(
+            "demo", "secrete", "demo",
+            "http://10.0.2.15:5000/v2.0", unitLogger, **kwargs
+        )
+
+    def __check_budgets__(self, manage, tracer, budgets):
+        """
+            run operations and check round-trips of each
+        """
+        for operation, kwargs, budget in budgets:
+            getattr(manage, operation)(**kwargs)
+            span = tracer.last(operation)
+            try:
+                tracing.check_budget(span, budget)
+            except tracing.BudgetExceeded as e:
+                self.fail("%s %s: %s" % (operation, kwargs, e))
+
+    def testBudgets(self):
+        """
+            check round-trips of composite operations
+        """
+        tracer = tracing.Tracer()
+        self.__check_budgets__(
+            self.__manage__(tracer=tracer), tracer, BUDGETS
+        )
+
+    def testCachedBudgets(self):
+        """
+            check round-trips of lookups by name with caches
+        """
+        tracer = tracing.Tracer()
+        manage = self.__manage__(tracer=tracer, cache_ttl=60)
+        manage.volume_get(name="vol")
+        manage.instance_get(name="ins")
+        self.__check_budgets__(manage, tracer, CACHED_BUDGETS)
+
+    def testBudgetExceeded(self):
+        """
+            check that extra round-trips are found
+        """
+        tracer = tracing.Tracer()
+        manage = self.__manage__(tracer=tracer)
+        manage.volume_attach("/dev/vdb", vol_name="vol", ins_name="ins")
+        span = tracer.last()
+        tracing.check_budget(span, 4)
+        with self.assertRaises(tracing.BudgetExceeded):
+            tracing.check_budget(span, 3)
+        with self.assertRaises(tracing.BudgetExceeded):
+            tracing.check_budget(span, {
+                "cinder volumes.list": 1, "nova servers.list": 1,
+                "cinder volumes.attach": 1
+            })
+
+    def testSpanTree(self):
+        """
+            check tree of spans and export
+        """
+        tracer = tracing.Tracer()
+        manage = self.__manage__(tracer=tracer, metrics=metrics.MemorySink())
+        manage.volume_attach("/dev/vdb", vol_name="vol", ins_name="ins")
+        with self.assertRaises(ManageExeption):
+            manage.volume_get(name="missed")
+
+        attach, missed = tracer.traces()
+        self.assertEqual(attach.name, "volume_attach")
+        self.assertEqual(attach.kind, tracing.OPERATION)
+        self.assertIsNone(attach.error)
+        names = sorted(child.name for child in attach.children)
+        self.assertEqual(names, [
+            "cinder volumes.attach", "cinder volumes.list",
+            "nova servers.list", "volume_get"
+        ])
+        # nested operation has own children
+        get = [
+            child for child in attach.children if child.name == "volume_get"
+        ][0]
+        self.assertEqual(
+            [child.name for child in get.children], ["cinder volumes.get"]
+        )
+        remote = get.children[0]
+        self.assertEqual(remote.kind, tracing.REMOTE)
+        self.assertEqual(remote.attributes["service"], "cinder")
+        self.assertEqual(remote.attributes["call"], "volumes.get")
+        self.assertTrue(remote.duration <= get.duration <= attach.duration)
+        self.assertIn("ManageExeption", missed.error)
+
+        exported = json.loads(tracer.to_json())
+        self.assertEqual(len(exported), 2)
+        self.assertEqual(exported[0], attach.to_dict())
+        self.assertEqual(exported[0]["children"][0]["children"], [])
+
+        tracer.clear()
+        self.assertEqual(tracer.traces(), [])
+        self.assertIsNone(tracer.last())
+
+    def testPayloadSize(self):
+        """
+            check estimate of result size
+        """
+        resource = Mock()
+        resource._info = {"id": "id"}
+        size = len(json.dumps({"id": "id"}))
+        self.assertEqual(tracing.payload_size(None), (0, 0))
+        self.assertEqual(tracing.payload_size(b"12345"), (1, 5))
+        self.assertEqual(tracing.payload_size(resource), (1, size))
+        self.assertEqual(
+            tracing.payload_size([resource, resource]), (2, size * 2)
+        )
+        self.assertEqual(tracing.payload_size([resource, Mock()]), (2, None))
+
+    def testMaxTraces(self):
+        """
+            check that only last traces are kept
+        """
+        tracer = tracing.Tracer(max_traces=2)
+        for name in ("first", "second", "third"):
+            with tracer.span(name):
+                with tracer.span("child"):
+                    pass
+        self.assertEqual(
+            [span.name for span in tracer.traces()], ["second", "third"]
+        )
+
+if __name__ == '__main__':
+    unittest.main()